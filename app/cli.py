@@ -0,0 +1,89 @@
+"""Maintenance commands, e.g. ``python -m app.cli rebuild-rollups``, and ``python -m app.cli serve``"""
+import argparse
+import os
+from app.core.config import settings
+from app.core.shared_state import create_shared_state
+from app.db.session import SessionLocal, engine
+from app.db.migrations import run_migrations
+from app.services.rollup_service import RollupService
+
+def migrate(args: argparse.Namespace) -> None:
+    run_migrations(engine)
+    print("Database schema is up to date")
+
+def rebuild_rollups(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        rows = RollupService(db).rebuild(args.user_id)
+    finally:
+        db.close()
+    print(f"Rebuilt transaction rollups ({rows} rows)")
+
+def split_pools(workers: int) -> None:
+    """Give each of workers server processes its share of the host's pools.
+
+    Every web worker owns an ingestion pool and every ingestion worker a PDF
+    page pool, so the per-process defaults would multiply into WEB_WORKERS x
+    INGESTION_WORKERS x PDF_EXTRACT_WORKERS processes. INGESTION_WORKERS is
+    split between the web workers (at least one each) and the CPUs between
+    all ingestion workers. Values set in the environment are kept.
+    """
+    if "INGESTION_WORKERS" not in os.environ:
+        os.environ["INGESTION_WORKERS"] = str(max(1, settings.INGESTION_WORKERS // workers))
+    if "PDF_EXTRACT_WORKERS" not in os.environ:
+        ingestion_workers = workers * max(1, int(os.environ["INGESTION_WORKERS"]))
+        os.environ["PDF_EXTRACT_WORKERS"] = str(max(1, (os.cpu_count() or 1) // ingestion_workers))
+
+def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+    workers = max(1, args.workers)
+    if settings.AUTO_MIGRATE:
+        # Once here rather than in every worker's startup hook, where the
+        # workers would race each other over the same DDL
+        run_migrations(engine)
+        engine.dispose()
+        os.environ["AUTO_MIGRATE"] = "false"
+    if workers > 1:
+        backend = settings.SHARED_STATE_BACKEND
+        if backend.lower() == "auto" and not settings.SHARED_STATE_URL:
+            # Workers inherit the environment: they all open the same state file
+            backend = os.environ["SHARED_STATE_BACKEND"] = "sqlite"
+        # Created here before the workers race to create it
+        state = create_shared_state(backend)
+        if state.name == "memory":
+            print("warning: SHARED_STATE_BACKEND=memory gives every worker its own caches and rate limits")
+        state.close()
+        # Workers inherit the environment, which is read for their settings
+        split_pools(workers)
+        if settings.METRICS_ENABLED:
+            print("note: /metrics and /health/cache report the worker that answered; see README")
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=workers)
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subcommands.add_parser("migrate", help="create missing tables and indexes")
+    migrate_parser.set_defaults(handler=migrate)
+
+    rollup_parser = subcommands.add_parser(
+        "rebuild-rollups", help="recompute the summary rollup table from transactions"
+    )
+    rollup_parser.add_argument("--user-id", type=int, default=None, help="only rebuild this user")
+    rollup_parser.set_defaults(handler=rebuild_rollups)
+
+    serve_parser = subcommands.add_parser(
+        "serve", help="migrate, then run the API with several worker processes"
+    )
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    serve_parser.add_argument(
+        "--workers", type=int, default=settings.WEB_WORKERS, help="server processes (default WEB_WORKERS)"
+    )
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -20,9 +20,72 @@ import os
 
 class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./finance_assistant.db")
+    ASYNC_DB: bool = os.getenv("ASYNC_DB", "false").lower() == "true"
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Run the schema migrations when the app starts; turn off when a deploy
+    # step runs `python -m app.cli migrate` before the workers start
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "true").lower() == "true"
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)))
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "asdfghjkl;")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:8000")
+    # Server processes started by `python -m app.cli serve`
+    WEB_WORKERS: int = int(os.getenv("WEB_WORKERS", str(os.cpu_count() or 1)))
+    # auto, memory, sqlite or redis; see app/core/shared_state.py
+    SHARED_STATE_BACKEND: str = os.getenv("SHARED_STATE_BACKEND", "auto")
+    SHARED_STATE_URL: str = os.getenv("SHARED_STATE_URL", "")
+    # Failed logins per client IP and username per minute; 0 turns the limit off.
+    # Behind a reverse proxy every client has the proxy's IP, so leave it off
+    # unless FORWARDED_ALLOW_IPS tells uvicorn to trust the proxy's X-Forwarded-For
+    LOGIN_RATE_LIMIT: int = int(os.getenv("LOGIN_RATE_LIMIT", "0"))
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    # Each ingestion worker owns a page pool, so split the CPUs between them
+    PDF_EXTRACT_WORKERS: int = int(os.getenv("PDF_EXTRACT_WORKERS", str(max(1, (os.cpu_count() or 1) // max(1, INGESTION_WORKERS)))))
+    # A running job whose worker stops renewing this lease is handed to another worker
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "uploads")
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+    MAX_BATCH_FILES: int = int(os.getenv("MAX_BATCH_FILES", "100"))
+    # Batches up to this size are answered inline, larger ones become a job
+    BATCH_SYNC_MAX_FILES: int = int(os.getenv("BATCH_SYNC_MAX_FILES", "10"))
+    # Caps the whole batch request, and so any ZIP archive in it
+    MAX_BATCH_ARCHIVE_BYTES: int = int(os.getenv("MAX_BATCH_ARCHIVE_BYTES", str(200 * 1024 * 1024)))
+    BULK_INSERT_CHUNK_SIZE: int = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+    BULK_IMPORT_MAX_ERRORS: int = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+    EXPORT_CHUNK_SIZE: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1000"))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", str(64 * 1024)))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16"))
+    TESSERACT_CMD: str = os.getenv("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe" if os.name == "nt" else "")
+    OCR_PREPROCESS: bool = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+    OCR_TARGET_DPI: int = int(os.getenv("OCR_TARGET_DPI", "300"))
+    OCR_RECEIPT_WIDTH_INCHES: float = float(os.getenv("OCR_RECEIPT_WIDTH_INCHES", "3.15"))
+    OCR_BINARIZE: bool = os.getenv("OCR_BINARIZE", "true").lower() == "true"
+    OCR_CROP: bool = os.getenv("OCR_CROP", "true").lower() == "true"
+    OCR_CACHE_MAX_SIZE: int = int(os.getenv("OCR_CACHE_MAX_SIZE", "256"))
+    OCR_CACHE_TTL_SECONDS: int = int(os.getenv("OCR_CACHE_TTL_SECONDS", "3600"))
+    OCR_ENGINE: str = os.getenv("OCR_ENGINE", "auto")
+    OCR_LANGUAGE: str = os.getenv("OCR_LANGUAGE", "eng")
+    OCR_POOL_SIZE: int = int(os.getenv("OCR_POOL_SIZE", "2"))
+    OCR_TIMEOUT_SECONDS: float = float(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
 
 settings = Settings()
\ No newline at end of file
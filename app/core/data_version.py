@@ -0,0 +1,46 @@
+from typing import Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.shared_state import get_shared_state
+
+_CHANGED_USERS = "changed_users"
+
+class DataVersions:
+    """Per-user version of some of the user's state, e.g. the data behind the transaction reads.
+
+    A version changes whenever one of the user's writes commits, so anything
+    derived from it (ETags, cached responses, cached users) can be keyed by
+    it. The counters live in the shared state backend, so a write handled
+    by one web worker moves the version seen by all of them. Versions
+    include the backend's token: a memory backend restarts its counters at
+    0, and a restarted server must not hand out the ETags of the previous one.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def get(self, user_id: int) -> str:
+        state = get_shared_state()
+        return f"{state.token}.{state.get_version(f'{self.namespace}:{user_id}')}"
+
+    def bump(self, user_id: int) -> None:
+        get_shared_state().bump_version(f"{self.namespace}:{user_id}")
+
+data_versions = DataVersions("data")
+
+def mark_changed(db: Session, user_ids: Iterable[int]) -> None:
+    """Record that this session wrote data of user_ids; their versions move once it commits.
+
+    Bumping only after the commit keeps a concurrent read from caching the
+    old data under the new version.
+    """
+    db.info.setdefault(_CHANGED_USERS, set()).update(user_ids)
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_USERS, ()):
+        data_versions.bump(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
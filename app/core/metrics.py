@@ -0,0 +1,302 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Seconds; wide enough for a 1 ms SELECT and a minute-long OCR run
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Registry:
+    """The metrics of this process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry: Optional[Registry] = registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """The child for one combination of label values, created on first use"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self) -> list:
+        with self._lock:
+            return sorted(self._children.items())
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def take(self) -> float:
+        with self._lock:
+            value, self.value = self.value, 0
+            return value
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            yield f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"
+
+    def drain(self) -> dict:
+        """Every child's value, resetting it; picklable, for merge() in another process"""
+        return {values: child.take() for values, child in self._items()}
+
+    def merge(self, drained: dict) -> None:
+        for values, value in drained.items():
+            self.labels(*values).inc(value)
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # counts[i] observations fell in (buckets[i-1], buckets[i]]; the last is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the seconds spent in the with block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def state(self, reset: bool = False) -> tuple[list[int], float]:
+        with self._lock:
+            state = (list(self.counts), self.sum)
+            if reset:
+                self.counts = [0] * len(self.counts)
+                self.sum = 0.0
+            return state
+
+    def merge(self, counts: list[int], total: float) -> None:
+        with self._lock:
+            self.counts = [mine + theirs for mine, theirs in zip(self.counts, counts)]
+            self.sum += total
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, **kwargs)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def samples(self) -> Iterator[str]:
+        for values, child in self._items():
+            counts, total = child.state()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _labels(self.labelnames + ("le",), values + (_number(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+    def drain(self) -> dict:
+        """Every child's bucket counts and sum, resetting them; picklable, for merge() in another process"""
+        return {values: child.state(reset=True) for values, child in self._items()}
+
+    def merge(self, drained: dict) -> None:
+        for values, (counts, total) in drained.items():
+            self.labels(*values).merge(counts, total)
+
+class CallbackMetric(_Metric):
+    """A metric whose samples are read from elsewhere (e.g. cache counters) when rendered"""
+
+    def __init__(self, name: str, documentation: str, type: str, labelnames: tuple, read: Callable[[], Iterable[tuple]], **kwargs):
+        self.type = type
+        self._read = read
+        super().__init__(name, documentation, labelnames, **kwargs)
+
+    def samples(self) -> Iterator[str]:
+        for values, value in self._read():
+            yield f"{self.name}{_labels(self.labelnames, values)} {_number(value)}"
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by route template and status code", ("method", "route", "status")
+)
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template, until the last body byte is sent",
+    ("method", "route")
+)
+db_query_seconds = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time by statement kind", ("operation",)
+)
+db_query_errors = Counter(
+    "db_query_errors_total", "SQL statements that raised, by exception (OperationalError includes 'database is locked')",
+    ("operation", "error")
+)
+ingestion_stage_seconds = Histogram(
+    "ingestion_stage_duration_seconds",
+    "Time spent per ingestion stage: upload_write, ocr, pdf_extract, parse, db_insert", ("stage",)
+)
+ingestion_job_seconds = Histogram(
+    "ingestion_job_duration_seconds", "Ingestion job run time by kind and final status", ("kind", "status")
+)
+
+# Recorded inside the ingestion worker processes and shipped back with each job's result
+WORKER_METRICS = {
+    "ingestion_stage": ingestion_stage_seconds,
+    "ingestion_job": ingestion_job_seconds,
+    "db_query": db_query_seconds,
+    "db_query_errors": db_query_errors,
+}
+
+def drain_worker_metrics() -> dict:
+    return {key: WORKER_METRICS[key].drain() for key in WORKER_METRICS}
+
+def merge_worker_metrics(drained: dict) -> None:
+    for key, state in drained.items():
+        WORKER_METRICS[key].merge(state)
+
+class Stopwatch:
+    """Adds up the time spent inside every `with stopwatch:` block"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Stopwatch":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.elapsed += time.perf_counter() - self._started
+
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA", "CREATE", "DROP", "ALTER"}
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+def instrument_engine(target: Engine) -> None:
+    """Time every statement executed on target (a sync Engine, or an AsyncEngine's sync_engine)"""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        db_query_seconds.labels(_operation(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(target, "handle_error")
+    def count_query_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        statement = context.statement or ""
+        db_query_errors.labels(_operation(statement), type(context.original_exception).__name__).inc()
+
+def register_cache_metrics(caches: dict[str, Callable[[], dict]]) -> None:
+    """Expose hits, misses and size of TTLCache-style stats() callables, keyed by cache name"""
+    def read(field: str) -> Callable[[], list]:
+        return lambda: [((name,), stats()[field]) for name, stats in caches.items()]
+
+    CallbackMetric("cache_hits_total", "Cache hits", "counter", ("cache",), read("hits"))
+    CallbackMetric("cache_misses_total", "Cache misses", "counter", ("cache",), read("misses"))
+    CallbackMetric("cache_entries", "Entries currently cached", "gauge", ("cache",), read("size"))
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template.
+
+    Routes are labelled by their template (/receipts/jobs/{job_id}), not the
+    raw path, so the number of series stays bounded; unmatched paths share
+    one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            http_request_seconds.labels(method, template).observe(time.perf_counter() - started)
+            http_requests.labels(method, template, status).inc()
@@ -0,0 +1,68 @@
+from typing import Any, Optional
+import hashlib
+from fastapi import Request, Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.data_version import data_versions
+from app.core.serialization import dumps
+
+# (user id, data version, path, query) -> encoded JSON body
+response_cache = TTLCache(settings.RESPONSE_CACHE_MAX_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+def response_cache_stats() -> dict:
+    return response_cache.stats()
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class CachedResponse:
+    """Conditional GET and server-side caching for one read of a user's data.
+
+    The ETag and the cache key are derived from the user's data version, so
+    both change as soon as one of the user's writes commits. A hit is
+    answered without touching the database.
+    """
+
+    def __init__(self, request: Request, user_id: int):
+        query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+        self.key = (user_id, data_versions.get(user_id), request.url.path, query)
+        self.etag = '"' + hashlib.blake2b(repr(self.key).encode(), digest_size=16).hexdigest() + '"'
+        self.if_none_match = request.headers.get("if-none-match")
+
+    def lookup(self) -> Optional[Response]:
+        """A 304 or a cached 200 response, or None when the data has to be read"""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        if etag_matches(self.if_none_match, self.etag):
+            return Response(status_code=304, headers=self._headers())
+        body = response_cache.get(self.key)
+        if body is not None:
+            return self._response(body)
+        return None
+
+    def store(self, content: Any) -> Response:
+        """Encode content (already shaped like the route's response_model), cache it and return it with the ETag.
+
+        The route returns this Response itself, so FastAPI does not validate
+        and re-encode the content against response_model again.
+        """
+        body = dumps(content)
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return Response(content=body, media_type="application/json")
+        # Oversized pages are not worth the memory; they still get an ETag
+        if len(body) <= settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            response_cache.set(self.key, body)
+        return self._response(body)
+
+    def _headers(self) -> dict:
+        # private: responses depend on the bearer token; no-cache: clients
+        # revalidate every time, which is a cheap 304 while nothing changed
+        return {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+
+    def _response(self, body: bytes) -> Response:
+        return Response(content=body, media_type="application/json", headers=self._headers())
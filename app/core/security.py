@@ -1,10 +1,50 @@
  
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
+import threading
 from passlib.context import CryptContext
+from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max to the configured cost makes passlib flag hashes made with
+# any other cost, so they are rehashed on the user's next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop; the semaphore caps running + queued work to shed load under bursts
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+)
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+async def _run_hasher(func, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy("Too many password operations in progress")
+    future = _hash_executor.submit(func, *args)
+    # Free the slot when the work finishes, even if the request goes away first
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hasher(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password; also returns a new hash when the stored one uses an outdated cost"""
+    return await _run_hasher(pwd_context.verify_and_update, plain_password, hashed_password)
\ No newline at end of file
@@ -0,0 +1,54 @@
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Neither encoder writes a Decimal as a number without going through
+        # float; dumps retries with _encode_exact
+        raise TypeError("Decimal needs the exact encoder")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _encode_exact(value: Any) -> str:
+    """JSON for content holding Decimals, each written digit for digit as a number"""
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(str(key), ensure_ascii=False)}:{_encode_exact(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_encode_exact(item) for item in value) + "]"
+    if value is None or isinstance(value, (str, int, float)):
+        return json.dumps(value, ensure_ascii=False, allow_nan=False)
+    return _encode_exact(_default(value))
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed.
+
+    Meant for the plain dicts and lists the read paths build from SQL rows:
+    dates and datetimes are written as ISO 8601 like Pydantic does, and
+    anything else unusual goes through _default. Amounts are floats where
+    that is exact (see json_amount); content with Decimals in it takes a
+    slower encoder that writes them as exact JSON numbers.
+    """
+    try:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    except TypeError:
+        # Raises the TypeError again for content that is not serializable at all
+        return _encode_exact(content).encode("utf-8")
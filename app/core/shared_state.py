@@ -0,0 +1,226 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_state: Optional["SharedState"] = None
+_state_lock = threading.Lock()
+
+class SharedState(ABC):
+    """State every web worker of a deployment has to agree on.
+
+    Holds version counters (what cached responses and users are keyed by,
+    so a write in one worker invalidates the caches of all of them) and
+    windowed hit counters for rate limits. token identifies the store: it
+    changes when the store is new, e.g. after the counters were lost, so
+    versions of an older store are never mistaken for current ones.
+    """
+    name = "base"
+    token: str
+
+    @abstractmethod
+    def get_version(self, key: str) -> int:
+        """Current version of key; 0 until it is first bumped"""
+
+    @abstractmethod
+    def bump_version(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def hit(self, key: str, window_seconds: int) -> int:
+        """Count a hit on key; returns the hits in the current window, including this one"""
+
+    @abstractmethod
+    def hits(self, key: str, window_seconds: int) -> int:
+        """Hits on key in the current window, without counting one"""
+
+    def close(self) -> None:
+        pass
+
+class MemoryState(SharedState):
+    """Plain dicts in this process: right for a single worker only"""
+    name = "memory"
+
+    def __init__(self):
+        # Counters restart at 0 with the process, so the token does too
+        self.token = uuid.uuid4().hex[:12]
+        self._versions: dict[str, int] = {}
+        self._hits: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def get_version(self, key: str) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def bump_version(self, key: str) -> None:
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def hit(self, key: str, window_seconds: int) -> int:
+        window = int(time.time() // window_seconds)
+        with self._lock:
+            if len(self._hits) > 10_000:
+                self._hits = {entry: count for entry, count in self._hits.items() if entry[1] >= window}
+            count = self._hits.get((key, window), 0) + 1
+            self._hits[(key, window)] = count
+            return count
+
+    def hits(self, key: str, window_seconds: int) -> int:
+        with self._lock:
+            return self._hits.get((key, int(time.time() // window_seconds)), 0)
+
+class SQLiteState(SharedState):
+    """A small SQLite file shared by the workers of one host.
+
+    Placed on /dev/shm where it exists, so it lives in shared memory and
+    costs no disk I/O; WAL mode lets every worker read while one writes.
+    Each thread keeps its own connection.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._swept_at = 0.0
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hits (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('token', ?)", (uuid.uuid4().hex[:12],))
+        self.token = conn.execute("SELECT value FROM meta WHERE key = 'token'").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            # Autocommit: every statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = conn
+        return conn
+
+    def get_version(self, key: str) -> int:
+        row = self._connection().execute("SELECT value FROM versions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, key: str) -> None:
+        self._connection().execute(
+            "INSERT INTO versions (key, value) VALUES (?, 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1",
+            (key,)
+        )
+
+    def hit(self, key: str, window_seconds: int) -> int:
+        now = time.time()
+        window = int(now // window_seconds)
+        conn = self._connection()
+        if now - self._swept_at > window_seconds:
+            self._swept_at = now
+            conn.execute("DELETE FROM hits WHERE expires_at < ?", (now,))
+        conn.execute(
+            "INSERT INTO hits (key, count, expires_at) VALUES (?, 1, ?) "
+            "ON CONFLICT (key) DO UPDATE SET count = count + 1",
+            (f"{key}:{window}", (window + 1) * window_seconds)
+        )
+        return conn.execute("SELECT count FROM hits WHERE key = ?", (f"{key}:{window}",)).fetchone()[0]
+
+    def hits(self, key: str, window_seconds: int) -> int:
+        row = self._connection().execute(
+            "SELECT count FROM hits WHERE key = ?", (f"{key}:{int(time.time() // window_seconds)}",)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def close(self) -> None:
+        conn = getattr(self._local, "connection", None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+class RedisState(SharedState):
+    """Redis, for workers spread over several hosts; needs the optional redis package"""
+    name = "redis"
+    prefix = "finance-assistant:"
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._redis.set(f"{self.prefix}token", uuid.uuid4().hex[:12], nx=True)
+        self.token = self._redis.get(f"{self.prefix}token").decode()
+
+    def get_version(self, key: str) -> int:
+        return int(self._redis.hget(f"{self.prefix}versions", key) or 0)
+
+    def bump_version(self, key: str) -> None:
+        self._redis.hincrby(f"{self.prefix}versions", key, 1)
+
+    def hit(self, key: str, window_seconds: int) -> int:
+        window_key = self._window_key(key, window_seconds)
+        count, _ = self._redis.pipeline().incr(window_key).expire(window_key, window_seconds).execute()
+        return count
+
+    def hits(self, key: str, window_seconds: int) -> int:
+        return int(self._redis.get(self._window_key(key, window_seconds)) or 0)
+
+    def _window_key(self, key: str, window_seconds: int) -> str:
+        return f"{self.prefix}hits:{key}:{int(time.time() // window_seconds)}"
+
+    def close(self) -> None:
+        self._redis.close()
+
+def default_sqlite_path() -> str:
+    """One state file per database, in shared memory where available"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    digest = hashlib.sha256(settings.DATABASE_URL.encode()).hexdigest()[:16]
+    return os.path.join(directory, f"finance-assistant-state-{digest}.db")
+
+def create_shared_state(kind: Optional[str] = None, url: Optional[str] = None) -> SharedState:
+    """Build the backend named by kind (default SHARED_STATE_BACKEND).
+
+    "auto" picks Redis for a redis:// SHARED_STATE_URL, SQLite for any
+    other (a file path) and memory when it is empty; `python -m app.cli
+    serve` switches it to "sqlite" when it starts several workers.
+    """
+    kind = (kind or settings.SHARED_STATE_BACKEND).lower()
+    url = settings.SHARED_STATE_URL if url is None else url
+    if kind == "auto":
+        if url.startswith(("redis://", "rediss://", "unix://")):
+            kind = "redis"
+        else:
+            kind = "sqlite" if url else "memory"
+    if kind == "memory":
+        return MemoryState()
+    if kind == "sqlite":
+        return SQLiteState(url.removeprefix("sqlite:///") if url else default_sqlite_path())
+    if kind == "redis":
+        return RedisState(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown shared state backend: {kind}")
+
+def get_shared_state() -> SharedState:
+    """Return this process's shared state backend, creating it on first use"""
+    global _state
+    # Read on every cached request: skip the lock once it exists
+    if _state is not None:
+        return _state
+    with _state_lock:
+        if _state is None:
+            _state = create_shared_state()
+            logger.info("Shared state backend: %s", _state.name)
+        return _state
+
+def close_shared_state() -> None:
+    global _state
+    with _state_lock:
+        if _state is not None:
+            _state.close()
+            _state = None
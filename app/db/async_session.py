@@ -0,0 +1,67 @@
+from typing import AsyncIterator, Optional
+import threading
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.session import engine_options, install_sqlite_pragmas
+
+# Async drivers for the sync URLs DATABASE_URL may hold
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+_async_lock = threading.Lock()
+
+def async_url(url: str) -> str:
+    """DATABASE_URL rewritten to use the dialect's async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def build_async_engine(url: Optional[str] = None) -> AsyncEngine:
+    """The async twin of build_engine: same pool settings and SQLite pragmas"""
+    if url is None:
+        sync_url = settings.DATABASE_URL
+        target_url = settings.ASYNC_DATABASE_URL or async_url(sync_url)
+    else:
+        sync_url, target_url = url, async_url(url)
+    options = engine_options(sync_url)
+    if make_url(target_url).get_backend_name() == "sqlite":
+        # Every aiosqlite connection owns a thread, and pooled ones would keep
+        # the process alive until someone disposes the engine. Opening a
+        # SQLite file is cheap, so each session gets its own connection,
+        # closed when the session ends (NullPool, aiosqlite's default).
+        options.pop("pool_size", None)
+        options.pop("max_overflow", None)
+    built = create_async_engine(target_url, **options)
+    if built.dialect.name == "sqlite":
+        install_sqlite_pragmas(built.sync_engine, sync_url)
+    if settings.METRICS_ENABLED:
+        instrument_engine(built.sync_engine)
+    return built
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Created on first use, so the async driver is only imported when ASYNC_DB is on"""
+    global _async_engine, _async_sessionmaker
+    with _async_lock:
+        if _async_sessionmaker is None:
+            _async_engine = build_async_engine()
+            _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False)
+        return _async_sessionmaker
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    with _async_lock:
+        async_engine, _async_engine, _async_sessionmaker = _async_engine, None, None
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,48 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement, FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import Date
+
+BUCKETS = ("day", "week", "month", "year")
+
+# SQLite date() modifiers that move a 'YYYY-MM-DD' value to the start of its
+# bucket; 'weekday 0' goes forward to Sunday, so weeks start on Monday as
+# date_trunc('week', ...) does
+_SQLITE_BUCKET_MODIFIERS = {
+    "week": ("weekday 0", "-6 days"),
+    "month": ("start of month",),
+    "year": ("start of year",),
+}
+
+class date_bucket(FunctionElement):
+    """The first day of the day/week/month/year bucket a date falls in, as a DATE.
+
+    Compiles to date_trunc on PostgreSQL (and other dialects that have it)
+    and to date() with modifiers on SQLite, so the same query groups by
+    bucket in the database on both.
+    """
+    type = Date()
+    inherit_cache = True
+    # The bucket changes the SQL, so it is part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [("bucket", InternalTraversal.dp_string)]
+
+    def __init__(self, column: ColumnElement, bucket: str):
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        self.bucket = bucket
+        super().__init__(column)
+
+@compiles(date_bucket)
+def _compile_date_trunc(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.bucket == "day":
+        return column
+    return f"CAST(date_trunc('{element.bucket}', {column}) AS DATE)"
+
+@compiles(date_bucket, "sqlite")
+def _compile_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.bucket == "day":
+        return column
+    modifiers = "".join(f", '{modifier}'" for modifier in _SQLITE_BUCKET_MODIFIERS[element.bucket])
+    return f"date({column}{modifiers})"
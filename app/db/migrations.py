@@ -0,0 +1,128 @@
+from sqlalchemy import Enum, Integer, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.db.base import Base
+import app.models  # registers every model on Base.metadata
+
+def run_migrations(engine: Engine) -> None:
+    """Bring an existing database up to the current schema; safe to run on every start"""
+    convert_amounts_to_cents(engine)
+    had_rollups = inspect(engine).has_table("transaction_rollups")
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_enum_values(engine)
+    backfill_receipt_kinds(engine)
+    # create_all only creates missing tables, so indexes added to models
+    # later have to be created explicitly on databases that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    if not had_rollups:
+        # Databases created before the rollup table existed need it backfilled
+        from app.services.rollup_service import RollupService
+        with Session(engine) as db:
+            RollupService(db).rebuild()
+
+def convert_amounts_to_cents(engine: Engine) -> None:
+    """Convert transactions.amount from a float column to integer cents.
+
+    SQLite cannot change a column's type, and a REAL column would turn the
+    integers back into floats, so there the table is rebuilt; other databases
+    alter the column in place. The rollup table is dropped and then rebuilt
+    from the converted rows like on a first start.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table("transactions"):
+        return
+    columns = [column["name"] for column in inspector.get_columns("transactions")]
+    amount_type = next(column["type"] for column in inspector.get_columns("transactions") if column["name"] == "amount")
+    if isinstance(amount_type, Integer):
+        return
+    had_rollups = inspector.has_table("transaction_rollups")
+    indexes = [index["name"] for index in inspector.get_indexes("transactions")]
+
+    with engine.begin() as conn:
+        if had_rollups:
+            conn.execute(text("DROP TABLE transaction_rollups"))
+        if engine.dialect.name != "sqlite":
+            conn.execute(text("ALTER TABLE transactions ALTER COLUMN amount TYPE BIGINT USING ROUND(amount * 100)"))
+            return
+
+        # The old indexes move with the renamed table and would clash by name
+        for name in indexes:
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("ALTER TABLE transactions RENAME TO transactions_float"))
+        table = Base.metadata.tables["transactions"]
+        table.create(bind=conn)
+        copied = [name for name in columns if name in table.c]
+        source = ", ".join("CAST(ROUND(amount * 100) AS INTEGER)" if name == "amount" else name for name in copied)
+        conn.execute(text(f"INSERT INTO transactions ({', '.join(copied)}) SELECT {source} FROM transactions_float"))
+        conn.execute(text("DROP TABLE transactions_float"))
+
+def add_missing_columns(engine: Engine) -> None:
+    """ALTER TABLE ... ADD COLUMN for nullable or defaulted columns added to existing tables"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if isinstance(default, str):
+                        default = f"'{default}'"
+                    else:
+                        default = default.compile(dialect=engine.dialect)
+                    ddl += f" DEFAULT {default}"
+                elif not column.nullable:
+                    raise RuntimeError(
+                        f"Cannot add NOT NULL column {table.name}.{column.name} without a server default"
+                    )
+                conn.execute(text(ddl))
+
+def add_missing_enum_values(engine: Engine) -> None:
+    """ALTER TYPE ... ADD VALUE for members added to Python enums behind native enum columns.
+
+    Only PostgreSQL has native enum types; elsewhere enums are plain strings.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    # ADD VALUE cannot run inside a transaction block before PostgreSQL 12
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if isinstance(column.type, Enum) and column.type.native_enum:
+                    for value in column.type.enums:
+                        conn.execute(text(f"ALTER TYPE {column.type.name} ADD VALUE IF NOT EXISTS '{value}'"))
+
+def backfill_receipt_kinds(engine: Engine) -> None:
+    """Set receipts.kind for hashed receipts saved before the column existed.
+
+    The kind comes from the first ingestion job that produced the receipt.
+    If old racing uploads left several receipts for the same user and
+    content, only the earliest gets a kind. The others stay NULL, which the
+    unique (user_id, kind, content_hash) index ignores.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT r.id, r.user_id, r.content_hash, "
+            "(SELECT j.kind FROM ingestion_jobs j WHERE j.receipt_id = r.id ORDER BY j.id LIMIT 1) "
+            "FROM receipts r WHERE r.kind IS NULL AND r.content_hash IS NOT NULL ORDER BY r.id"
+        )).all()
+        claimed = {
+            tuple(row) for row in conn.execute(text(
+                "SELECT user_id, kind, content_hash FROM receipts WHERE kind IS NOT NULL AND content_hash IS NOT NULL"
+            ))
+        }
+        for receipt_id, user_id, content_hash, job_kind in rows:
+            if job_kind is None:
+                continue
+            key = (user_id, job_kind.lower(), content_hash)
+            if key in claimed:
+                continue
+            claimed.add(key)
+            conn.execute(text("UPDATE receipts SET kind = :kind WHERE id = :id"), {"kind": key[1], "id": receipt_id})
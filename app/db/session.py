@@ -1,11 +1,70 @@
  
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or database.startswith("file::memory:")
+
+def engine_options(url: str) -> dict:
+    """Keyword arguments for create_engine, tuned for the URL's dialect"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        options = {"connect_args": {
+            "check_same_thread": False,
+            # The driver's own wait for a locked database, in seconds
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        }}
+        if not is_memory_sqlite(url):
+            options.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+        return options
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE
+    }
+
+def sqlite_pragmas(url: str) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}"
+    ]
+    if not is_memory_sqlite(url):
+        # WAL lets readers run alongside the single writer; in-memory
+        # databases cannot use it
+        pragmas.insert(0, f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+def install_sqlite_pragmas(target: Engine, url: str) -> None:
+    """Run the SQLite tuning pragmas on every new connection of target"""
+    pragmas = sqlite_pragmas(url)
+
+    @event.listens_for(target, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def build_engine(url: str = settings.DATABASE_URL) -> Engine:
+    """Create an engine for url with the dialect's pool and connection settings"""
+    built = create_engine(url, **engine_options(url))
+    if built.dialect.name == "sqlite":
+        install_sqlite_pragmas(built, url)
+    if settings.METRICS_ENABLED:
+        instrument_engine(built)
+    return built
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -0,0 +1,40 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+from sqlalchemy.types import BigInteger, TypeDecorator
+
+CENT = Decimal("0.01")
+
+def to_cents(amount: Union[Decimal, int, float, str]) -> int:
+    """Integer minor units for an amount in currency units, rounded half up to the cent"""
+    if isinstance(amount, float):
+        # repr is the shortest exact spelling (0.29, not 0.28999999999999998)
+        amount = repr(amount)
+    return int(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+def from_cents(cents: Union[int, Decimal]) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+# Amounts of fewer cents have at most 15 significant digits, which a float
+# holds exactly: its repr prints the amount digit for digit
+EXACT_FLOAT_CENTS = 10**15
+
+def json_amount(cents: int) -> Union[float, Decimal]:
+    """An amount ready for JSON: a float while that is exact, else the exact Decimal"""
+    if -EXACT_FLOAT_CENTS < cents < EXACT_FLOAT_CENTS:
+        return cents / 100
+    return from_cents(cents)
+
+class Cents(TypeDecorator):
+    """A money amount stored as an integer number of cents and seen from Python as a Decimal.
+
+    SUM() over the column adds integers in the database, so totals are exact
+    no matter how many rows they cover, and come back through the same type.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
@@ -35,17 +35,29 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.base import Base
+from fastapi.responses import PlainTextResponse
 from app.db.session import engine
-from app.routers import auth, transactions, receipts
+from app.db.migrations import run_migrations
+from app.db.async_session import dispose_async_engine
+from app.routers import auth, transactions, transactions_async, receipts
+from app.services.job_service import shutdown_executor, start_job_recovery, stop_job_recovery
+from app.services.auth_service import auth_cache_stats, token_cache, user_cache
+from app.core.response_cache import response_cache, response_cache_stats
+from app.core.metrics import MetricsMiddleware, register_cache_metrics, registry
 from app.core.config import settings
-import os
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.utils.uploads import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware
 
 app = FastAPI(title="Personal Finance Assistant", version="1.0.0")
 
+def single_upload_limit() -> int:
+    return settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+
+# Innermost, so its 413s still get CORS headers
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/receipts/upload": single_upload_limit,
+    "/receipts/upload-pdf": single_upload_limit,
+    "/receipts/upload-batch": lambda: settings.MAX_BATCH_ARCHIVE_BYTES + MULTIPART_OVERHEAD_BYTES,
+})
 # Add CORS middleware with dynamic origins
 app.add_middleware(
     CORSMiddleware,
@@ -54,12 +66,43 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    register_cache_metrics({
+        "auth_tokens": token_cache.stats,
+        "auth_users": user_cache.stats,
+        "responses": response_cache.stats
+    })
 
 # Include routers
 app.include_router(auth.router)
+if settings.ASYNC_DB:
+    # Registered first so these routes take precedence over their sync versions
+    app.include_router(transactions_async.router)
 app.include_router(transactions.router)
 app.include_router(receipts.router)
 
+@app.on_event("startup")
+def migrate_database():
+    # Registered first: job recovery below reads the tables this creates.
+    # Runs at startup rather than on import, so importing the app (tests,
+    # tools, workers) never touches the database
+    if settings.AUTO_MIGRATE:
+        run_migrations(engine)
+
+@app.on_event("startup")
+def start_ingestion_workers():
+    start_job_recovery()
+
+@app.on_event("shutdown")
+def stop_ingestion_workers():
+    stop_job_recovery()
+    shutdown_executor()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
 @app.get("/")
 def read_root():
     return {"message": "Personal Finance Assistant API"}
@@ -68,8 +111,19 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/cache")
+def cache_stats():
+    """Hit/miss counters of the in-process auth and response caches"""
+    return {"auth": auth_cache_stats(), "responses": response_cache_stats()}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        """Request, query, ingestion and cache metrics of this process, in the Prometheus text format"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Add this for Render deployment
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # WEB_WORKERS processes on PORT; see `python -m app.cli serve --help`
+    from app.cli import main
+    main(["serve"])
\ No newline at end of file
@@ -1 +1,7 @@
  
+from app.models.user import User
+from app.models.receipt import Receipt
+from app.models.transaction import Transaction
+from app.models.ingestion_job import IngestionJob
+from app.models.transaction_rollup import TransactionRollup
+from app.models.extracted_document import ExtractedDocument
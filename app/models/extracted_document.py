@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class ExtractedDocument(Base):
+    """OCR/PDF text and parsed transactions, cached by the uploaded file's SHA-256"""
+    __tablename__ = "extracted_documents"
+
+    content_hash = Column(String(64), primary_key=True)
+    kind = Column(String, primary_key=True)
+    text = Column(Text, nullable=False)
+    transactions = Column(Text, nullable=False)
+    parser_version = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy.sql import func, false
+from sqlalchemy.orm import relationship
+import enum
+import json
+from app.db.base import Base
+
+class JobKind(enum.Enum):
+    RECEIPT = "receipt"
+    PDF = "pdf"
+    # Several receipts from /receipts/upload-batch; file_path is its manifest
+    BATCH = "batch"
+
+class JobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(Enum(JobKind), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    progress = Column(Integer, nullable=False, default=0)
+    file_path = Column(String, nullable=False)
+    file_extension = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True)
+    receipt_id = Column(Integer, ForeignKey("receipts.id"), nullable=True)
+    transactions_created = Column(Integer, nullable=False, default=0)
+    duplicate = Column(Boolean, nullable=False, default=False, server_default=false())
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Renewed by the worker running the job; once it lapses the job is recovered
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    # Per-file results of a batch job, as JSON
+    results_json = Column(Text, nullable=True)
+
+    user = relationship("User")
+    receipt = relationship("Receipt")
+
+    @property
+    def results(self) -> list[dict] | None:
+        return json.loads(self.results_json) if self.results_json else None
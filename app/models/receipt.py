@@ -1,5 +1,5 @@
  
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
@@ -11,6 +11,15 @@ class Receipt(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     file_path = Column(String, nullable=False)
     parsed_text = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    # Upload kind ("receipt" or "pdf"); the same file is parsed differently per kind
+    kind = Column(String(16), nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # One receipt per user, kind and file content, even when two uploads
+        # of the same file are processed concurrently
+        Index("ux_receipts_user_kind_hash", "user_id", "kind", "content_hash", unique=True),
+    )
\ No newline at end of file
@@ -1,9 +1,10 @@
  
-from sqlalchemy import Column, Integer, Float, String, Text, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
 from app.db.base import Base
+from app.db.types import Cents
 
 class TransactionType(enum.Enum):
     INCOME = "income"
@@ -11,10 +12,22 @@ class TransactionType(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Every read is scoped to one user and ordered by (date, id), so each
+        # index starts with user_id and ends with date, id: equality filters
+        # go in between, and the date range, keyset cursor and ORDER BY are
+        # served by the same index without a sort.
+        # Unfiltered or date-range listing, keyset pagination
+        Index("ix_transactions_user_date_id", "user_id", "date", "id"),
+        # ?category= listing and counts
+        Index("ix_transactions_user_category_date_id", "user_id", "category", "date", "id"),
+        # ?type= listing and counts
+        Index("ix_transactions_user_type_date_id", "user_id", "type", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Cents, nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
     category = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Enum
+from app.db.base import Base
+from app.db.types import Cents
+from app.models.transaction import TransactionType
+
+class TransactionRollup(Base):
+    """Per-day totals of a user's transactions, kept in step with every insert"""
+    __tablename__ = "transaction_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    category = Column(String, primary_key=True)
+    total_amount = Column(Cents, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,31 +1,53 @@
  
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.schemas.user import User, UserCreate, Token
-from app.services.auth_service import AuthService
+from app.services.auth_service import AuthService, login_retry_after, record_failed_login
+from app.core.security import PasswordHasherBusy
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+def busy_exception(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=User)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     auth_service = AuthService(db)
     try:
-        user = auth_service.register_user(user_data)
+        user = await auth_service.register_user(user_data)
         return user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except PasswordHasherBusy as e:
+        raise busy_exception(e)
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = login_retry_after(form_data.username, client_ip)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(retry_after)},
+        )
     auth_service = AuthService(db)
-    user = auth_service.authenticate_user(form_data.username, form_data.password)
+    try:
+        user = await auth_service.authenticate_user(form_data.username, form_data.password)
+    except PasswordHasherBusy as e:
+        raise busy_exception(e)
     if not user:
+        record_failed_login(form_data.username, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = auth_service.create_access_token(data={"sub": user.username})
+    access_token = auth_service.create_access_token(data={"sub": user.username, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
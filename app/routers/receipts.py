@@ -1,59 +1,175 @@
  
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
+import os
+import shutil
+import tempfile
+import zipfile
+from app.core.config import settings
 from app.db.session import get_db
-from app.schemas.receipt import Receipt
-from app.services.receipt_service import ReceiptService
+from app.schemas.job import BatchUploadResult, IngestionJob
+from app.models.ingestion_job import JobKind
+from app.services.receipt_service import SUPPORTED_EXTENSIONS, BatchFile
+from app.services.job_service import JobService, enqueue_batch_job, enqueue_job, run_batch
 from app.services.auth_service import get_current_user
 from app.models.user import User
-import os
-import uuid
+from app.utils.uploads import save_file_object, save_upload, StoredUpload, UploadTooLarge
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 
-@router.post("/upload", response_model=Receipt)
+async def store_upload(file: UploadFile) -> StoredUpload:
+    try:
+        return await save_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+def _stored_file(filename: str, upload: StoredUpload) -> BatchFile:
+    return BatchFile(filename=filename, path=upload.path, extension=upload.extension, sha256=upload.sha256)
+
+def _extract_archive(archive_path: str, limit: int) -> list[BatchFile]:
+    """Store the receipts in a ZIP archive like individual uploads"""
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile:
+        return [BatchFile(filename=os.path.basename(archive_path), error="Not a valid ZIP archive")]
+
+    with archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+        ]
+        # Checked before anything is extracted
+        if len(members) > limit:
+            raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.MAX_BATCH_FILES} files")
+
+        files = []
+        for info in members:
+            filename = os.path.basename(info.filename)
+            if filename.split(".")[-1].lower() not in SUPPORTED_EXTENSIONS:
+                files.append(BatchFile(filename=filename, error="Unsupported file format"))
+                continue
+            try:
+                with archive.open(info) as member:
+                    files.append(_stored_file(filename, save_file_object(member, filename)))
+            except UploadTooLarge as e:
+                files.append(BatchFile(filename=filename, error=str(e)))
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                # Corrupt, encrypted or compressed with an unsupported method
+                files.append(BatchFile(filename=filename, error=f"Cannot read from archive: {e}"))
+        return files
+
+async def store_batch(uploads: list[UploadFile]) -> list[BatchFile]:
+    files: list[BatchFile] = []
+    for file in uploads:
+        file_extension = file.filename.split(".")[-1].lower()
+        if file_extension == "zip":
+            # The archive itself is only kept until its members are stored
+            os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+            directory = tempfile.mkdtemp(dir=settings.UPLOAD_DIR)
+            try:
+                archive = await save_upload(file, directory, settings.MAX_BATCH_ARCHIVE_BYTES)
+                files.extend(await run_in_threadpool(_extract_archive, archive.path, settings.MAX_BATCH_FILES - len(files)))
+            except UploadTooLarge as e:
+                files.append(BatchFile(filename=file.filename, error=str(e)))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        elif file_extension not in SUPPORTED_EXTENSIONS:
+            files.append(BatchFile(filename=file.filename, error="Unsupported file format"))
+        else:
+            try:
+                files.append(_stored_file(file.filename, await save_upload(file)))
+            except UploadTooLarge as e:
+                files.append(BatchFile(filename=file.filename, error=str(e)))
+        if len(files) > settings.MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.MAX_BATCH_FILES} files")
+    return files
+
+@router.post("/upload", response_model=IngestionJob, status_code=status.HTTP_202_ACCEPTED)
 async def upload_receipt(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
 
-    os.makedirs("uploads", exist_ok=True)
-    
-
     file_extension = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join("uploads", filename)
-    
+    if file_extension.lower() not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
 
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
+    upload = await store_upload(file)
 
-    receipt_service = ReceiptService(db)
-    return receipt_service.process_receipt(current_user.id, file_path, file_extension)
+    job_service = JobService(db)
+    job = await run_in_threadpool(
+        job_service.create_job, current_user.id, JobKind.RECEIPT, upload.path, upload.extension, upload.sha256
+    )
+    enqueue_job(job.id)
+    return job
 
-@router.post("/upload-pdf", response_model=list[Receipt])
+@router.post("/upload-pdf", response_model=IngestionJob, status_code=status.HTTP_202_ACCEPTED)
 async def upload_pdf_transactions(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
 
-    os.makedirs("uploads", exist_ok=True)
-    
+    upload = await store_upload(file)
 
-    file_extension = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join("uploads", filename)
-    
+    job_service = JobService(db)
+    job = await run_in_threadpool(
+        job_service.create_job, current_user.id, JobKind.PDF, upload.path, upload.extension, upload.sha256
+    )
+    enqueue_job(job.id)
+    return job
+
+@router.post("/upload-batch", response_model=BatchUploadResult)
+async def upload_receipt_batch(
+    response: Response,
+    files: list[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Ingest several receipts, or ZIP archives of them, at once.
+
+    Up to BATCH_SYNC_MAX_FILES files are processed while the request waits
+    and answered with a result per file; larger batches are returned as a
+    job (202) whose results are filled in when it completes.
+    """
+    if len(files) > settings.MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {settings.MAX_BATCH_FILES} files")
+
+    batch = await store_batch(files)
+
+    if len(batch) <= settings.BATCH_SYNC_MAX_FILES:
+        results = await run_in_threadpool(run_batch, current_user.id, batch)
+        return BatchUploadResult(
+            files=results,
+            transactions_created=sum(result["transactions_created"] for result in results)
+        )
+
+    job_service = JobService(db)
+    job = await run_in_threadpool(job_service.create_batch_job, current_user.id, batch)
+    enqueue_batch_job(job.id)
+    response.status_code = status.HTTP_202_ACCEPTED
+    return BatchUploadResult(job=job)
 
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-    
+@router.get("/jobs", response_model=list[IngestionJob])
+def list_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job_service = JobService(db)
+    return job_service.list_jobs(current_user.id, limit)
 
-    receipt_service = ReceiptService(db)
-    return receipt_service.process_pdf_transactions(current_user.id, file_path)
\ No newline at end of file
+@router.get("/jobs/{job_id}", response_model=IngestionJob)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    job_service = JobService(db)
+    job = job_service.get_job(current_user.id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
\ No newline at end of file
@@ -1,13 +1,23 @@
  
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Literal, Optional
 from datetime import date
+from decimal import Decimal
+import json
 from app.db.session import get_db
+from app.core.response_cache import CachedResponse
 from app.schemas.transaction import (
-    Transaction, TransactionCreate, TransactionSummary, DateSummary, PaginatedTransactions
+    Transaction, TransactionCreate, TransactionSummary, DateSummary, TimeseriesPoint, PaginatedTransactions,
+    BulkImportResult
 )
 from app.services.transaction_service import TransactionService
+from app.services.bulk_import_service import BulkImportService
+from app.utils.bulk_import import (
+    NDJSON_CONTENT_TYPES, CSV_CONTENT_TYPES, iter_json_records, iter_ndjson_records, iter_csv_records
+)
+from app.utils.transaction_export import EXPORT_FORMATS
 from app.services.auth_service import get_current_user
 from app.models.user import User
 
@@ -22,44 +32,157 @@ def create_transaction(
     transaction_service = TransactionService(db)
     return transaction_service.create_transaction(current_user.id, transaction_data)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_transactions(
+    request: Request,
+    chunk_size: Optional[int] = Query(None, ge=1, le=10000, description="Rows per INSERT batch"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Import many transactions from a JSON array, NDJSON or CSV body.
+
+    NDJSON and CSV bodies are streamed; each row is validated like
+    POST /transactions/ and invalid rows are returned as errors.
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+    if content_type in NDJSON_CONTENT_TYPES:
+        records = iter_ndjson_records(request.stream())
+    elif content_type in CSV_CONTENT_TYPES:
+        records = iter_csv_records(request.stream())
+    elif content_type == "application/json":
+        try:
+            payload = json.loads(await request.body(), parse_float=Decimal)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body is not valid JSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of transactions")
+        records = iter_json_records(payload)
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+    bulk_import_service = BulkImportService(db)
+    return await bulk_import_service.import_records(current_user.id, records, chunk_size)
+
 @router.get("/", response_model=PaginatedTransactions)
 def get_transactions(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
     type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
     category: Optional[str] = Query(None, description="Filter by category"),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page; replaces page"),
+    include_total: Optional[bool] = Query(None, description="Count matching rows (default: on for page mode, off for cursor mode)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    if include_total is None:
+        include_total = cursor is None
     transaction_service = TransactionService(db)
-    return transaction_service.get_transactions(
-        current_user.id, start_date, end_date, type, category, page, limit
+    try:
+        return cached.store(transaction_service.get_transactions(
+            current_user.id, start_date, end_date, type, category, page, limit,
+            cursor=cursor, include_total=include_total
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export", response_class=StreamingResponse)
+def export_transactions(
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv or ndjson"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every matching transaction, oldest first, as CSV or NDJSON.
+
+    Takes the same filters as GET /transactions/ without paging: rows are
+    read from one cursor and written out chunk by chunk.
+    """
+    transaction_service = TransactionService(db)
+    try:
+        chunks = transaction_service.export_transactions(
+            current_user.id, start_date, end_date, type, category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, encode = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        encode(chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
     )
 
 @router.get("/summary/category", response_model=list[TransactionSummary])
 def get_category_summary(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
     type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
     transaction_service = TransactionService(db)
-    return transaction_service.get_category_summary(
+    return cached.store(transaction_service.get_category_summary(
         current_user.id, start_date, end_date, type
-    )
+    ))
 
 @router.get("/summary/date", response_model=list[DateSummary])
 def get_date_summary(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
     type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
     transaction_service = TransactionService(db)
-    return transaction_service.get_date_summary(
+    return cached.store(transaction_service.get_date_summary(
         current_user.id, start_date, end_date, type
-    )
\ No newline at end of file
+    ))
+
+@router.get("/summary/timeseries", response_model=list[TimeseriesPoint])
+def get_timeseries(
+    request: Request,
+    bucket: Literal["day", "week", "month", "year"] = Query("month", description="Bucket size; weeks start on Monday"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    by_category: bool = Query(False, description="One point per bucket and category"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Income, expense and net per day, week, month or year, optionally split by category.
+
+    Buckets are computed in SQL from the per-day rollup, so the response
+    grows with the number of buckets rather than the number of days.
+    """
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    transaction_service = TransactionService(db)
+    return cached.store(transaction_service.get_timeseries(
+        current_user.id, bucket, start_date, end_date, category, by_category
+    ))
\ No newline at end of file
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from datetime import date
+from app.db.async_session import get_async_db
+from app.core.response_cache import CachedResponse
+from app.schemas.transaction import (
+    Transaction, TransactionCreate, TransactionSummary, DateSummary, TimeseriesPoint, PaginatedTransactions
+)
+from app.services.transaction_service import AsyncTransactionService
+from app.services.auth_service import get_current_user_async
+from app.models.user import User
+
+# Event-loop versions of the transaction read/write endpoints, mounted ahead of
+# app.routers.transactions when ASYNC_DB is on; the remaining routes
+# (e.g. /transactions/bulk) are still served by the sync router
+router = APIRouter(prefix="/transactions", tags=["transactions"])
+
+@router.post("/", response_model=Transaction)
+async def create_transaction(
+    transaction_data: TransactionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    transaction_service = AsyncTransactionService(db)
+    return await transaction_service.create_transaction(current_user.id, transaction_data)
+
+@router.get("/", response_model=PaginatedTransactions)
+async def get_transactions(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from the previous page; replaces page"),
+    include_total: Optional[bool] = Query(None, description="Count matching rows (default: on for page mode, off for cursor mode)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    if include_total is None:
+        include_total = cursor is None
+    transaction_service = AsyncTransactionService(db)
+    try:
+        return cached.store(await transaction_service.get_transactions(
+            current_user.id, start_date, end_date, type, category, page, limit,
+            cursor=cursor, include_total=include_total
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/summary/category", response_model=list[TransactionSummary])
+async def get_category_summary(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    transaction_service = AsyncTransactionService(db)
+    return cached.store(await transaction_service.get_category_summary(
+        current_user.id, start_date, end_date, type
+    ))
+
+@router.get("/summary/date", response_model=list[DateSummary])
+async def get_date_summary(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    type: Optional[str] = Query(None, description="Filter by type (income/expense)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    transaction_service = AsyncTransactionService(db)
+    return cached.store(await transaction_service.get_date_summary(
+        current_user.id, start_date, end_date, type
+    ))
+
+@router.get("/summary/timeseries", response_model=list[TimeseriesPoint])
+async def get_timeseries(
+    request: Request,
+    bucket: Literal["day", "week", "month", "year"] = Query("month", description="Bucket size; weeks start on Monday"),
+    start_date: Optional[date] = Query(None, description="Start date for filtering"),
+    end_date: Optional[date] = Query(None, description="End date for filtering"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    by_category: bool = Query(False, description="One point per bucket and category"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    cached = CachedResponse(request, current_user.id)
+    response = cached.lookup()
+    if response is not None:
+        return response
+    
+    transaction_service = AsyncTransactionService(db)
+    return cached.store(await transaction_service.get_timeseries(
+        current_user.id, bucket, start_date, end_date, category, by_category
+    ))
\ No newline at end of file
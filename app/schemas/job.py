@@ -0,0 +1,46 @@
+from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from typing import Literal, Optional
+
+class JobKind(str, Enum):
+    RECEIPT = "receipt"
+    PDF = "pdf"
+    BATCH = "batch"
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class BatchFileResult(BaseModel):
+    filename: str
+    status: Literal["created", "duplicate", "failed"]
+    receipt_id: Optional[int] = None
+    transactions_created: int = 0
+    error: Optional[str] = None
+
+class IngestionJob(BaseModel):
+    id: int
+    kind: JobKind
+    status: JobStatus
+    progress: int
+    receipt_id: Optional[int] = None
+    transactions_created: int
+    duplicate: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Set on finished batch jobs
+    results: Optional[list[BatchFileResult]] = None
+
+    class Config:
+        from_attributes = True
+
+class BatchUploadResult(BaseModel):
+    """Per-file results of a small batch, or the job processing a large one"""
+    files: list[BatchFileResult] = []
+    transactions_created: int = 0
+    job: Optional[IngestionJob] = None
@@ -1,15 +1,29 @@
  
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, Field, PlainSerializer
 from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Optional
+from app.db.types import CENT, EXACT_FLOAT_CENTS
+
+# Amounts are exact decimals rounded to the cent (stored as integer cents);
+# in JSON they stay plain numbers, e.g. 12.5 rather than "12.50". The bound
+# keeps them below EXACT_FLOAT_CENTS, where the float they are written as
+# is exact. Totals can grow past it and are written by
+# app.core.serialization.dumps, which keeps them exact
+Money = Annotated[
+    Decimal,
+    Field(gt=-EXACT_FLOAT_CENTS // 100, lt=EXACT_FLOAT_CENTS // 100),
+    AfterValidator(lambda amount: amount.quantize(CENT, rounding=ROUND_HALF_UP)),
+    PlainSerializer(float, return_type=float, when_used="json")
+]
 
 class TransactionType(str, Enum):
     INCOME = "income"
     EXPENSE = "expense"
 
 class TransactionBase(BaseModel):
-    amount: float
+    amount: Money
     type: TransactionType
     category: str
     description: Optional[str] = None
@@ -28,14 +42,31 @@ class Transaction(TransactionBase):
 
 class TransactionSummary(BaseModel):
     category: str
-    total_amount: float
+    total_amount: Money
 
 class DateSummary(BaseModel):
     date: date
-    total_amount: float
+    total_amount: Money
+
+class TimeseriesPoint(BaseModel):
+    period_start: date
+    category: Optional[str] = None
+    income: Money
+    expense: Money
+    net: Money
 
 class PaginatedTransactions(BaseModel):
     items: list[Transaction]
-    total: int
-    page: int
-    pages: int
\ No newline at end of file
+    total: Optional[int] = None
+    page: Optional[int] = None
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[BulkImportError]
\ No newline at end of file
@@ -1,41 +1,115 @@
  
 from datetime import datetime, timedelta
+import time
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash
+from app.core.cache import TTLCache
+from app.core.data_version import DataVersions
+from app.core.shared_state import get_shared_state
+from app.core.security import get_password_hash_async, verify_and_update_password
 from app.db.session import get_db
+from app.db.async_session import get_async_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# token -> (username, user id) for tokens that already passed signature checks
+token_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+# (user id, user version) -> detached User snapshot, so most requests never
+# touch the users table
+user_cache = TTLCache(settings.AUTH_CACHE_MAX_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+# Moved by invalidate_user in whichever web worker changed the user, which
+# retires the cached snapshot in every worker
+user_versions = DataVersions("user")
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached user; call whenever a user row is created, changed or deleted"""
+    user_versions.bump(user_id)
+
+def _user_cache_key(user_id: int) -> tuple[int, str]:
+    # Taken before the user is read: a concurrent invalidation then moves
+    # the version past this key instead of caching the old row under the new one
+    return user_id, user_versions.get(user_id)
+
+# Failed logins are counted per client and username in windows of this many seconds
+LOGIN_WINDOW_SECONDS = 60
+
+def _login_key(username: str, client_ip: str) -> str:
+    # Never per username alone: anyone could then lock any account out
+    return f"login:{client_ip}:{username.lower()}"
+
+def login_retry_after(username: str, client_ip: str) -> Optional[int]:
+    """Seconds until this client may try username again, or None while it is under LOGIN_RATE_LIMIT.
+
+    Checked before the password, so a guessing attack stops costing bcrypt
+    rounds once the limit is reached; the count is shared by all web workers.
+    Failures of other clients never block a login.
+    """
+    if settings.LOGIN_RATE_LIMIT <= 0:
+        return None
+    if get_shared_state().hits(_login_key(username, client_ip), LOGIN_WINDOW_SECONDS) < settings.LOGIN_RATE_LIMIT:
+        return None
+    return LOGIN_WINDOW_SECONDS - int(time.time()) % LOGIN_WINDOW_SECONDS
+
+def record_failed_login(username: str, client_ip: str) -> None:
+    if settings.LOGIN_RATE_LIMIT > 0:
+        get_shared_state().hit(_login_key(username, client_ip), LOGIN_WINDOW_SECONDS)
+
+def auth_cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
+
+def _snapshot(user: User) -> User:
+    # A transient copy: safe to share between requests and never lazy-loads
+    return User(id=user.id, username=user.username, created_at=user.created_at)
+
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
     
-    def register_user(self, user_data: UserCreate) -> User:
+    async def register_user(self, user_data: UserCreate) -> User:
         
-        existing_user = self.db.query(User).filter(User.username == user_data.username).first()
+        existing_user = await run_in_threadpool(self._get_user_by_username, user_data.username)
         if existing_user:
             raise ValueError("Username already registered")
         
         
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         user = User(username=user_data.username, password_hash=hashed_password)
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await run_in_threadpool(self._save_user, user)
+        # SQLite may hand out the id of a deleted user again
+        invalidate_user(user.id)
         return user
     
-    def authenticate_user(self, username: str, password: str) -> User | None:
-        user = self.db.query(User).filter(User.username == username).first()
-        if not user or not verify_password(password, user.password_hash):
+    async def authenticate_user(self, username: str, password: str) -> User | None:
+        user = await run_in_threadpool(self._get_user_by_username, username)
+        if not user:
+            return None
+        valid, new_hash = await verify_and_update_password(password, user.password_hash)
+        if not valid:
             return None
+        if new_hash:
+            # The stored hash used a different bcrypt cost than BCRYPT_ROUNDS
+            user.password_hash = new_hash
+            await run_in_threadpool(self._save_user, user)
+            invalidate_user(user.id)
         return user
     
+    def _get_user_by_username(self, username: str) -> User | None:
+        return self.db.query(User).filter(User.username == username).first()
+    
+    def _save_user(self, user: User) -> None:
+        self.db.add(user)
+        self.db.commit()
+        self.db.refresh(user)
+    
     def create_access_token(self, data: dict) -> str:
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -43,24 +117,77 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
         return encoded_jwt
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> tuple[str, Optional[int], Optional[float]]:
+    """Verify a JWT; returns (username, uid claim, seconds until it expires)"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    username: str = payload.get("sub")
+    if username is None:
+        raise _credentials_exception()
+    ttl_seconds = payload["exp"] - time.time() if "exp" in payload else None
+    return username, payload.get("uid"), ttl_seconds
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    claims = token_cache.get(token)
+    if claims is None:
+        username, user_id, ttl_seconds = _decode_token(token)
+        if user_id is None:
+            # Tokens issued before the uid claim existed: resolve the id once
+            user = db.query(User).filter(User.username == username).first()
+            if user is None:
+                raise _credentials_exception()
+            user_id = user.id
+        
+        claims = (username, user_id)
+        token_cache.set(token, claims, ttl_seconds=ttl_seconds)
+    
+    username, user_id = claims
+    cache_key = _user_cache_key(user_id)
+    user = user_cache.get(cache_key)
+    if user is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None or user.username != username:
+            raise _credentials_exception()
+        user = _snapshot(user)
+        user_cache.set(cache_key, user)
+    return user
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async routes; shares its caches"""
+    claims = token_cache.get(token)
+    if claims is None:
+        username, user_id, ttl_seconds = _decode_token(token)
+        if user_id is None:
+            user = await db.scalar(select(User).where(User.username == username))
+            if user is None:
+                raise _credentials_exception()
+            user_id = user.id
+        
+        claims = (username, user_id)
+        token_cache.set(token, claims, ttl_seconds=ttl_seconds)
     
-    user = db.query(User).filter(User.username == username).first()
+    username, user_id = claims
+    cache_key = _user_cache_key(user_id)
+    user = user_cache.get(cache_key)
     if user is None:
-        raise credentials_exception
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if user is None or user.username != username:
+            raise _credentials_exception()
+        user = _snapshot(user)
+        user_cache.set(cache_key, user)
     return user
\ No newline at end of file
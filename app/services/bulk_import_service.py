@@ -0,0 +1,85 @@
+from typing import IO, AsyncIterator
+import pickle
+import tempfile
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.schemas.transaction import TransactionCreate, BulkImportResult, BulkImportError
+from app.services.transaction_service import TransactionService, transaction_row
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+class BulkImportService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.transaction_service = TransactionService(db)
+
+    async def import_records(
+        self,
+        user_id: int,
+        records: AsyncIterator[tuple[int, object]],
+        chunk_size: int | None = None
+    ) -> BulkImportResult:
+        """Validate streamed records, then insert the valid ones in one short DB transaction.
+
+        Records are validated as they arrive and spooled to a temporary file
+        in chunks, so only one chunk is held in memory at a time. Nothing
+        touches the database until the client has sent the whole body: a
+        slow upload never holds the write lock. Invalid rows are reported
+        back instead of aborting the import.
+        """
+        chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+        failed = 0
+        errors = []
+        chunk = []
+
+        def reject(row: int, message: str) -> None:
+            nonlocal failed
+            failed += 1
+            if len(errors) < settings.BULK_IMPORT_MAX_ERRORS:
+                errors.append(BulkImportError(row=row, error=message))
+
+        with tempfile.TemporaryFile() as spool:
+            async for row, record in records:
+                if isinstance(record, Exception):
+                    reject(row, str(record))
+                    continue
+                try:
+                    item = TransactionCreate.model_validate(record)
+                except ValidationError as e:
+                    reject(row, format_validation_error(e))
+                    continue
+
+                chunk.append(transaction_row(user_id, item))
+                if len(chunk) >= chunk_size:
+                    await run_in_threadpool(pickle.dump, chunk, spool)
+                    chunk = []
+
+            if chunk:
+                await run_in_threadpool(pickle.dump, chunk, spool)
+            inserted = await run_in_threadpool(self._insert_spooled, spool, chunk_size)
+
+        return BulkImportResult(inserted=inserted, failed=failed, errors=errors)
+
+    def _insert_spooled(self, spool: IO[bytes], chunk_size: int) -> int:
+        spool.seek(0)
+
+        def chunks():
+            while True:
+                try:
+                    yield from pickle.load(spool)
+                except EOFError:
+                    return
+
+        try:
+            inserted = self.transaction_service.bulk_insert(chunks(), chunk_size)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return inserted
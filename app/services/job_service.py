@@ -0,0 +1,392 @@
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.data_version import data_versions
+from app.core.metrics import drain_worker_metrics, ingestion_job_seconds, merge_worker_metrics
+from app.db.session import SessionLocal
+from app.models.ingestion_job import IngestionJob, JobKind, JobStatus
+from app.services.receipt_service import BatchFile, Extraction, ReceiptService, extract_upload
+from app.utils.pdf_parser import shutdown_page_executor
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Batch jobs are orchestrated here in the web process, which fans their
+# files out over the process pool; one at a time keeps them from starving
+# single uploads
+_batch_executor: Optional[ThreadPoolExecutor] = None
+# Jobs submitted to this process's pool and not finished yet
+_enqueued: set[int] = set()
+_enqueued_lock = threading.Lock()
+_recovery_thread: Optional[threading.Thread] = None
+_recovery_stop = threading.Event()
+
+@dataclass
+class JobOutcome:
+    """What a pool worker reports back about a job it ran"""
+    # Set when the job added data for this user
+    user_id: Optional[int] = None
+    # Stage timings recorded in the worker, drained from its registry
+    metrics: dict = field(default_factory=dict)
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(
+        self,
+        user_id: int,
+        kind: JobKind,
+        file_path: str,
+        file_extension: str,
+        content_hash: Optional[str] = None
+    ) -> IngestionJob:
+        job = IngestionJob(
+            user_id=user_id,
+            kind=kind,
+            status=JobStatus.PENDING,
+            progress=0,
+            file_path=file_path,
+            file_extension=file_extension,
+            content_hash=content_hash,
+            transactions_created=0
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def create_batch_job(self, user_id: int, files: list[BatchFile]) -> IngestionJob:
+        """A job ingesting files as one batch; the files are listed in a manifest next to the uploads"""
+        directory = os.path.join(settings.UPLOAD_DIR, "batches")
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, f"{uuid.uuid4()}.json")
+        with open(manifest_path, "w") as f:
+            json.dump([asdict(file) for file in files], f)
+        return self.create_job(user_id, JobKind.BATCH, manifest_path, "json")
+    
+    def get_job(self, user_id: int, job_id: int) -> IngestionJob | None:
+        return self.db.query(IngestionJob).filter(
+            IngestionJob.id == job_id,
+            IngestionJob.user_id == user_id
+        ).first()
+
+    def list_jobs(self, user_id: int, limit: int) -> list[IngestionJob]:
+        return self.db.query(IngestionJob).filter(
+            IngestionJob.user_id == user_id
+        ).order_by(IngestionJob.id.desc()).limit(limit).all()
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared ingestion process pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn rather than fork: the web process holds threads, an event
+            # loop and pooled DB connections that must not leak into workers
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, settings.INGESTION_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    with _executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-jobs")
+        return _batch_executor
+
+def enqueue_job(job_id: int) -> None:
+    """Hand a persisted job to the worker pool without waiting for it"""
+    with _enqueued_lock:
+        if job_id in _enqueued:
+            return
+        _enqueued.add(job_id)
+    future = get_executor().submit(run_ingestion_job, job_id)
+    future.add_done_callback(lambda _: _forget_enqueued(job_id))
+    future.add_done_callback(_job_finished)
+
+def enqueue_batch_job(job_id: int) -> None:
+    """Start a persisted batch job in the background"""
+    with _enqueued_lock:
+        if job_id in _enqueued:
+            return
+        _enqueued.add(job_id)
+    future = get_batch_executor().submit(run_batch_job, job_id)
+    future.add_done_callback(lambda _: _forget_enqueued(job_id))
+
+def _forget_enqueued(job_id: int) -> None:
+    with _enqueued_lock:
+        _enqueued.discard(job_id)
+
+def _job_finished(future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    outcome = future.result()
+    # Metrics and cached responses live in this process, not the worker's
+    merge_worker_metrics(outcome.metrics)
+    if outcome.user_id is not None:
+        data_versions.bump(outcome.user_id)
+
+def run_ingestion_job(job_id: int) -> JobOutcome:
+    """Run a single OCR/PDF ingestion job; executed inside a pool worker"""
+    user_id = _process_job(job_id)
+    return JobOutcome(user_id=user_id, metrics=drain_worker_metrics())
+
+def _process_job(job_id: int) -> Optional[int]:
+    """Returns the job's user id when the job added data for them"""
+    db = SessionLocal()
+    try:
+        if not _claim_job(db, job_id):
+            return
+
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+        started = time.perf_counter()
+
+        def report_progress(progress: int) -> None:
+            job.progress = progress
+            db.commit()
+
+        receipt_service = ReceiptService(db)
+        try:
+            with _lease_heartbeat(job_id):
+                if job.kind == JobKind.PDF:
+                    result = receipt_service.process_pdf_transactions(
+                        job.user_id, job.file_path, job.content_hash, progress=report_progress
+                    )
+                else:
+                    result = receipt_service.process_receipt(
+                        job.user_id, job.file_path, job.file_extension, job.content_hash,
+                        progress=report_progress
+                    )
+        except Exception as e:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            ingestion_job_seconds.labels(job.kind.value, job.status.value).observe(time.perf_counter() - started)
+            return
+
+        job.status = JobStatus.COMPLETED
+        job.progress = 100
+        job.receipt_id = result.receipt.id
+        job.transactions_created = result.transactions_created
+        job.duplicate = result.duplicate
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        ingestion_job_seconds.labels(job.kind.value, job.status.value).observe(time.perf_counter() - started)
+        if result.transactions_created:
+            return job.user_id
+    except Exception:
+        logger.exception("Ingestion job %s crashed", job_id)
+    finally:
+        db.close()
+
+def _claim_job(db: Session, job_id: int) -> bool:
+    # Atomic, so a job enqueued by several web workers only runs once
+    claimed = db.query(IngestionJob).filter(
+        IngestionJob.id == job_id,
+        IngestionJob.status == JobStatus.PENDING
+    ).update({
+        IngestionJob.status: JobStatus.RUNNING,
+        IngestionJob.progress: 0,
+        IngestionJob.started_at: datetime.utcnow(),
+        IngestionJob.lease_expires_at: _lease_deadline()
+    }, synchronize_session=False)
+    db.commit()
+    return bool(claimed)
+
+def _extract_batch_file(file_path: str, file_extension: str) -> tuple[Extraction, dict]:
+    """Runs in a pool worker; errors are returned so they stay per file"""
+    try:
+        extraction = extract_upload(file_path, file_extension)
+    except Exception as e:
+        extraction = e
+    return extraction, drain_worker_metrics()
+
+def extract_in_pool(files: list[BatchFile]) -> Iterator[Extraction]:
+    """Extract files concurrently on the ingestion pool, yielding their extractions in input order.
+
+    Everything is submitted up front, so the pool's INGESTION_WORKERS
+    processes stay busy however many files there are.
+    """
+    executor = get_executor()
+    futures = [executor.submit(_extract_batch_file, file.path, file.extension) for file in files]
+    for future in futures:
+        try:
+            extraction, metrics = future.result()
+        except CancelledError:
+            raise
+        except Exception as e:
+            # The worker itself died, e.g. BrokenProcessPool
+            yield e
+            continue
+        merge_worker_metrics(metrics)
+        yield extraction
+
+def run_batch(user_id: int, files: list[BatchFile], progress: Optional[Callable[[int], None]] = None) -> list[dict]:
+    """Ingest files as one batch; returns a BatchFileResult dict per file"""
+    db = SessionLocal()
+    try:
+        return ReceiptService(db).process_batch(user_id, files, extract_in_pool, progress)
+    finally:
+        db.close()
+
+def run_batch_job(job_id: int) -> None:
+    """Run a batch job; executed on the batch thread of the web process"""
+    db = SessionLocal()
+    try:
+        if not _claim_job(db, job_id):
+            return
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+        started = time.perf_counter()
+
+        def report_progress(progress: int) -> None:
+            job.progress = progress
+            db.commit()
+
+        try:
+            with open(job.file_path) as f:
+                files = [BatchFile(**item) for item in json.load(f)]
+            with _lease_heartbeat(job_id):
+                results = run_batch(job.user_id, files, report_progress)
+        except CancelledError:
+            # The server is shutting down; the next start runs it again
+            job.status = JobStatus.PENDING
+            db.commit()
+            return
+        except Exception as e:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        else:
+            job.status = JobStatus.COMPLETED
+            job.progress = 100
+            job.results_json = json.dumps(results)
+            job.transactions_created = sum(result["transactions_created"] for result in results)
+            os.remove(job.file_path)
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        ingestion_job_seconds.labels(job.kind.value, job.status.value).observe(time.perf_counter() - started)
+    except Exception:
+        logger.exception("Batch job %s crashed", job_id)
+    finally:
+        db.close()
+
+def _lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+@contextmanager
+def _lease_heartbeat(job_id: int) -> Iterator[None]:
+    """Keep renewing a running job's lease until the block exits.
+
+    Progress reports are too far apart for this: a large statement is
+    extracted completely before its first one, and a job whose lease
+    lapses meanwhile would be recovered and run a second time.
+    """
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(settings.JOB_LEASE_SECONDS / 3):
+            db = SessionLocal()
+            try:
+                db.query(IngestionJob).filter(
+                    IngestionJob.id == job_id,
+                    IngestionJob.status == JobStatus.RUNNING
+                ).update({IngestionJob.lease_expires_at: _lease_deadline()}, synchronize_session=False)
+                db.commit()
+            except Exception:
+                logger.exception("Renewing the lease of job %s failed", job_id)
+            finally:
+                db.close()
+
+    thread = threading.Thread(target=renew, name=f"job-{job_id}-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def recover_jobs() -> int:
+    """Enqueue pending jobs and jobs whose lease lapsed; returns how many.
+
+    Other web workers may be running jobs right now, so a RUNNING job is
+    only taken back once its worker stopped renewing the lease, e.g.
+    because it crashed or was killed.
+    """
+    db = SessionLocal()
+    try:
+        db.query(IngestionJob).filter(
+            IngestionJob.status == JobStatus.RUNNING,
+            or_(IngestionJob.lease_expires_at.is_(None), IngestionJob.lease_expires_at < datetime.utcnow())
+        ).update({IngestionJob.status: JobStatus.PENDING}, synchronize_session=False)
+        db.commit()
+        jobs = db.query(IngestionJob.id, IngestionJob.kind).filter(
+            IngestionJob.status == JobStatus.PENDING
+        ).order_by(IngestionJob.id).all()
+    finally:
+        db.close()
+
+    for job_id, kind in jobs:
+        if kind == JobKind.BATCH:
+            enqueue_batch_job(job_id)
+        else:
+            enqueue_job(job_id)
+    return len(jobs)
+
+def start_job_recovery() -> None:
+    """Recover jobs now and then every half lease, until stop_job_recovery"""
+    global _recovery_thread
+    recover_jobs()
+    if _recovery_thread is not None:
+        return
+    _recovery_stop.clear()
+
+    def recover_periodically() -> None:
+        while not _recovery_stop.wait(settings.JOB_LEASE_SECONDS / 2):
+            try:
+                recover_jobs()
+            except Exception:
+                logger.exception("Recovering ingestion jobs failed")
+
+    _recovery_thread = threading.Thread(target=recover_periodically, name="job-recovery", daemon=True)
+    _recovery_thread.start()
+
+def stop_job_recovery() -> None:
+    global _recovery_thread
+    _recovery_stop.set()
+    if _recovery_thread is not None:
+        _recovery_thread.join()
+        _recovery_thread = None
+
+def shutdown_executor() -> None:
+    """Stop the pool; queued jobs stay PENDING in the DB and are recovered on restart"""
+    global _executor, _batch_executor
+    with _executor_lock:
+        batch_executor, _batch_executor = _batch_executor, None
+        if batch_executor is not None:
+            # Drop queued batch jobs; a running one waits on the pool below
+            batch_executor.shutdown(wait=False, cancel_futures=True)
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+        if batch_executor is not None:
+            # Its remaining files were cancelled with the pool
+            batch_executor.shutdown(wait=True)
+    # Only set when PDFs were extracted in this process rather than a worker
+    shutdown_page_executor()
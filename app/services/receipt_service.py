@@ -1,86 +1,395 @@
  
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Union
+from app.core.data_version import mark_changed
+from app.core.metrics import Stopwatch, ingestion_stage_seconds
 from app.models.receipt import Receipt
-from app.models.transaction import Transaction, TransactionType
+from app.models.extracted_document import ExtractedDocument
+from app.models.transaction import TransactionType
+from app.services.transaction_service import TransactionService
 from app.utils.ocr_parser import extract_text_from_image, parse_receipt_text
-from app.utils.pdf_parser import extract_text_from_pdf, parse_transactions_from_text
-import re
-from datetime import datetime
+from app.utils.pdf_parser import extract_text_from_pdf, iter_pdf_pages, parse_transactions_from_text
+from app.utils.statement_parser import detect_layout
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'bmp', 'tiff']
+SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS + ['pdf']
+
+# Bump when the parsers change so cached documents are re-parsed from their text
+PARSER_VERSION = 1
+
+@dataclass
+class IngestionResult:
+    receipt: Receipt
+    transactions_created: int
+    duplicate: bool = False
+
+@dataclass
+class BatchFile:
+    """One file of a batch upload: stored on disk, or rejected with error before processing"""
+    filename: str
+    path: Optional[str] = None
+    extension: Optional[str] = None
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+
+# What extracting one batch file produced: (text, transactions), or the error it raised
+Extraction = Union[tuple[str, list[dict]], Exception]
+
+def parse_receipt_transactions(text: str) -> list[dict]:
+    try:
+        transaction_data = parse_receipt_text(text)
+    except Exception:
+        return []
+    if not transaction_data:
+        return []
+    return [{
+        "amount": transaction_data['amount'],
+        "type": TransactionType.EXPENSE.value,
+        "category": transaction_data.get('category', 'Other'),
+        "description": transaction_data.get('description', 'From receipt'),
+        "date": transaction_data.get('date', datetime.now().date())
+    }]
+
+def parse_statement_transactions(text: str, layout: Optional[str] = None) -> list[dict]:
+    return [
+        {
+            "amount": transaction_data['amount'],
+            "type": transaction_data['type'],
+            "category": transaction_data.get('category', 'Other'),
+            "description": transaction_data.get('description', 'From PDF statement'),
+            "date": transaction_data.get('date', datetime.now().date())
+        }
+        for transaction_data in parse_transactions_from_text(text, layout)
+    ]
+
+def extract_receipt(extract_text: Callable[[str], str], file_path: str, stage: str) -> tuple[str, list[dict]]:
+    """stage names the extraction in the ingestion timings: ocr or pdf_extract"""
+    with ingestion_stage_seconds.labels(stage).time():
+        text = extract_text(file_path)
+    with ingestion_stage_seconds.labels("parse").time():
+        return text, parse_receipt_transactions(text)
+
+def extract_upload(file_path: str, file_extension: str) -> tuple[str, list[dict]]:
+    """Text and transactions of a receipt image or PDF; runs in a pool worker for batches"""
+    if file_extension.lower() in IMAGE_EXTENSIONS:
+        return extract_receipt(extract_text_from_image, file_path, "ocr")
+    if file_extension.lower() == 'pdf':
+        return extract_receipt(extract_text_from_pdf, file_path, "pdf_extract")
+    raise ValueError("Unsupported file format")
+
+def extract_statement(file_path: str) -> tuple[str, list[dict]]:
+    """Extract a statement and parse each page while later pages are still being extracted"""
+    pages = []
+    transactions = []
+    layout = None
+    # Extraction and parsing alternate page by page; each stage is reported
+    # once per statement with its total time
+    extracting, parsing = Stopwatch(), Stopwatch()
+    page_texts = iter_pdf_pages(file_path)
+    while True:
+        with extracting:
+            page_text = next(page_texts, None)
+        if page_text is None:
+            break
+        pages.append(f"{page_text}\n")
+        with parsing:
+            # Only the first page carries the bank's header; later pages use its layout
+            if layout is None and page_text.strip():
+                layout = detect_layout(page_text)
+            transactions.extend(parse_statement_transactions(page_text, layout))
+    ingestion_stage_seconds.labels("pdf_extract").observe(extracting.elapsed)
+    ingestion_stage_seconds.labels("parse").observe(parsing.elapsed)
+    return "".join(pages), transactions
+
+def transaction_rows(user_id: int, transactions: list[dict]) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "amount": transaction_data['amount'],
+            "type": TransactionType(transaction_data['type']),
+            "category": transaction_data['category'],
+            "description": transaction_data['description'],
+            "date": transaction_data['date']
+        }
+        for transaction_data in transactions
+    ]
+
+def encode_transactions(transactions: list[dict]) -> str:
+    return json.dumps([
+        {**item, "amount": str(item["amount"]), "date": item["date"].isoformat()} for item in transactions
+    ])
+
+def decode_transactions(payload: str) -> list[dict]:
+    # str() also reads entries cached when amounts were floats
+    return [
+        {**item, "amount": Decimal(str(item["amount"])), "date": date.fromisoformat(item["date"])}
+        for item in json.loads(payload)
+    ]
 
 class ReceiptService:
     def __init__(self, db: Session):
         self.db = db
     
-    def process_receipt(self, user_id: int, file_path: str, file_extension: str) -> Receipt:
+    def process_receipt(
+        self,
+        user_id: int,
+        file_path: str,
+        file_extension: str,
+        content_hash: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> IngestionResult:
         
-        if file_extension.lower() in ['jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-            text = extract_text_from_image(file_path)
-        elif file_extension.lower() == 'pdf':
-            text = extract_text_from_pdf(file_path)
-        else:
-            raise ValueError("Unsupported file format")
+        duplicate = self.find_duplicate(user_id, "receipt", content_hash)
+        if duplicate:
+            return IngestionResult(receipt=duplicate, transactions_created=0, duplicate=True)
         
+        if file_extension.lower() not in SUPPORTED_EXTENSIONS:
+            raise ValueError("Unsupported file format")
         
-        receipt = Receipt(
-            user_id=user_id,
-            file_path=file_path,
-            parsed_text=text
+        text, transactions = self.extract_document(
+            "receipt", content_hash, lambda: extract_upload(file_path, file_extension), parse_receipt_transactions
         )
-        self.db.add(receipt)
-        self.db.commit()
-        self.db.refresh(receipt)
         
+        if progress:
+            progress(60)
         
-        try:
-            transaction_data = parse_receipt_text(text)
-            if transaction_data:
-                transaction = Transaction(
-                    user_id=user_id,
-                    amount=transaction_data['amount'],
-                    type=TransactionType.EXPENSE,
-                    category=transaction_data.get('category', 'Other'),
-                    description=transaction_data.get('description', 'From receipt'),
-                    date=transaction_data.get('date', datetime.now().date())
-                )
-                self.db.add(transaction)
-                self.db.commit()
-        except Exception as e:
-            
-            pass
+        return self._save(user_id, "receipt", file_path, text, content_hash, transactions)
+    
+    def process_pdf_transactions(
+        self,
+        user_id: int,
+        file_path: str,
+        content_hash: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> IngestionResult:
         
-        return receipt
+        duplicate = self.find_duplicate(user_id, "pdf", content_hash)
+        if duplicate:
+            return IngestionResult(receipt=duplicate, transactions_created=0, duplicate=True)
+        
+        text, transactions = self.extract_document(
+            "pdf", content_hash, lambda: extract_statement(file_path), parse_statement_transactions
+        )
+        
+        if progress:
+            progress(75)
+        
+        return self._save(user_id, "pdf", file_path, text[:1000], content_hash, transactions)
     
-    def process_pdf_transactions(self, user_id: int, file_path: str) -> list[Receipt]:
+    def process_batch(
+        self,
+        user_id: int,
+        files: list[BatchFile],
+        extract_many: Callable[[list[BatchFile]], Iterable[Extraction]],
+        progress: Optional[Callable[[int], None]] = None
+    ) -> list[dict]:
+        """Ingest several receipts at once; returns a BatchFileResult dict per file, in order.
+
+        Each distinct new file content is extracted once, through
+        extract_many, which fans the files out and yields their extractions
+        in order. All receipts, transactions and cached documents are then
+        saved in one transaction. Files the user uploaded before, or that
+        repeat an earlier file of the batch, are duplicates; a file that
+        cannot be read fails on its own without affecting the others.
+        """
+        hashes = {file.sha256 for file in files if file.error is None}
+        uploaded = self._receipts_by_hash(user_id, hashes)
+        cached = {
+            document.content_hash: document
+            for document in self.db.query(ExtractedDocument).filter(
+                ExtractedDocument.kind == "receipt",
+                ExtractedDocument.content_hash.in_(hashes)
+            )
+        }
         
-        text = extract_text_from_pdf(file_path)
+        # content hash -> (text, transactions), or the error extracting it raised
+        extracted: dict[str, Extraction] = {}
+        # Extractions to store in the document cache along with the receipts
+        new_documents: dict[str, tuple[str, list[dict]]] = {}
+        to_extract = []
+        for file in files:
+            if file.error is not None or file.sha256 in uploaded or file.sha256 in extracted:
+                continue
+            document = cached.get(file.sha256)
+            if document is not None and document.parser_version == PARSER_VERSION:
+                extracted[file.sha256] = (document.text, decode_transactions(document.transactions))
+            elif document is not None:
+                with ingestion_stage_seconds.labels("parse").time():
+                    extracted[file.sha256] = new_documents[file.sha256] = (
+                        document.text, parse_receipt_transactions(document.text)
+                    )
+            else:
+                extracted[file.sha256] = None
+                to_extract.append(file)
         
+        for done, (file, extraction) in enumerate(zip(to_extract, extract_many(to_extract)), 1):
+            extracted[file.sha256] = extraction
+            if not isinstance(extraction, Exception):
+                new_documents[file.sha256] = extraction
+            if progress:
+                progress(90 * done // len(to_extract))
         
-        receipt = Receipt(
-            user_id=user_id,
-            file_path=file_path,
-            parsed_text=text[:1000]  
-        )
-        self.db.add(receipt)
-        self.db.commit()
-        self.db.refresh(receipt)
+        try:
+            return self._save_batch(user_id, files, extracted, new_documents)
+        except IntegrityError:
+            # A concurrent upload saved one of these files first; the retry
+            # sees its receipt and reports the file as a duplicate
+            self.db.rollback()
+            return self._save_batch(user_id, files, extracted, new_documents)
+    
+    def _receipts_by_hash(self, user_id: int, hashes: set[str]) -> dict[str, Receipt]:
+        return {
+            receipt.content_hash: receipt
+            for receipt in self.db.query(Receipt).filter(
+                Receipt.user_id == user_id,
+                Receipt.kind == "receipt",
+                Receipt.content_hash.in_(hashes)
+            )
+        }
+    
+    def _save_batch(
+        self,
+        user_id: int,
+        files: list[BatchFile],
+        extracted: dict[str, Extraction],
+        new_documents: dict[str, tuple[str, list[dict]]]
+    ) -> list[dict]:
+        with ingestion_stage_seconds.labels("db_insert").time():
+            uploaded = self._receipts_by_hash(user_id, {file.sha256 for file in files if file.error is None})
+            for content_hash, (text, transactions) in new_documents.items():
+                self.db.merge(ExtractedDocument(
+                    content_hash=content_hash,
+                    kind="receipt",
+                    text=text,
+                    transactions=encode_transactions(transactions),
+                    parser_version=PARSER_VERSION
+                ))
+            
+            results = []
+            receipts: dict[str, Receipt] = {}
+            rows = []
+            for file in files:
+                result = {"filename": file.filename, "status": "failed", "receipt_id": None,
+                          "transactions_created": 0, "error": file.error}
+                results.append(result)
+                if file.error is not None:
+                    continue
+                extraction = extracted.get(file.sha256)
+                if file.sha256 in uploaded or file.sha256 in receipts:
+                    result["status"] = "duplicate"
+                elif isinstance(extraction, Exception):
+                    result["error"] = str(extraction)
+                else:
+                    text, transactions = extraction
+                    receipts[file.sha256] = Receipt(
+                        user_id=user_id,
+                        file_path=file.path,
+                        parsed_text=text,
+                        content_hash=file.sha256,
+                        kind="receipt"
+                    )
+                    rows.extend(transaction_rows(user_id, transactions))
+                    result.update(status="created", transactions_created=len(transactions))
+            
+            self.db.add_all(receipts.values())
+            self.db.flush()
+            receipt_ids = {content_hash: receipt.id for content_hash, receipt in {**uploaded, **receipts}.items()}
+            TransactionService(self.db).bulk_insert(rows)
+            # Every receipt and transaction of the batch lands together
+            self.db.commit()
         
+        for file, result in zip(files, results):
+            if result["status"] != "failed":
+                result["receipt_id"] = receipt_ids[file.sha256]
+        return results
+    
+    def find_duplicate(self, user_id: int, kind: str, content_hash: Optional[str]) -> Receipt | None:
+        """The user's earlier receipt of this kind for the same file content, if any"""
+        if not content_hash:
+            return None
+        return self.db.query(Receipt).filter(
+            Receipt.user_id == user_id,
+            Receipt.kind == kind,
+            Receipt.content_hash == content_hash
+        ).order_by(Receipt.id).first()
+    
+    def extract_document(
+        self,
+        kind: str,
+        content_hash: Optional[str],
+        extract: Callable[[], tuple[str, list[dict]]],
+        parse: Callable[[str], list[dict]]
+    ) -> tuple[str, list[dict]]:
+        """Text and parsed transactions for a file, skipping OCR/PDF extraction when cached.
+
+        extract produces both from the file; parse re-parses cached text
+        after a PARSER_VERSION bump.
+        """
+        cached = None
+        if content_hash:
+            cached = self.db.get(ExtractedDocument, (content_hash, kind))
+        if cached is not None and cached.parser_version == PARSER_VERSION:
+            return cached.text, decode_transactions(cached.transactions)
         
-        transactions = parse_transactions_from_text(text)
+        if cached is not None:
+            with ingestion_stage_seconds.labels("parse").time():
+                text, transactions = cached.text, parse(cached.text)
+        else:
+            text, transactions = extract()
         
+        if content_hash:
+            try:
+                self.db.merge(ExtractedDocument(
+                    content_hash=content_hash,
+                    kind=kind,
+                    text=text,
+                    transactions=encode_transactions(transactions),
+                    parser_version=PARSER_VERSION
+                ))
+                self.db.commit()
+            except IntegrityError:
+                # Another worker cached the same document first
+                self.db.rollback()
         
-        created_transactions = []
-        for transaction_data in transactions:
-            transaction = Transaction(
+        return text, transactions
+    
+    def _save(
+        self,
+        user_id: int,
+        kind: str,
+        file_path: str,
+        parsed_text: str,
+        content_hash: Optional[str],
+        transactions: list[dict]
+    ) -> IngestionResult:
+        with ingestion_stage_seconds.labels("db_insert").time():
+            receipt = Receipt(
                 user_id=user_id,
-                amount=transaction_data['amount'],
-                type=TransactionType(transaction_data['type']),
-                category=transaction_data.get('category', 'Other'),
-                description=transaction_data.get('description', 'From PDF statement'),
-                date=transaction_data.get('date', datetime.now().date())
+                file_path=file_path,
+                parsed_text=parsed_text,
+                content_hash=content_hash,
+                kind=kind
             )
-            self.db.add(transaction)
-            created_transactions.append(transaction)
+            self.db.add(receipt)
+            try:
+                self.db.flush()
+            except IntegrityError:
+                # A concurrent job saved the same file for this user first; the
+                # unique index stops us before any transactions are inserted
+                self.db.rollback()
+                duplicate = self.find_duplicate(user_id, kind, content_hash)
+                return IngestionResult(receipt=duplicate, transactions_created=0, duplicate=True)
         
-        self.db.commit()
+            transactions_created = TransactionService(self.db).bulk_insert(transaction_rows(user_id, transactions))
+            mark_changed(self.db, [user_id])
+            # The receipt and its transactions land together, so a retried upload
+            # either sees both as a duplicate or neither
+            self.db.commit()
+            self.db.refresh(receipt)
         
-        return [receipt]  
\ No newline at end of file
+            return IngestionResult(receipt=receipt, transactions_created=transactions_created)
\ No newline at end of file
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+from app.models.transaction import Transaction, TransactionType
+from app.models.transaction_rollup import TransactionRollup
+from app.db.types import from_cents, to_cents
+
+class RollupService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply(self, rows: Iterable[dict]) -> None:
+        """Add newly inserted transaction rows (column dicts) to the rollup table.
+
+        Runs inside the caller's DB transaction and does not commit, so the
+        rollup and the rows it summarises are always written together.
+        """
+        # Sum in integer cents: exact, and no Decimal arithmetic per row
+        deltas = defaultdict(lambda: [0, 0])
+        for row in rows:
+            key = (
+                row["user_id"],
+                row["date"],
+                TransactionType(row["type"]),
+                row["category"]
+            )
+            deltas[key][0] += to_cents(row["amount"])
+            deltas[key][1] += 1
+
+        if not deltas:
+            return
+
+        rollup_rows = [
+            {
+                "user_id": user_id,
+                "date": day,
+                "type": type,
+                "category": category,
+                "total_amount": from_cents(total_cents),
+                "count": count
+            }
+            for (user_id, day, type, category), (total_cents, count) in deltas.items()
+        ]
+
+        upsert = self._upsert_statement()
+        if upsert is not None:
+            self.db.execute(upsert, rollup_rows)
+            return
+
+        for row in rollup_rows:
+            updated = self.db.query(TransactionRollup).filter(
+                TransactionRollup.user_id == row["user_id"],
+                TransactionRollup.date == row["date"],
+                TransactionRollup.type == row["type"],
+                TransactionRollup.category == row["category"]
+            ).update({
+                TransactionRollup.total_amount: TransactionRollup.total_amount + row["total_amount"],
+                TransactionRollup.count: TransactionRollup.count + row["count"]
+            }, synchronize_session=False)
+            if not updated:
+                self.db.add(TransactionRollup(**row))
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Recompute the rollup from the transactions table; returns the number of rollup rows"""
+        delete_query = self.db.query(TransactionRollup)
+        source = select(
+            Transaction.user_id,
+            Transaction.date,
+            Transaction.type,
+            Transaction.category,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        )
+        if user_id is not None:
+            delete_query = delete_query.filter(TransactionRollup.user_id == user_id)
+            source = source.where(Transaction.user_id == user_id)
+        source = source.group_by(
+            Transaction.user_id, Transaction.date, Transaction.type, Transaction.category
+        )
+
+        delete_query.delete(synchronize_session=False)
+        self.db.execute(
+            insert(TransactionRollup).from_select(
+                ["user_id", "date", "type", "category", "total_amount", "count"], source
+            )
+        )
+        self.db.commit()
+
+        count_query = self.db.query(func.count()).select_from(TransactionRollup)
+        if user_id is not None:
+            count_query = count_query.filter(TransactionRollup.user_id == user_id)
+        return count_query.scalar()
+
+    def _upsert_statement(self):
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            return None
+
+        statement = dialect_insert(TransactionRollup)
+        return statement.on_conflict_do_update(
+            index_elements=["user_id", "date", "type", "category"],
+            set_={
+                "total_amount": TransactionRollup.total_amount + statement.excluded.total_amount,
+                "count": TransactionRollup.count + statement.excluded.count
+            }
+        )
@@ -1,29 +1,237 @@
  
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import BigInteger, Row, Select, case, func, and_, tuple_, insert, select, type_coerce
+from typing import Iterable, Iterator, Optional, Sequence
 from datetime import date
+import base64
 from app.models.transaction import Transaction, TransactionType
-from app.schemas.transaction import TransactionCreate, TransactionSummary, DateSummary, PaginatedTransactions
+from app.models.transaction_rollup import TransactionRollup
+from app.core.config import settings
+from app.core.data_version import mark_changed
+from app.db.expressions import date_bucket
+from app.db.types import json_amount
+from app.services.rollup_service import RollupService
+from app.schemas.transaction import TransactionCreate
+
+def encode_cursor(cursor_date: date, cursor_id: int) -> str:
+    """Build the opaque cursor pointing just past the given row"""
+    raw = f"{cursor_date.isoformat()}|{cursor_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date_str, id_str = raw.split("|")
+        return date.fromisoformat(date_str), int(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def transaction_row(user_id: int, transaction_data: TransactionCreate) -> dict:
+    """Column values for inserting a validated transaction"""
+    return {
+        "user_id": user_id,
+        "amount": transaction_data.amount,
+        "type": TransactionType(transaction_data.type),
+        "category": transaction_data.category,
+        "description": transaction_data.description,
+        "date": transaction_data.date
+    }
+
+def transaction_filters(
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    type: Optional[str],
+    category: Optional[str]
+) -> list:
+    filters = [Transaction.user_id == user_id]
+    if start_date:
+        filters.append(Transaction.date >= start_date)
+    if end_date:
+        filters.append(Transaction.date <= end_date)
+    if type:
+        filters.append(Transaction.type == TransactionType(type))
+    if category:
+        filters.append(Transaction.category == category)
+    return filters
+
+def transactions_count_query(filters: list) -> Select:
+    return select(func.count()).select_from(Transaction).where(*filters)
+
+# The columns of a listed transaction, read as plain tuples: no ORM identity
+# map, and the amount stays exact integer cents until it is written out
+TRANSACTION_ROW = (
+    Transaction.id,
+    Transaction.user_id,
+    type_coerce(Transaction.amount, BigInteger).label("amount_cents"),
+    Transaction.type,
+    Transaction.category,
+    Transaction.description,
+    Transaction.date,
+    Transaction.created_at
+)
+
+def transaction_item(row: Row) -> dict:
+    """A listed transaction in the shape of schemas.Transaction, ready for JSON"""
+    return {
+        "amount": json_amount(row.amount_cents),
+        "type": row.type.value,
+        "category": row.category,
+        "description": row.description,
+        "date": row.date,
+        "id": row.id,
+        "user_id": row.user_id,
+        "created_at": row.created_at
+    }
+
+def transactions_page_query(filters: list, page: int, limit: int, cursor: Optional[str] = None) -> Select:
+    query = select(*TRANSACTION_ROW).where(*filters).order_by(Transaction.date.desc(), Transaction.id.desc())
+    if cursor:
+        # Keyset mode: seek past the last row of the previous page via the
+        # (user_id, date, id) index instead of skipping rows with OFFSET
+        cursor_date, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id))
+    else:
+        query = query.offset((page - 1) * limit)
+    # One extra row tells us whether a next page exists without counting
+    return query.limit(limit + 1)
+
+def transactions_export_query(filters: list) -> Select:
+    # Oldest first, the order a spreadsheet or a re-import expects
+    return select(*TRANSACTION_ROW).where(*filters).order_by(Transaction.date, Transaction.id)
+
+def build_page(
+    rows: Sequence[Row],
+    total: Optional[int],
+    page: int,
+    limit: int,
+    cursor: Optional[str]
+) -> dict:
+    """A PaginatedTransactions-shaped dict from the limit + 1 rows fetched by transactions_page_query"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor(rows[-1].date, rows[-1].id)
+    
+    pages = (total + limit - 1) // limit if total is not None else None
+    
+    return {
+        "items": [transaction_item(row) for row in rows],
+        "total": total,
+        "page": None if cursor else page,
+        "pages": pages,
+        "next_cursor": next_cursor
+    }
+
+def rollup_filters(
+    user_id: int,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    type: Optional[str],
+    category: Optional[str] = None
+) -> list:
+    # Summaries read the per-day rollup, so their cost follows the number
+    # of days and categories rather than the number of transactions
+    filters = [TransactionRollup.user_id == user_id]
+    if start_date:
+        filters.append(TransactionRollup.date >= start_date)
+    if end_date:
+        filters.append(TransactionRollup.date <= end_date)
+    if type:
+        filters.append(TransactionRollup.type == TransactionType(type))
+    if category:
+        filters.append(TransactionRollup.category == category)
+    return filters
+
+# Sums integer cents; divided once per group instead of converting every row
+_ROLLUP_CENTS = type_coerce(TransactionRollup.total_amount, BigInteger)
+
+def category_summary_query(user_id: int, start_date: Optional[date], end_date: Optional[date], type: Optional[str]) -> Select:
+    return select(
+        TransactionRollup.category,
+        func.sum(_ROLLUP_CENTS).label("total_cents")
+    ).where(*rollup_filters(user_id, start_date, end_date, type)).group_by(TransactionRollup.category)
+
+def date_summary_query(user_id: int, start_date: Optional[date], end_date: Optional[date], type: Optional[str]) -> Select:
+    return select(
+        TransactionRollup.date,
+        func.sum(_ROLLUP_CENTS).label("total_cents")
+    ).where(*rollup_filters(user_id, start_date, end_date, type)).group_by(
+        TransactionRollup.date
+    ).order_by(TransactionRollup.date)
+
+def _rollup_cents_of(type: TransactionType):
+    return func.sum(case((TransactionRollup.type == type, _ROLLUP_CENTS), else_=0))
+
+def timeseries_query(
+    user_id: int,
+    bucket: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    category: Optional[str],
+    by_category: bool
+) -> Select:
+    """Income and expense cents per bucket (and category), in one grouped pass over the rollup"""
+    keys = [date_bucket(TransactionRollup.date, bucket).label("period_start")]
+    if by_category:
+        keys.append(TransactionRollup.category)
+    return select(
+        *keys,
+        _rollup_cents_of(TransactionType.INCOME).label("income_cents"),
+        _rollup_cents_of(TransactionType.EXPENSE).label("expense_cents")
+    ).where(*rollup_filters(user_id, start_date, end_date, None, category)).group_by(*keys).order_by(*keys)
+
+def timeseries_point(row: Row, by_category: bool) -> dict:
+    """A TimeseriesPoint-shaped dict, ready for JSON"""
+    return {
+        "period_start": row.period_start,
+        "category": row.category if by_category else None,
+        "income": json_amount(row.income_cents),
+        "expense": json_amount(row.expense_cents),
+        "net": json_amount(row.income_cents - row.expense_cents)
+    }
 
 class TransactionService:
     def __init__(self, db: Session):
         self.db = db
     
     def create_transaction(self, user_id: int, transaction_data: TransactionCreate) -> Transaction:
-        transaction = Transaction(
-            user_id=user_id,
-            amount=transaction_data.amount,
-            type=TransactionType(transaction_data.type),
-            category=transaction_data.category,
-            description=transaction_data.description,
-            date=transaction_data.date
-        )
+        values = transaction_row(user_id, transaction_data)
+        transaction = Transaction(**values)
         self.db.add(transaction)
+        RollupService(self.db).apply([values])
+        mark_changed(self.db, [user_id])
         self.db.commit()
         self.db.refresh(transaction)
         return transaction
     
+    def bulk_insert(self, rows: Iterable[dict], chunk_size: Optional[int] = None) -> int:
+        """Insert transaction column dicts with executemany in chunks; the caller commits.
+
+        Rows skip the ORM unit of work entirely, so memory stays bounded by
+        the chunk size no matter how many rows are streamed in.
+        """
+        chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+        inserted = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                inserted += self._insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            inserted += self._insert_chunk(chunk)
+        return inserted
+    
+    def _insert_chunk(self, chunk: list[dict]) -> int:
+        self.db.execute(insert(Transaction), chunk)
+        RollupService(self.db).apply(chunk)
+        mark_changed(self.db, {row["user_id"] for row in chunk})
+        return len(chunk)
+    
     def get_transactions(
         self,
         user_id: int,
@@ -32,35 +240,41 @@ class TransactionService:
         type: Optional[str],
         category: Optional[str],
         page: int,
-        limit: int
-    ) -> PaginatedTransactions:
-        query = self.db.query(Transaction).filter(Transaction.user_id == user_id)
-        
-        
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
-        if type:
-            query = query.filter(Transaction.type == TransactionType(type))
-        if category:
-            query = query.filter(Transaction.category == category)
-        
-        
-        total = query.count()
-        
-        
-        transactions = query.order_by(Transaction.date.desc()).offset((page - 1) * limit).limit(limit).all()
+        limit: int,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> dict:
+        filters = transaction_filters(user_id, start_date, end_date, type, category)
+        page_query = transactions_page_query(filters, page, limit, cursor)
         
-        
-        pages = (total + limit - 1) // limit
-        
-        return PaginatedTransactions(
-            items=transactions,
-            total=total,
-            page=page,
-            pages=pages
+        total = self.db.scalar(transactions_count_query(filters)) if include_total else None
+        rows = self.db.execute(page_query).all()
+        return build_page(rows, total, page, limit, cursor)
+    
+    def export_transactions(
+        self,
+        user_id: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        type: Optional[str],
+        category: Optional[str],
+        chunk_size: Optional[int] = None
+    ) -> Iterator[list[dict]]:
+        """Every matching transaction, as chunks of at most chunk_size items.
+
+        The query runs once on a server-side cursor (stream_results) and rows
+        are fetched chunk_size at a time (yield_per) while the caller
+        iterates, so memory does not grow with the history. The query is
+        executed before this returns: invalid filters raise here, not midway
+        through the iteration.
+        """
+        chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        filters = transaction_filters(user_id, start_date, end_date, type, category)
+        result = self.db.execute(
+            transactions_export_query(filters),
+            execution_options={"stream_results": True, "yield_per": chunk_size}
         )
+        return ([transaction_item(row) for row in rows] for rows in result.partitions())
     
     def get_category_summary(
         self,
@@ -68,50 +282,101 @@ class TransactionService:
         start_date: Optional[date],
         end_date: Optional[date],
         type: Optional[str]
-    ) -> list[TransactionSummary]:
-        query = self.db.query(
-            Transaction.category,
-            func.sum(Transaction.amount).label("total_amount")
-        ).filter(Transaction.user_id == user_id)
+    ) -> list[dict]:
+        results = self.db.execute(category_summary_query(user_id, start_date, end_date, type)).all()
         
+        return [{"category": row.category, "total_amount": json_amount(row.total_cents)} for row in results]
+    
+    def get_date_summary(
+        self,
+        user_id: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        type: Optional[str]
+    ) -> list[dict]:
+        results = self.db.execute(date_summary_query(user_id, start_date, end_date, type)).all()
         
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
-        if type:
-            query = query.filter(Transaction.type == TransactionType(type))
+        return [{"date": row.date, "total_amount": json_amount(row.total_cents)} for row in results]
+    
+    def get_timeseries(
+        self,
+        user_id: int,
+        bucket: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        category: Optional[str],
+        by_category: bool = False
+    ) -> list[dict]:
+        results = self.db.execute(
+            timeseries_query(user_id, bucket, start_date, end_date, category, by_category)
+        ).all()
         
-        results = query.group_by(Transaction.category).all()
+        return [timeseries_point(row, by_category) for row in results]
+
+class AsyncTransactionService:
+    """TransactionService for an AsyncSession, built on the same query builders"""
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create_transaction(self, user_id: int, transaction_data: TransactionCreate) -> Transaction:
+        # The write path (row + rollup upsert) is shared with the sync service;
+        # run_sync drives it over the async connection without a thread hop
+        return await self.db.run_sync(
+            lambda session: TransactionService(session).create_transaction(user_id, transaction_data)
+        )
+    
+    async def get_transactions(
+        self,
+        user_id: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        type: Optional[str],
+        category: Optional[str],
+        page: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> dict:
+        filters = transaction_filters(user_id, start_date, end_date, type, category)
+        page_query = transactions_page_query(filters, page, limit, cursor)
         
-        return [
-            TransactionSummary(category=row.category, total_amount=row.total_amount)
-            for row in results
-        ]
+        total = await self.db.scalar(transactions_count_query(filters)) if include_total else None
+        rows = (await self.db.execute(page_query)).all()
+        return build_page(rows, total, page, limit, cursor)
     
-    def get_date_summary(
+    async def get_category_summary(
         self,
         user_id: int,
         start_date: Optional[date],
         end_date: Optional[date],
         type: Optional[str]
-    ) -> list[DateSummary]:
-        query = self.db.query(
-            Transaction.date,
-            func.sum(Transaction.amount).label("total_amount")
-        ).filter(Transaction.user_id == user_id)
-        
+    ) -> list[dict]:
+        results = (await self.db.execute(category_summary_query(user_id, start_date, end_date, type))).all()
         
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
-        if type:
-            query = query.filter(Transaction.type == TransactionType(type))
+        return [{"category": row.category, "total_amount": json_amount(row.total_cents)} for row in results]
+    
+    async def get_date_summary(
+        self,
+        user_id: int,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        type: Optional[str]
+    ) -> list[dict]:
+        results = (await self.db.execute(date_summary_query(user_id, start_date, end_date, type))).all()
         
-        results = query.group_by(Transaction.date).order_by(Transaction.date).all()
+        return [{"date": row.date, "total_amount": json_amount(row.total_cents)} for row in results]
+    
+    async def get_timeseries(
+        self,
+        user_id: int,
+        bucket: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        category: Optional[str],
+        by_category: bool = False
+    ) -> list[dict]:
+        results = (await self.db.execute(
+            timeseries_query(user_id, bucket, start_date, end_date, category, by_category)
+        )).all()
         
-        return [
-            DateSummary(date=row.date, total_amount=row.total_amount)
-            for row in results
-        ]
\ No newline at end of file
+        return [timeseries_point(row, by_category) for row in results]
\ No newline at end of file
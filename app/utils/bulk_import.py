@@ -0,0 +1,112 @@
+import csv
+import json
+from decimal import Decimal
+from typing import AsyncIterator, Iterable
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+# A quoted CSV field left open longer than this is reported as an error
+# instead of buffering the rest of the body into one row
+MAX_CSV_ROW_BYTES = 1024 * 1024
+
+async def iter_lines(stream: AsyncIterator[bytes], strip_cr: bool = True) -> AsyncIterator[bytes]:
+    """Split a streamed request body into lines without buffering the whole body.
+
+    Lines stay undecoded so a bad byte sequence only fails its own row.
+    """
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r") if strip_cr else line
+    if buffer:
+        yield buffer.rstrip(b"\r") if strip_cr else buffer
+
+def decode_line(line: bytes) -> str:
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Line is not valid UTF-8: {e}")
+
+async def iter_json_records(items: Iterable) -> AsyncIterator[tuple[int, object]]:
+    """Number the items of an already parsed JSON array"""
+    for row, item in enumerate(items, start=1):
+        yield row, item
+
+async def iter_ndjson_records(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """Yield (row number, record or error) for each non-empty NDJSON line"""
+    row = 0
+    async for line in iter_lines(stream):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            text = decode_line(line)
+        except ValueError as e:
+            yield row, e
+            continue
+        try:
+            yield row, json.loads(text, parse_float=Decimal)
+        except ValueError as e:
+            yield row, ValueError(f"Invalid JSON: {e}")
+
+def parse_csv_row(lines: list[bytes]) -> list[str]:
+    """Parse the lines of one CSV row; more than one when a quoted field holds line breaks"""
+    text = decode_line(b"\n".join(lines))
+    try:
+        return next(csv.reader([text]), [])
+    except csv.Error as e:
+        raise ValueError(f"Invalid CSV: {e}")
+
+async def iter_csv_rows(stream: AsyncIterator[bytes]) -> AsyncIterator[list[bytes]]:
+    """Group the lines of a CSV body into rows, yielding the lines of each row.
+
+    A row ends at the first line break outside quotes: quotes in a field
+    are doubled, so the row is complete once it has an even number of them.
+    """
+    lines: list[bytes] = []
+    quotes = 0
+    size = 0
+    async for line in iter_lines(stream, strip_cr=False):
+        if not lines and not line.strip():
+            continue
+        lines.append(line)
+        quotes += line.count(b'"')
+        size += len(line)
+        if quotes % 2 and size <= MAX_CSV_ROW_BYTES:
+            # Inside a quoted field that continues on the next line
+            continue
+        yield lines
+        lines, quotes, size = [], 0, 0
+    if lines:
+        yield lines
+
+async def iter_csv_records(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """Yield (row number, record or error) for each CSV data row.
+
+    The first row is the header. Quoted fields may contain line breaks, as
+    csv.writer writes them, so an export of /transactions/export reads back
+    as it was written.
+    """
+    header = None
+    row = 0
+    async for lines in iter_csv_rows(stream):
+        if header is None:
+            header = [name.strip() for name in next(csv.reader([b"\n".join(lines).decode("utf-8", errors="replace")]))]
+            continue
+        row += 1
+        if sum(len(line) for line in lines) > MAX_CSV_ROW_BYTES:
+            yield row, ValueError(f"Row exceeds {MAX_CSV_ROW_BYTES} bytes; is a quote left open?")
+            continue
+        try:
+            values = parse_csv_row(lines)
+        except ValueError as e:
+            yield row, e
+            continue
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty cells fall back to the schema defaults
+        yield row, {name: value for name, value in zip(header, values) if value != ""}
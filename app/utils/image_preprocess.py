@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image, ImageFilter
+from app.core.config import settings
+
+# Side of the thumbnail the receipt outline is detected on
+_DETECT_SIZE = 256
+# Ignore detected regions smaller than this share of the photo; they are
+# glare or a bright object rather than the receipt
+_MIN_RECEIPT_AREA = 0.05
+_CROP_MARGIN = 0.02
+
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """What to do to an image before it is handed to tesseract.
+
+    target_dpi downscales the receipt so that its paper width
+    (receipt_width_inches) spans about target_dpi pixels per inch; images
+    are never upscaled. None keeps the original resolution. When no receipt
+    outline is found the paper width is unknown, so only an image whose
+    declared DPI exceeds target_dpi is downscaled.
+    """
+    target_dpi: Optional[int] = 300
+    receipt_width_inches: float = 3.15
+    grayscale: bool = True
+    binarize: bool = True
+    crop: bool = True
+
+    @classmethod
+    def from_settings(cls) -> Optional["PreprocessConfig"]:
+        """The configured pipeline, or None when OCR_PREPROCESS is off"""
+        if not settings.OCR_PREPROCESS:
+            return None
+        return cls(
+            target_dpi=settings.OCR_TARGET_DPI or None,
+            receipt_width_inches=settings.OCR_RECEIPT_WIDTH_INCHES,
+            binarize=settings.OCR_BINARIZE,
+            crop=settings.OCR_CROP
+        )
+
+def otsu_threshold(image: Image.Image) -> int:
+    """Grey level that best separates a grayscale image into ink and paper"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_level, best_variance = 127, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+def find_receipt_box(image_path: str) -> Optional[tuple[float, float, float, float]]:
+    """Bounding box of the receipt paper as fractions of the image size.
+
+    The receipt is taken to be the bright region against a darker
+    background. Returns None when no such region stands out.
+    """
+    with Image.open(image_path) as probe:
+        # JPEG can decode straight to a fraction of its size, which is far
+        # cheaper than decoding a 12MP photo to look at its outline
+        probe.draft("L", (_DETECT_SIZE, _DETECT_SIZE))
+        thumbnail = probe.convert("L")
+    thumbnail.thumbnail((_DETECT_SIZE, _DETECT_SIZE))
+
+    threshold = otsu_threshold(thumbnail)
+    mask = thumbnail.point(lambda level: 255 if level > threshold else 0)
+    # Erode away specks and thin highlights so they do not widen the box
+    box = mask.filter(ImageFilter.MinFilter(5)).getbbox()
+    if box is None:
+        return None
+
+    width, height = thumbnail.size
+    left, top, right, bottom = box
+    if (right - left) * (bottom - top) < _MIN_RECEIPT_AREA * width * height:
+        return None
+    return (
+        max(0.0, left / width - _CROP_MARGIN),
+        max(0.0, top / height - _CROP_MARGIN),
+        min(1.0, right / width + _CROP_MARGIN),
+        min(1.0, bottom / height + _CROP_MARGIN)
+    )
+
+def load_for_ocr(image_path: str, config: Optional[PreprocessConfig]) -> Image.Image:
+    """Open an image and run the preprocessing pipeline described by config"""
+    if config is None:
+        return Image.open(image_path)
+
+    box = find_receipt_box(image_path) if config.crop or config.target_dpi else None
+
+    image = Image.open(image_path)
+    orientation = image.getexif().get(0x0112)
+    width, height = image.size
+
+    scale = 1.0
+    if config.target_dpi and box:
+        # Receipts are taller than wide, so the short side of the box is the
+        # paper width whichever way the photo was taken
+        receipt_pixels = min((box[2] - box[0]) * width, (box[3] - box[1]) * height)
+        scale = min(1.0, config.target_dpi * config.receipt_width_inches / max(receipt_pixels, 1.0))
+    elif config.target_dpi:
+        declared_dpi = image.info.get("dpi", (0, 0))[0]
+        if declared_dpi > config.target_dpi:
+            scale = config.target_dpi / declared_dpi
+    if scale < 1.0 or config.grayscale or config.binarize:
+        # Let the JPEG decoder do the coarse reduction (and grayscale) itself
+        image.draft("L" if config.grayscale or config.binarize else image.mode,
+                    (int(width * scale) + 1, int(height * scale) + 1))
+        scale = min(1.0, scale * width / image.width)
+        width, height = image.size
+
+    if box and config.crop:
+        image = image.crop((
+            round(box[0] * width), round(box[1] * height),
+            round(box[2] * width), round(box[3] * height)
+        ))
+    if config.grayscale or config.binarize:
+        image = image.convert("L")
+    if scale < 1.0:
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.Resampling.LANCZOS
+        )
+    if config.binarize:
+        threshold = otsu_threshold(image)
+        image = image.point(lambda level: 255 if level > threshold else 0)
+    if orientation in _EXIF_TRANSPOSE:
+        image = image.transpose(_EXIF_TRANSPOSE[orientation])
+    return image
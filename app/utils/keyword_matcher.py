@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Iterable
+
+class KeywordMatcher:
+    """Classify text by keyword groups in a single Aho-Corasick pass.
+
+    Groups are given in priority order; classify() returns the label of the
+    first group with any keyword occurring in the text, which is what a
+    chain of ``if any(word in text for word in ...)`` checks computes, but
+    without rescanning the text once per keyword.
+    """
+
+    def __init__(self, groups: Iterable[tuple[str, Iterable[str]]], default: str = "Other"):
+        self.default = default
+        self.labels = []
+        keyword_priority = {}
+        for priority, (label, keywords) in enumerate(groups):
+            self.labels.append(label)
+            for keyword in keywords:
+                keyword_priority.setdefault(keyword.lower(), priority)
+        self._no_match = len(self.labels)
+        self._build(keyword_priority)
+
+    def _build(self, keyword_priority: dict[str, int]) -> None:
+        # Trie of keywords; output[state] is the best priority ending there
+        goto = [{}]
+        output = [self._no_match]
+        for keyword, priority in keyword_priority.items():
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    output.append(self._no_match)
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state] = min(output[state], priority)
+
+        # Breadth-first failure links, folding in outputs reachable through them,
+        # and a full transition table so matching never follows failure links
+        fail = [0] * len(goto)
+        transitions = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state] = min(output[state], output[fail[state]])
+            table = dict(transitions[fail[state]])
+            table.update(goto[state])
+            transitions[state] = table
+            for char, child in goto[state].items():
+                fail[child] = transitions[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        # Dropping transitions back to the root keeps the tables small
+        self._transitions = [
+            {char: target for char, target in table.items() if target} for table in transitions
+        ]
+        self._output = output
+
+    def classify(self, text: str) -> str:
+        transitions = self._transitions
+        output = self._output
+        state = 0
+        best = self._no_match
+        for char in text.lower():
+            state = transitions[state].get(char, 0)
+            if output[state] < best:
+                best = output[state]
+                if best == 0:
+                    break
+        return self.default if best == self._no_match else self.labels[best]
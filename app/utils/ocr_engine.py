@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+import logging
+import queue
+import threading
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional["OCREngine"] = None
+_engine_lock = threading.Lock()
+
+class OCRTimeout(Exception):
+    pass
+
+def import_pytesseract():
+    """pytesseract, pointed at TESSERACT_CMD when set.
+
+    Imported on first OCR rather than with the app, so processes that never
+    read an image do not load it.
+    """
+    import pytesseract
+    if settings.TESSERACT_CMD:
+        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+    return pytesseract
+
+class OCREngine(ABC):
+    """Turns images into text; extract_text_from_image goes through one of these"""
+    name = "base"
+
+    def image_to_string(self, image) -> str:
+        return self.image_to_string_batch([image])[0]
+
+    @abstractmethod
+    def image_to_string_batch(self, images: Sequence) -> list[str]:
+        """Text of each image, in input order"""
+
+    def close(self) -> None:
+        pass
+
+class SubprocessEngine(OCREngine):
+    """pytesseract: one tesseract process (and temp files) per image"""
+    name = "subprocess"
+
+    def __init__(self, language: str, timeout_seconds: float):
+        self._pytesseract = import_pytesseract()
+        self.language = language
+        self.timeout_seconds = timeout_seconds
+
+    def image_to_string_batch(self, images: Sequence) -> list[str]:
+        texts = []
+        for image in images:
+            try:
+                texts.append(self._pytesseract.image_to_string(
+                    image, lang=self.language, timeout=self.timeout_seconds
+                ))
+            except RuntimeError as e:
+                if "timeout" in str(e).lower():
+                    raise OCRTimeout(f"OCR took longer than {self.timeout_seconds}s")
+                raise
+        return texts
+
+class PooledEngine(OCREngine):
+    """A fixed set of warm tesseract instances shared by a thread pool.
+
+    Each instance loads the language model once and is reused for every
+    image, so a small receipt costs only its recognition time. Recognition
+    runs outside the GIL, so pool_size images are read concurrently; a batch
+    is spread over the pool and comes back in input order.
+    """
+    name = "pooled"
+
+    def __init__(self, create_api: Callable[[], Any], pool_size: int, timeout_seconds: float):
+        self.pool_size = max(1, pool_size)
+        self.timeout_seconds = timeout_seconds
+        self._apis: queue.Queue = queue.Queue()
+        for _ in range(self.pool_size):
+            self._apis.put(create_api())
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="ocr")
+
+    def _recognize(self, image) -> str:
+        api = self._apis.get()
+        try:
+            api.SetImage(image)
+            if not api.Recognize(int(self.timeout_seconds * 1000)):
+                raise OCRTimeout(f"OCR took longer than {self.timeout_seconds}s")
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._apis.put(api)
+
+    def image_to_string_batch(self, images: Sequence) -> list[str]:
+        if len(images) == 1:
+            return [self._recognize(images[0])]
+        return list(self._executor.map(self._recognize, images))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        while not self._apis.empty():
+            self._apis.get().End()
+
+def create_tesserocr_engine(language: str, pool_size: int, timeout_seconds: float) -> PooledEngine:
+    from tesserocr import PyTessBaseAPI
+    engine = PooledEngine(lambda: PyTessBaseAPI(lang=language), pool_size, timeout_seconds)
+    engine.name = "tesserocr"
+    return engine
+
+def create_engine(kind: Optional[str] = None) -> OCREngine:
+    """Build the engine named by kind (default OCR_ENGINE).
+
+    "tesserocr" requires the optional tesserocr package; "auto" uses it
+    when installed and falls back to "subprocess" otherwise.
+    """
+    kind = (kind or settings.OCR_ENGINE).lower()
+    if kind not in ("auto", "tesserocr", "subprocess"):
+        raise ValueError(f"Unknown OCR engine: {kind}")
+    if kind in ("auto", "tesserocr"):
+        try:
+            return create_tesserocr_engine(
+                settings.OCR_LANGUAGE, settings.OCR_POOL_SIZE, settings.OCR_TIMEOUT_SECONDS
+            )
+        except ImportError:
+            if kind == "tesserocr":
+                raise
+            logger.info("tesserocr not installed; running tesseract as a subprocess per image")
+    return SubprocessEngine(settings.OCR_LANGUAGE, settings.OCR_TIMEOUT_SECONDS)
+
+def get_engine() -> OCREngine:
+    """Return this process's shared OCR engine, creating it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine()
+        return _engine
+
+def shutdown_engine() -> None:
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
@@ -1,60 +1,90 @@
  
-import pdfplumber
-import re
-from datetime import datetime
+import multiprocessing
+import multiprocessing.util
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+from app.core.config import settings
+from app.utils.statement_parser import detect_layout, get_parser
+
+_page_executor: Optional[ProcessPoolExecutor] = None
+_page_executor_lock = threading.Lock()
+
+def _get_page_executor() -> ProcessPoolExecutor:
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            # Stop the pool when this process exits, e.g. an ingestion worker
+            # stopped by its own pool. It has to run before multiprocessing's
+            # queue finalizers (priority 10), which would otherwise close the
+            # call queue under it and leave the page workers waiting forever.
+            multiprocessing.util.Finalize(None, shutdown_page_executor, exitpriority=20)
+        return _page_executor
+
+def shutdown_page_executor() -> None:
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is not None:
+            _page_executor.shutdown(wait=True, cancel_futures=True)
+            _page_executor = None
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> list[str]:
+    # Runs in a pool worker: each worker opens its own handle on the file
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return [pdf.pages[number].extract_text() or "" for number in range(start, stop)]
+
+def iter_pdf_pages(pdf_path: str, workers: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of each page in page order, as soon as it is extracted.
+
+    Documents with at least PDF_PARALLEL_MIN_PAGES pages are split into page
+    ranges that are extracted concurrently across a process pool.
+    """
+    # pdfplumber (and pdfminer under it) is imported on first use, so
+    # importing the app does not load it
+    import pdfplumber
+    workers = settings.PDF_EXTRACT_WORKERS if workers is None else workers
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        if workers <= 1 or page_count < settings.PDF_PARALLEL_MIN_PAGES:
+            for page in pdf.pages:
+                yield page.extract_text() or ""
+            return
+
+    # A few ranges per worker keeps the pool busy when pages vary in cost
+    batch_size = max(1, -(-page_count // (workers * 4)))
+    starts = list(range(0, page_count, batch_size))
+    stops = [min(start + batch_size, page_count) for start in starts]
+    # map() yields results in submission order, which gives ordered reassembly
+    for pages in _get_page_executor().map(_extract_page_range, [pdf_path] * len(starts), starts, stops):
+        yield from pages
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text from a PDF file"""
     try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return text
+        return "".join(f"{page_text}\n" for page_text in iter_pdf_pages(pdf_path))
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
-def parse_transactions_from_text(text: str) -> list[dict]:
-    """Parse transaction data from bank statement text"""
-    transactions = []
-    
-    transaction_pattern = r'(\d{1,2}/\d{1,2}/\d{2,4})\s+(.*?)\s+(-?\$?\d+\.\d{2})'
-    
-    matches = re.findall(transaction_pattern, text)
-    
-    for match in matches:
-        date_str, description, amount_str = match
-        
-        try:
-            
-            transaction_date = datetime.strptime(date_str, '%m/%d/%Y').date()
-            
-            
-            amount = float(amount_str.replace('$', '').replace(',', ''))
-            transaction_type = "expense" if amount < 0 else "income"
-            amount = abs(amount)
-            
-            
-            category = "Other"
-            description_lower = description.lower()
-            
-            if any(word in description_lower for word in ['restaurant', 'cafe', 'food', 'groceries']):
-                category = "Food"
-            elif any(word in description_lower for word in ['gas', 'fuel', 'taxi', 'uber', 'transport']):
-                category = "Transport"
-            elif any(word in description_lower for word in ['electricity', 'water', 'gas', 'internet', 'phone']):
-                category = "Utilities"
-            elif any(word in description_lower for word in ['salary', 'payment', 'deposit']):
-                category = "Income"
-            
-            transactions.append({
-                "amount": amount,
-                "type": transaction_type,
-                "category": category,
-                "description": description.strip(),
-                "date": transaction_date
-            })
-        except Exception as e:
-            continue
-    
-    return transactions
\ No newline at end of file
+def parse_transactions_from_text(text: str, layout: Optional[str] = None) -> list[dict]:
+    """Parse transaction data from bank statement text.
+
+    layout names a registered StatementLayout; by default it is detected
+    from the text, falling back to the MM/DD/YYYY layout.
+    """
+    return get_parser(layout or detect_layout(text)).parse(text)
+
+def parse_transactions_from_pages(pages: Iterable[str], layout: Optional[str] = None) -> Iterator[dict]:
+    """Parse transactions page by page, e.g. straight from iter_pdf_pages.
+
+    Without an explicit layout it is detected once, from the first page with
+    text, and used for every page.
+    """
+    for page_text in pages:
+        if layout is None and page_text.strip():
+            layout = detect_layout(page_text)
+        yield from parse_transactions_from_text(page_text, layout)
\ No newline at end of file
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterator, Optional
+import re
+from app.utils.keyword_matcher import KeywordMatcher
+
+STATEMENT_CATEGORIES = KeywordMatcher([
+    ("Food", ['restaurant', 'cafe', 'food', 'groceries']),
+    ("Transport", ['gas', 'fuel', 'taxi', 'uber', 'transport']),
+    ("Utilities", ['electricity', 'water', 'gas', 'internet', 'phone']),
+    ("Income", ['salary', 'payment', 'deposit']),
+])
+
+@dataclass(frozen=True)
+class StatementLayout:
+    """How one bank's statement lines look.
+
+    line_pattern must define the named groups ``date``, ``description`` and
+    ``amount``; negative amounts are expenses. When detect_pattern is set the
+    layout is chosen automatically for statements containing it.
+    """
+    name: str
+    line_pattern: str
+    date_formats: tuple[str, ...]
+    detect_pattern: Optional[str] = None
+
+_layouts: dict[str, StatementLayout] = {}
+_parsers: dict[str, "StatementParser"] = {}
+
+def register_layout(layout: StatementLayout) -> None:
+    _layouts[layout.name] = layout
+    _parsers.pop(layout.name, None)
+
+def get_parser(name: str) -> "StatementParser":
+    if name not in _parsers:
+        if name not in _layouts:
+            raise ValueError(f"Unknown statement layout: {name}")
+        _parsers[name] = StatementParser(_layouts[name])
+    return _parsers[name]
+
+def detect_layout(text: str) -> str:
+    """Name of the first registered layout whose detect_pattern matches, else 'default'"""
+    for name, layout in _layouts.items():
+        if layout.detect_pattern and get_parser(name).detect.search(text):
+            return name
+    return "default"
+
+@lru_cache(maxsize=4096)
+def parse_date(date_str: str, date_formats: tuple[str, ...]) -> Optional[date]:
+    # Statements repeat the same few dozen dates, so strptime runs once per distinct date
+    for date_format in date_formats:
+        try:
+            return datetime.strptime(date_str, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+class StatementParser:
+    def __init__(self, layout: StatementLayout, categories: KeywordMatcher = STATEMENT_CATEGORIES):
+        self.layout = layout
+        self.pattern = re.compile(layout.line_pattern)
+        self.detect = re.compile(layout.detect_pattern) if layout.detect_pattern else None
+        self.categories = categories
+
+    def iter_parse(self, text: str) -> Iterator[dict]:
+        date_formats = self.layout.date_formats
+        classify = self.categories.classify
+        for match in self.pattern.finditer(text):
+            transaction_date = parse_date(match["date"], date_formats)
+            if transaction_date is None:
+                continue
+
+            amount = Decimal(match["amount"].replace('$', '').replace(',', ''))
+            description = match["description"]
+            yield {
+                "amount": abs(amount),
+                "type": "expense" if amount < 0 else "income",
+                "category": classify(description),
+                "description": description.strip(),
+                "date": transaction_date
+            }
+
+    def parse(self, text: str) -> list[dict]:
+        return list(self.iter_parse(text))
+
+register_layout(StatementLayout(
+    name="default",
+    line_pattern=r'(?P<date>\d{1,2}/\d{1,2}/\d{2,4})\s+(?P<description>.*?)\s+(?P<amount>-?\$?\d+\.\d{2})',
+    date_formats=('%m/%d/%Y',)
+))
+
+register_layout(StatementLayout(
+    name="iso",
+    line_pattern=r'(?m)^(?P<date>\d{4}-\d{2}-\d{2})\s+(?P<description>.*?)\s+(?P<amount>-?\$?[\d,]*\d\.\d{2})\s*$',
+    date_formats=('%Y-%m-%d',)
+))
@@ -0,0 +1,36 @@
+import csv
+import io
+from typing import Iterable, Iterator
+from app.core.serialization import dumps
+
+# Readable by POST /transactions/bulk as is; id and created_at are ignored there
+CSV_COLUMNS = ("id", "date", "type", "category", "description", "amount", "created_at")
+
+def iter_csv(chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+    """Encode chunks of transaction items as CSV, one block of bytes per chunk, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode("utf-8")
+    for items in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            (
+                item["id"], item["date"].isoformat(), item["type"], item["category"],
+                item["description"] or "", item["amount"], item["created_at"].isoformat()
+            )
+            for item in items
+        )
+        yield buffer.getvalue().encode("utf-8")
+
+def iter_ndjson(chunks: Iterable[list[dict]]) -> Iterator[bytes]:
+    """Encode chunks of transaction items as NDJSON, one block of lines per chunk"""
+    for items in chunks:
+        yield b"".join(dumps(item) + b"\n" for item in items)
+
+# format -> (media type, encoder)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", iter_csv),
+    "ndjson": ("application/x-ndjson", iter_ndjson),
+}
@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+import hashlib
+import os
+import uuid
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from app.core.config import settings
+from app.core.metrics import ingestion_stage_seconds
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES"""
+
+# Allowance for the multipart boundaries and part headers around a file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class UploadLimitMiddleware:
+    """ASGI middleware capping the request body of upload routes.
+
+    Starlette parses a multipart form, spooling every file to a temporary
+    file, before the route runs, so a limit checked in the route comes too
+    late to stop a huge upload. This rejects a request whose Content-Length
+    is over the limit without reading it, and aborts a body without one as
+    soon as it grows past the limit. limits maps a path to a function
+    returning its limit in bytes, read per request so settings changes apply.
+    """
+
+    def __init__(self, app, limits: dict[str, Callable[[], int]]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = limit()
+        detail = f"Request body exceeds the {max_bytes} byte limit"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Re-raised by FastAPI's body parsing and answered as a 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+@dataclass
+class StoredUpload:
+    path: str
+    extension: str
+    size: int
+    sha256: str
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+async def save_upload(
+    file: UploadFile,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """Stream an upload to disk chunk by chunk, hashing it on the way.
+
+    Peak memory is one chunk regardless of the file size. The form has
+    already been parsed when a route calls this, so the request body is
+    capped before that by UploadLimitMiddleware; the limit here holds the
+    file itself to max_bytes. A partially written file is removed on any
+    failure. Files are stored under their SHA-256, so identical uploads
+    share one file on disk.
+    """
+    directory = directory or settings.UPLOAD_DIR
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    os.makedirs(directory, exist_ok=True)
+    file_extension = file.filename.split(".")[-1].lower()
+    partial_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with ingestion_stage_seconds.labels("upload_write").time(), open(partial_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit")
+                await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return _store(partial_path, directory, file_extension, size, digest)
+
+def save_file_object(
+    fileobj: BinaryIO,
+    filename: str,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """save_upload for a blocking file object, e.g. a member of a ZIP archive.
+
+    The size limit is checked against the bytes actually read, never a
+    size the archive declares.
+    """
+    directory = directory or settings.UPLOAD_DIR
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    os.makedirs(directory, exist_ok=True)
+    file_extension = filename.split(".")[-1].lower()
+    partial_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with ingestion_stage_seconds.labels("upload_write").time(), open(partial_path, "wb") as buffer:
+            for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes} byte upload limit")
+                _write_chunk(buffer, digest, chunk)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return _store(partial_path, directory, file_extension, size, digest)
+
+def _store(partial_path: str, directory: str, file_extension: str, size: int, digest) -> StoredUpload:
+    sha256 = digest.hexdigest()
+    file_path = os.path.join(directory, f"{sha256}.{file_extension}")
+    if os.path.exists(file_path):
+        os.remove(partial_path)
+    else:
+        os.replace(partial_path, file_path)
+
+    return StoredUpload(path=file_path, extension=file_extension, size=size, sha256=sha256)
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""Latency and amount-extraction accuracy of OCR per preprocessing configuration.
+
+    python -m benchmarks.bench_ocr_preprocess [--repeat 1] [--json report.json] [paths ...]
+
+Images default to the labelled images in --ground-truth
+(benchmarks/ocr_ground_truth.json), which maps an image path to the total
+printed on the receipt, as read by a person. Other images are scored when
+their content matches a labelled one, and otherwise only timed.
+"""
+import argparse
+import json
+import os
+import statistics
+from decimal import Decimal
+import time
+from typing import Optional
+from app.utils.image_preprocess import PreprocessConfig, load_for_ocr
+from app.utils.ocr_engine import import_pytesseract
+from app.utils.ocr_parser import OCR_AVAILABLE, file_sha256, parse_receipt_text
+
+CONFIGS = {
+    "raw": None,
+    "grayscale": PreprocessConfig(target_dpi=None, binarize=False, crop=False),
+    "downscale": PreprocessConfig(binarize=False, crop=False),
+    "binarize": PreprocessConfig(crop=False),
+    "full": PreprocessConfig(),
+}
+
+GROUND_TRUTH_PATH = os.path.join(os.path.dirname(__file__), "ocr_ground_truth.json")
+
+def load_ground_truth(path: str) -> dict[str, Decimal]:
+    with open(path) as f:
+        return json.load(f, parse_float=Decimal)
+
+def expected_amount(text: Optional[str]) -> Optional[Decimal]:
+    parsed = parse_receipt_text(text or "")
+    return parsed["amount"] if parsed else None
+
+def reference_amounts(ground_truth: dict[str, Decimal]) -> dict[str, Decimal]:
+    """Expected amount per image content hash, so copies of a labelled image share its label"""
+    return {file_sha256(path): amount for path, amount in ground_truth.items() if os.path.exists(path)}
+
+def tesseract_available() -> bool:
+    if not OCR_AVAILABLE:
+        return False
+    pytesseract = import_pytesseract()
+    try:
+        pytesseract.get_tesseract_version()
+    except pytesseract.TesseractNotFoundError:
+        return False
+    return True
+
+def run(images: list[str], references: dict[str, Decimal], repeat: int, ocr: bool) -> dict:
+    if ocr:
+        pytesseract = import_pytesseract()
+    report = {}
+    for name, config in CONFIGS.items():
+        preprocess_ms, ocr_ms = [], []
+        scored = correct = 0
+        for path in images:
+            expected = references.get(file_sha256(path))
+            for _ in range(repeat):
+                started = time.perf_counter()
+                image = load_for_ocr(path, config)
+                image.load()
+                preprocess_ms.append((time.perf_counter() - started) * 1000)
+                if not ocr:
+                    continue
+                started = time.perf_counter()
+                text = pytesseract.image_to_string(image)
+                ocr_ms.append((time.perf_counter() - started) * 1000)
+                if expected is not None:
+                    scored += 1
+                    correct += expected_amount(text) == expected
+        report[name] = {
+            "images": len(images),
+            "preprocess_ms_mean": round(statistics.fmean(preprocess_ms), 2) if preprocess_ms else None,
+            "ocr_ms_mean": round(statistics.fmean(ocr_ms), 2) if ocr_ms else None,
+            "total_ms_p50": round(statistics.median(
+                [p + o for p, o in zip(preprocess_ms, ocr_ms)] or preprocess_ms
+            ), 2) if preprocess_ms else None,
+            "scored": scored,
+            "amount_accuracy": round(correct / scored, 3) if scored else None,
+        }
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_PATH)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    ground_truth = load_ground_truth(args.ground_truth)
+    images = args.paths or sorted(ground_truth)
+    ocr = tesseract_available()
+    if not ocr:
+        print("tesseract not found: reporting preprocessing time only")
+    report = run(images, reference_amounts(ground_truth), args.repeat, ocr)
+
+    print(f"{'config':<10} {'preprocess ms':>14} {'ocr ms':>10} {'p50 total':>10} {'accuracy':>10}")
+    for name, row in report.items():
+        accuracy = "n/a" if row["amount_accuracy"] is None else f"{row['amount_accuracy']:.0%} of {row['scored']}"
+        print(f"{name:<10} {row['preprocess_ms_mean'] or 0:>14.1f} {row['ocr_ms_mean'] or 0:>10.1f} "
+              f"{row['total_ms_p50'] or 0:>10.1f} {accuracy:>10}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Requests/sec of the transaction read endpoints: row-tuple + orjson path vs the Pydantic path.
+
+    python -m benchmarks.bench_serialization [--days 365] [--per-day 20] [--duration 5]
+
+Seeds one user with --per-day transactions on each of --days days in a
+temporary SQLite database, then calls each endpoint back to back in-process
+(ASGI, no network) for --duration seconds. "legacy" routes rebuild the
+previous response path: ORM rows validated through from_attributes models,
+re-validated against response_model and encoded by FastAPI's stdlib JSON
+encoder. The response cache is off so every request does the full work.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+import httpx
+from fastapi import Depends, FastAPI, APIRouter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import settings
+from app.db.migrations import run_migrations
+from app.db.session import build_engine, get_db
+from app.models.transaction import Transaction, TransactionType
+from app.models.transaction_rollup import TransactionRollup
+from app.models.user import User
+from app.routers import transactions
+from app.schemas.transaction import DateSummary, PaginatedTransactions
+from app.services.auth_service import get_current_user
+from app.services.transaction_service import TransactionService, encode_cursor, rollup_filters, transaction_filters
+
+CATEGORIES = ("Food", "Transport", "Utilities", "Shopping", "Other")
+
+legacy_router = APIRouter(prefix="/legacy")
+
+@legacy_router.get("/transactions/", response_model=PaginatedTransactions)
+def legacy_transactions(
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    filters = transaction_filters(current_user.id, None, None, None, None)
+    total = db.scalar(select(func.count()).select_from(Transaction).where(*filters))
+    rows = db.scalars(
+        select(Transaction).where(*filters).order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = encode_cursor(rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+    return PaginatedTransactions(
+        items=rows[:limit], total=total, page=1, pages=(total + limit - 1) // limit, next_cursor=next_cursor
+    )
+
+@legacy_router.get("/transactions/summary/date", response_model=list[DateSummary])
+def legacy_date_summary(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    results = db.execute(
+        select(TransactionRollup.date, func.sum(TransactionRollup.total_amount).label("total_amount"))
+        .where(*rollup_filters(current_user.id, None, None, None))
+        .group_by(TransactionRollup.date).order_by(TransactionRollup.date)
+    ).all()
+    return [DateSummary(date=row.date, total_amount=row.total_amount) for row in results]
+
+def seed(SessionLocal: sessionmaker, days: int, per_day: int) -> User:
+    with SessionLocal() as db:
+        user = User(username="benchuser", password_hash="unused")
+        db.add(user)
+        db.commit()
+        first_day = date(2024, 1, 1)
+        rows = (
+            {
+                "user_id": user.id,
+                "amount": Decimal(1 + (index * 37) % 50000) / 100,
+                "type": TransactionType.EXPENSE if index % 5 else TransactionType.INCOME,
+                "category": CATEGORIES[index % len(CATEGORIES)],
+                "description": f"Purchase {index}",
+                "date": first_day + timedelta(days=index % days)
+            }
+            for index in range(days * per_day)
+        )
+        TransactionService(db).bulk_insert(rows)
+        db.commit()
+        return User(id=user.id, username=user.username)
+
+async def requests_per_second(client: httpx.AsyncClient, path: str, params: dict, duration: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        response = await client.get(path, params=params)
+        response.raise_for_status()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+async def run(app: FastAPI, duration: float) -> dict[str, tuple[float, float]]:
+    cases = {
+        "page of 100": ("/transactions/", {"limit": 100}),
+        "date summary": ("/transactions/summary/date", {}),
+    }
+    report = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (path, params) in cases.items():
+            fast, legacy = await client.get(path, params=params), await client.get(f"/legacy{path}", params=params)
+            if fast.json() != legacy.json():
+                raise SystemExit(f"{name}: responses differ")
+            report[name] = (
+                await requests_per_second(client, f"/legacy{path}", params, duration),
+                await requests_per_second(client, path, params, duration),
+            )
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    settings.RESPONSE_CACHE_ENABLED = False
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        run_migrations(engine)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+        user = seed(SessionLocal, args.days, args.per_day)
+
+        def get_bench_db():
+            with SessionLocal() as db:
+                yield db
+
+        app = FastAPI()
+        app.include_router(transactions.router)
+        app.include_router(legacy_router)
+        app.dependency_overrides[get_db] = get_bench_db
+        app.dependency_overrides[get_current_user] = lambda: user
+
+        report = asyncio.run(run(app, args.duration))
+        engine.dispose()
+
+    print(f"{args.days * args.per_day} transactions over {args.days} days")
+    print(f"{'endpoint':<14} {'legacy req/s':>13} {'fast req/s':>11} {'speedup':>8}")
+    for name, (legacy, fast) in report.items():
+        print(f"{name:<14} {legacy:>13.1f} {fast:>11.1f} {fast / legacy:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Micro-benchmarks of the TransactionService methods and the parsers in app/utils.
+
+    python -m benchmarks.bench_services [--rows 100000] [--users 10] [--repeat 50] [--json out.json]
+
+Runs against a database from benchmarks.seed (same arguments, same data) as
+the first seeded user, who owns rows / users transactions. Each benchmark
+is warmed up once and then timed --repeat times; the JSON report lines up
+with reports of other commits via python -m benchmarks.compare. Writes run
+inside a transaction that is rolled back, so the seeded database is
+reused unchanged.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Callable
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.core.serialization import dumps
+from app.db.session import build_engine
+from app.models.user import User
+from app.schemas.transaction import TransactionCreate
+from app.services.transaction_service import TransactionService
+from app.utils.bulk_import import iter_csv_records, iter_ndjson_records
+from app.utils.ocr_parser import RECEIPT_CATEGORIES, parse_receipt_text
+from app.utils.pdf_parser import parse_transactions_from_text
+from app.utils.transaction_export import iter_csv, iter_ndjson
+from benchmarks.bench_statement_parser import synthetic_statement
+from benchmarks.report import summarize, write_report
+from benchmarks.seed import add_seed_arguments, seeded_url, synthetic_rows, username
+
+RECEIPT_TEXT = """CENTRAL CAFE & RESTAURANT
+123 Main Street
+03/14/2024 12:41
+2 x Cappuccino          $7.80
+1 x Club sandwich       $11.50
+1 x Caesar salad        $9.95
+Subtotal               $29.25
+Tax                     $2.34
+TOTAL                  $31.59
+Thank you for dining with us!"""
+
+def timed(func: Callable[[], object], repeat: int) -> dict:
+    func()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+def enable_sqlite_savepoints(engine: Engine) -> None:
+    # pysqlite opens and commits transactions on its own, which breaks
+    # SAVEPOINT rollback; SQLAlchemy's recipe: let it autocommit and emit
+    # BEGIN ourselves
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+def service_benchmarks(db: Session, user_id: int) -> dict[str, Callable[[], object]]:
+    service = TransactionService(db)
+    first_page = service.get_transactions(user_id, None, None, None, None, 1, 100, include_total=False)
+    year = (date(2024, 1, 1), date(2024, 12, 31))
+    return {
+        "get_transactions page 1": lambda: service.get_transactions(user_id, None, None, None, None, 1, 20),
+        "get_transactions page 50": lambda: service.get_transactions(user_id, None, None, None, None, 50, 20),
+        "get_transactions cursor": lambda: service.get_transactions(
+            user_id, None, None, None, None, 1, 100, cursor=first_page["next_cursor"], include_total=False
+        ),
+        "get_transactions filtered": lambda: service.get_transactions(
+            user_id, *year, "expense", "Food", 1, 20
+        ),
+        "get_category_summary": lambda: service.get_category_summary(user_id, None, None, None),
+        "get_date_summary year": lambda: service.get_date_summary(user_id, *year, None),
+        "get_timeseries month": lambda: service.get_timeseries(user_id, "month", None, None, None),
+        "get_timeseries week by category": lambda: service.get_timeseries(user_id, "week", None, None, None, True),
+        "export_transactions year": lambda: sum(
+            len(chunk) for chunk in service.export_transactions(user_id, *year, None, None)
+        ),
+    }
+
+def write_benchmarks(db: Session, user_id: int) -> dict[str, Callable[[], object]]:
+    service = TransactionService(db)
+    transaction = TransactionCreate(amount=Decimal("12.50"), type="expense", category="Food", date=date(2024, 6, 1))
+    rows = list(synthetic_rows([user_id], 1000, 365, seed=1))
+    return {
+        "create_transaction": lambda: service.create_transaction(user_id, transaction),
+        "bulk_insert 1000 rows": lambda: (service.bulk_insert(rows), db.commit()),
+    }
+
+async def _drain(records) -> int:
+    return sum([1 async for _ in records])
+
+async def _stream(body: bytes):
+    for start in range(0, len(body), 65536):
+        yield body[start:start + 65536]
+
+def parser_benchmarks() -> dict[str, Callable[[], object]]:
+    statement = synthetic_statement(1000)
+    items = [
+        {**row, "id": index, "amount": float(row["amount"]), "type": row["type"].value, "created_at": row["date"]}
+        for index, row in enumerate(synthetic_rows([1], 10_000, 365, seed=2))
+    ]
+    ndjson = "".join(json.dumps({**item, "date": item["date"].isoformat(), "created_at": None}) + "\n" for item in items).encode()
+    csv_body = b"".join(iter_csv([items]))
+    return {
+        "parse statement 1000 lines": lambda: parse_transactions_from_text(statement),
+        "parse receipt text": lambda: parse_receipt_text(RECEIPT_TEXT),
+        "classify receipt category": lambda: RECEIPT_CATEGORIES.classify(RECEIPT_TEXT),
+        "bulk import ndjson 10k rows": lambda: asyncio.run(_drain(iter_ndjson_records(_stream(ndjson)))),
+        "bulk import csv 10k rows": lambda: asyncio.run(_drain(iter_csv_records(_stream(csv_body)))),
+        "export csv 10k rows": lambda: sum(len(block) for block in iter_csv([items])),
+        "export ndjson 10k rows": lambda: sum(len(block) for block in iter_ndjson([items])),
+        "serialize 100-item page": lambda: dumps({"items": items[:100], "total": len(items)}),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_seed_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    url = seeded_url(args.rows, args.users, args.days, args.seed, args.db)
+    engine = build_engine(url)
+    enable_sqlite_savepoints(engine)
+    results = {}
+    with engine.connect() as connection:
+        outer = connection.begin()
+        # Commits inside the services only release savepoints; everything is
+        # rolled back with outer
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        user_id = db.scalar(select(User.id).where(User.username == username(0)))
+        for name, func in service_benchmarks(db, user_id).items():
+            results[name] = timed(func, args.repeat)
+        for name, func in write_benchmarks(db, user_id).items():
+            results[name] = timed(func, args.repeat)
+        db.close()
+        outer.rollback()
+    engine.dispose()
+    for name, func in parser_benchmarks().items():
+        results[name] = timed(func, args.repeat)
+
+    meta = {"benchmark": "bench_services", "rows": args.rows, "users": args.users, "days": args.days,
+            "seed": args.seed, "repeat": args.repeat}
+    write_report(args.json_path, meta, results)
+
+if __name__ == "__main__":
+    main()
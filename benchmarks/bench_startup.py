@@ -0,0 +1,75 @@
+"""Cold-start time of the app: interpreter, import of app.main, startup hooks and first request.
+
+    python -m benchmarks.bench_startup [--repeat 10] [--no-migrate] [--json out.json]
+
+Every run is a fresh interpreter against the same temporary database, so
+the numbers include what an autoscaled container pays before it can serve
+traffic. The first run creates the schema and is not counted. Also lists
+the heavy optional modules (imaging, PDF, OCR) that were loaded by the time
+the first request was answered; a worker serving /transactions should show
+none.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.report import summarize, write_report
+
+HEAVY_MODULES = ("PIL", "pdfplumber", "pdfminer", "pytesseract", "tesserocr")
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+client_ready = time.perf_counter()
+with client:
+    started_up = time.perf_counter()
+    client.get("/health").raise_for_status()
+    answered = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "startup": started_up - client_ready,
+    "first request": answered - started_up,
+    "modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def run_once(env: dict) -> dict:
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+    timings = json.loads(completed.stdout.splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-migrate", action="store_true", help="Start with AUTO_MIGRATE=false")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(directory, 'startup.db')}",
+            "UPLOAD_DIR": os.path.join(directory, "uploads"),
+        }
+        # Creates the schema; later runs start against an up-to-date database
+        run_once(env)
+        env["AUTO_MIGRATE"] = "false" if args.no_migrate else "true"
+        runs = [run_once(env) for _ in range(args.repeat)]
+
+    phases = ("process", "import", "startup", "first request")
+    results = {phase: summarize([run[phase] for run in runs], sum(run["process"] for run in runs)) for phase in phases}
+    meta = {"benchmark": "bench_startup", "repeat": args.repeat, "auto_migrate": not args.no_migrate}
+    write_report(args.json_path, meta, results)
+    print(f"heavy modules loaded: {', '.join(runs[-1]['modules']) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the statement-line parser engine against the original implementation.
+
+    python -m benchmarks.bench_statement_parser [--lines 100000] [--repeat 3]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from app.utils.pdf_parser import parse_transactions_from_text
+
+DESCRIPTIONS = [
+    "Coffee at Central Cafe", "Whole Foods groceries", "Shell gas station", "Uber trip downtown",
+    "City electricity bill", "Monthly salary", "Internet service", "Bookstore purchase",
+    "Taxi to airport", "Phone bill payment", "Italian restaurant", "Client deposit",
+]
+
+def legacy_parse_transactions_from_text(text: str) -> list[dict]:
+    # Verbatim copy of the parser this engine replaced
+    transactions = []
+    transaction_pattern = r'(\d{1,2}/\d{1,2}/\d{2,4})\s+(.*?)\s+(-?\$?\d+\.\d{2})'
+    matches = re.findall(transaction_pattern, text)
+    for match in matches:
+        date_str, description, amount_str = match
+        try:
+            transaction_date = datetime.strptime(date_str, '%m/%d/%Y').date()
+            amount = float(amount_str.replace('$', '').replace(',', ''))
+            transaction_type = "expense" if amount < 0 else "income"
+            amount = abs(amount)
+            category = "Other"
+            description_lower = description.lower()
+            if any(word in description_lower for word in ['restaurant', 'cafe', 'food', 'groceries']):
+                category = "Food"
+            elif any(word in description_lower for word in ['gas', 'fuel', 'taxi', 'uber', 'transport']):
+                category = "Transport"
+            elif any(word in description_lower for word in ['electricity', 'water', 'gas', 'internet', 'phone']):
+                category = "Utilities"
+            elif any(word in description_lower for word in ['salary', 'payment', 'deposit']):
+                category = "Income"
+            transactions.append({
+                "amount": amount,
+                "type": transaction_type,
+                "category": category,
+                "description": description.strip(),
+                "date": transaction_date
+            })
+        except Exception as e:
+            continue
+    return transactions
+
+def synthetic_statement(lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = []
+    for _ in range(lines):
+        day = start + timedelta(days=rng.randrange(365))
+        amount = rng.uniform(1, 5000) * rng.choice((1, -1))
+        rows.append(f"{day:%m/%d/%Y} {rng.choice(DESCRIPTIONS)} {'-' if amount < 0 else ''}${abs(amount):.2f}")
+    return "\n".join(rows)
+
+def best_of(func, text: str, repeat: int) -> tuple[float, list[dict]]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = synthetic_statement(args.lines)
+    legacy_seconds, legacy = best_of(legacy_parse_transactions_from_text, text, args.repeat)
+    engine_seconds, engine = best_of(parse_transactions_from_text, text, args.repeat)
+    # The engine reads amounts as exact decimals, the legacy parser as floats
+    if [{**item, "amount": float(item["amount"])} for item in engine] != legacy:
+        raise SystemExit("engine output differs from the legacy parser")
+
+    print(f"lines:   {args.lines}")
+    print(f"legacy:  {legacy_seconds:.3f}s")
+    print(f"engine:  {engine_seconds:.3f}s")
+    print(f"speedup: {legacy_seconds / engine_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
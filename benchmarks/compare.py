@@ -0,0 +1,60 @@
+"""Compare two benchmark reports and fail on regressions.
+
+    python -m benchmarks.compare BASE.json HEAD.json [--metric p50_ms] [--threshold 0.15]
+
+BASE and HEAD are --json reports of the same benchmark (bench_services or
+load_asgi), typically from the deploy branch and the candidate commit.
+Prints the change of --metric per benchmark and exits with status 1 when
+any benchmark got slower by more than --threshold (0.15 = 15%), so a CI job
+can stop the deploy.
+"""
+import argparse
+import json
+import sys
+
+# Latencies below this are dominated by timer noise; never flag them
+NOISE_FLOOR_MS = 0.1
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(base: dict, head: dict, metric: str, threshold: float) -> list[str]:
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f"{'benchmark':<34} {'base':>10} {'head':>10} {'change':>8}")
+    for name, head_stats in head["results"].items():
+        base_stats = base["results"].get(name)
+        if base_stats is None:
+            print(f"{name:<34} {'-':>10} {head_stats[metric]:>10.3f} {'new':>8}")
+            continue
+        before, after = base_stats[metric], head_stats[metric]
+        change = (after - before) / before if before else 0.0
+        regressed = change > threshold and after > NOISE_FLOOR_MS
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<34} {before:>10.3f} {after:>10.3f} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    base, head = load(args.base), load(args.head)
+    settings = ("benchmark", "rows", "users", "days", "seed", "clients", "duration", "response_cache")
+    differing = [key for key in settings if base["meta"].get(key) != head["meta"].get(key)]
+    if differing:
+        print(f"warning: reports were run with different {', '.join(differing)}; numbers are not comparable")
+    print(f"base {base['meta'].get('commit')}  head {head['meta'].get('commit')}  metric {args.metric}")
+
+    regressions = compare(base, head, args.metric, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
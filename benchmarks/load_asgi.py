@@ -0,0 +1,164 @@
+"""In-process load test of the login, listing, summary and upload endpoints.
+
+    python -m benchmarks.load_asgi [--rows 100000] [--clients 20] [--duration 20] [--json out.json]
+
+Copies a database from benchmarks.seed into a temporary directory, points
+the app at it and drives it through httpx's ASGI transport: no server and
+no sockets, so the numbers are the application's own. --clients virtual
+users log in as the seeded users, then each loops over the fixed weighted
+MIX of requests, choosing parameters from an RNG seeded per client, so two
+runs issue the same request sequence. Reports p50/p95/p99 and throughput
+per operation and overall. The response cache is off unless
+--response-cache is given, so reads measure the database path.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy.engine import make_url
+import httpx
+from benchmarks.report import summarize, write_report
+from benchmarks.seed import PASSWORD, add_seed_arguments, seeded_url, username
+
+# operation -> relative weight
+MIX = {
+    "list page": 8,
+    "list cursor": 2,
+    "summary category": 3,
+    "summary date": 3,
+    "summary timeseries": 2,
+    "login": 1,
+    "upload pdf": 1,
+}
+UPLOAD_FILE = "data/transaction.pdf"
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, index: int, users: int, seed: int):
+        self.client = client
+        self.username = username(index % users)
+        self.rng = random.Random(seed * 1_000_003 + index)
+        self.headers = {}
+        self.cursor = None
+
+    async def login(self) -> httpx.Response:
+        response = await self.client.post("/auth/login", data={"username": self.username, "password": PASSWORD})
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def request(self, operation: str, upload: bytes) -> httpx.Response:
+        rng = self.rng
+        year = rng.choice((2022, 2023, 2024))
+        if operation == "login":
+            return await self.login()
+        if operation == "list page":
+            return await self.client.get("/transactions/", headers=self.headers,
+                params={"limit": 20, "page": rng.randint(1, 50)})
+        if operation == "list cursor":
+            params = {"limit": 100, "cursor": self.cursor} if self.cursor else {"limit": 100, "include_total": False}
+            response = await self.client.get("/transactions/", headers=self.headers, params=params)
+            self.cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+            return response
+        if operation == "summary category":
+            return await self.client.get("/transactions/summary/category", headers=self.headers,
+                params={"start_date": f"{year}-01-01", "end_date": f"{year}-12-31"})
+        if operation == "summary date":
+            month = rng.randint(1, 12)
+            return await self.client.get("/transactions/summary/date", headers=self.headers,
+                params={"start_date": f"{year}-{month:02d}-01", "end_date": f"{year}-{month:02d}-28"})
+        if operation == "summary timeseries":
+            return await self.client.get("/transactions/summary/timeseries", headers=self.headers,
+                params={"bucket": rng.choice(("week", "month")), "start_date": f"{year}-01-01"})
+        if operation == "upload pdf":
+            return await self.client.post("/receipts/upload-pdf", headers=self.headers,
+                files={"file": ("statement.pdf", upload, "application/pdf")})
+        raise ValueError(f"Unknown operation: {operation}")
+
+async def run_load(args: argparse.Namespace) -> dict:
+    from app.main import app
+    from app.services.job_service import shutdown_executor
+
+    with open(UPLOAD_FILE, "rb") as f:
+        upload = f.read()
+    operations, weights = list(MIX), list(MIX.values())
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=120) as client:
+        virtual_users = [VirtualUser(client, index, args.users, args.seed) for index in range(args.clients)]
+        # bcrypt makes logging in slow by design; the first login happens
+        # before the clock starts, later ones are part of the mix
+        for response in await asyncio.gather(*(user.login() for user in virtual_users)):
+            response.raise_for_status()
+
+        deadline = time.perf_counter() + args.duration
+
+        async def run_user(user: VirtualUser) -> None:
+            while time.perf_counter() < deadline:
+                operation = user.rng.choices(operations, weights)[0]
+                started = time.perf_counter()
+                try:
+                    ok = (await user.request(operation, upload)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies[operation].append(time.perf_counter() - started)
+                else:
+                    errors[operation] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_user(user) for user in virtual_users))
+        elapsed = time.perf_counter() - started
+    shutdown_executor()
+
+    results = {
+        operation: summarize(latencies[operation], elapsed, errors[operation])
+        for operation in operations
+    }
+    results["all"] = summarize(
+        [value for values in latencies.values() for value in values], elapsed, sum(errors.values())
+    )
+    return results
+
+def load_in_child(args: argparse.Namespace) -> dict:
+    return asyncio.run(run_load(args))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_seed_arguments(parser)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--response-cache", action="store_true", help="Keep the response cache on")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    seeded_path = make_url(seeded_url(args.rows, args.users, args.days, args.seed, args.db)).database
+    with tempfile.TemporaryDirectory() as directory:
+        # Uploads and logins write to the database; keep the seeded one pristine
+        database = os.path.join(directory, "load.db")
+        shutil.copyfile(seeded_path, database)
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{database}",
+            "UPLOAD_DIR": os.path.join(directory, "uploads"),
+            "RESPONSE_CACHE_ENABLED": "true" if args.response_cache else "false",
+        })
+        # This process imported the app (through benchmarks.seed) with the
+        # default settings; a spawned interpreter imports it afresh with the
+        # environment above
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = executor.submit(load_in_child, args).result()
+
+    meta = {"benchmark": "load_asgi", "rows": args.rows, "users": args.users, "days": args.days,
+            "seed": args.seed, "clients": args.clients, "duration": args.duration,
+            "response_cache": args.response_cache, "mix": MIX}
+    write_report(args.json_path, meta, results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Throughput of the transaction endpoints on the sync and the async (ASYNC_DB) path.
+
+    python -m benchmarks.load_transactions [--clients 500] [--duration 15] [--rows 5000] [--workers 1]
+
+Each mode starts its own server (python -m app.cli serve with --workers
+processes) on a fresh SQLite database, seeds one user with --rows
+transactions through /transactions/bulk, then keeps --clients concurrent
+clients cycling through the list and summary endpoints for --duration
+seconds. Run it with --workers 1 and --workers <cores> to see how
+throughput scales with worker processes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+ENDPOINTS = [
+    ("/transactions/", {"limit": 20}),
+    ("/transactions/summary/category", {}),
+    ("/transactions/summary/date", {}),
+]
+
+async def wait_until_up(base_url: str) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(100):
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise SystemExit(f"server at {base_url} did not start")
+
+async def seed(base_url: str, rows: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await client.post("/auth/register", json={"username": "loaduser", "password": "loadpass"})
+        token = (await client.post("/auth/login", data={"username": "loaduser", "password": "loadpass"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        body = "\n".join(
+            json.dumps({
+                "amount": 1 + index % 500,
+                "type": "expense" if index % 4 else "income",
+                "category": ("Food", "Transport", "Utilities", "Other")[index % 4],
+                "date": f"2024-{1 + index % 12:02d}-{1 + index % 28:02d}"
+            })
+            for index in range(rows)
+        )
+        response = await client.post("/transactions/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content=body)
+        response.raise_for_status()
+        return headers
+
+async def load(base_url: str, headers: dict, clients: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        async def run_client(offset: int) -> None:
+            nonlocal errors
+            request_number = offset
+            while time.perf_counter() < deadline:
+                path, params = ENDPOINTS[request_number % len(ENDPOINTS)]
+                request_number += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client(offset) for offset in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    def percentile(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+def run_mode(async_db: bool, port: int, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "ASYNC_DB": "true" if async_db else "false",
+            "DATABASE_URL": f"sqlite:///{os.path.join(directory, 'load.db')}",
+            "UPLOAD_DIR": os.path.join(directory, "uploads"),
+            # Several workers share their state through this file
+            "SHARED_STATE_URL": os.path.join(directory, "state.db"),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.cli", "serve", "--port", str(port), "--workers", str(args.workers)],
+            env=env,
+            # Failed requests are counted client-side; keep pool-timeout
+            # tracebacks out of the report
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_until_up(base_url))
+            headers = asyncio.run(seed(base_url, args.rows))
+            return asyncio.run(load(base_url, headers, args.clients, args.duration))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Server processes")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    report = {
+        "sync": run_mode(False, args.port, args),
+        "async": run_mode(True, args.port + 1, args),
+    }
+    for mode, row in report.items():
+        print(f"{mode:<6} {row['requests_per_second']:>8} req/s  p50 {row['p50_ms']}ms  "
+              f"p95 {row['p95_ms']}ms  p99 {row['p99_ms']}ms  errors {row['errors']}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
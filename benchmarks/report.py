@@ -0,0 +1,61 @@
+"""Shared result format of the benchmark suite (bench_services, load_asgi, compare).
+
+Every report is a JSON document {"meta": {...}, "results": {name: stats}},
+where stats always carry count, p50_ms, p95_ms, p99_ms and
+throughput_per_s, so reports from different commits line up key by key.
+"""
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+from typing import Optional, Sequence
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> dict:
+    """Stats for per-operation latencies in seconds, measured over elapsed wall-clock seconds"""
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3) if ordered else 0.0,
+        "throughput_per_s": round(len(ordered) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> dict:
+    return {
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "argv": sys.argv[1:],
+    }
+
+def print_table(results: dict) -> None:
+    print(f"{'benchmark':<34} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>10}")
+    for name, stats in results.items():
+        print(f"{name:<34} {stats['count']:>7} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+              f"{stats['p99_ms']:>10.3f} {stats['throughput_per_s']:>10.1f}")
+
+def write_report(path: Optional[str], meta: dict, results: dict) -> None:
+    print_table(results)
+    if path:
+        with open(path, "w") as f:
+            json.dump({"meta": {**environment(), **meta}, "results": results}, f, indent=2)
+        print(f"wrote {path}")
@@ -0,0 +1,126 @@
+"""Seed a SQLite database with synthetic users and transactions for benchmarking.
+
+    python -m benchmarks.seed --rows 1000000 [--users 10] [--days 1095] [--seed 0] [--db PATH]
+
+The data depends only on the arguments: the same --rows/--users/--days/--seed
+always produce the same transactions, so timings from different commits
+are measured against identical databases. Every user's password is
+benchpass. A database already seeded with the same arguments is reused.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from typing import Iterator, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.security import get_password_hash
+from app.db.migrations import run_migrations
+from app.db.session import build_engine
+from app.db.types import from_cents
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services.rollup_service import RollupService
+
+PASSWORD = "benchpass"
+LAST_DAY = date(2024, 12, 31)
+# (category, type, typical amount in cents); picked with a skew towards the first
+CATEGORIES = [
+    ("Food", TransactionType.EXPENSE, 2500),
+    ("Transport", TransactionType.EXPENSE, 1800),
+    ("Shopping", TransactionType.EXPENSE, 6000),
+    ("Utilities", TransactionType.EXPENSE, 9000),
+    ("Entertainment", TransactionType.EXPENSE, 4000),
+    ("Other", TransactionType.EXPENSE, 3000),
+    ("Salary", TransactionType.INCOME, 350000),
+    ("Refund", TransactionType.INCOME, 2000),
+]
+CATEGORY_WEIGHTS = [30, 15, 12, 6, 8, 10, 2, 3]
+DESCRIPTIONS = ["Card payment", "Online order", "Standing order", "Cash", None]
+INSERT_BATCH = 10_000
+
+def username(index: int) -> str:
+    return f"benchuser{index}"
+
+def default_path(rows: int, users: int, days: int, seed: int) -> str:
+    directory = os.path.join(tempfile.gettempdir(), "finance-assistant-bench")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"seed-r{rows}-u{users}-d{days}-s{seed}.db")
+
+def synthetic_rows(user_ids: list[int], rows: int, days: int, seed: int) -> Iterator[dict]:
+    """rows transactions spread evenly over the users and over the last days days up to LAST_DAY"""
+    rng = random.Random(seed)
+    first_day = LAST_DAY - timedelta(days=days - 1)
+    for index in range(rows):
+        category, type, typical = rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0]
+        yield {
+            "user_id": user_ids[index % len(user_ids)],
+            "amount": from_cents(max(1, int(rng.lognormvariate(0, 0.8) * typical))),
+            "type": type,
+            "category": category,
+            "description": rng.choice(DESCRIPTIONS),
+            "date": first_day + timedelta(days=rng.randrange(days)),
+        }
+
+def seed_database(path: str, rows: int, users: int = 10, days: int = 3 * 365, seed: int = 0) -> str:
+    """Create (or reuse) the seeded database at path and return its SQLAlchemy URL"""
+    url = f"sqlite:///{path}"
+    params = {"rows": rows, "users": users, "days": days, "seed": seed}
+    params_path = f"{path}.json"
+    if os.path.exists(path) and os.path.exists(params_path):
+        with open(params_path) as f:
+            if json.load(f) == params:
+                return url
+    for stale in (path, f"{path}-wal", f"{path}-shm", params_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    engine = build_engine(url)
+    run_migrations(engine)
+    with Session(engine) as db:
+        # bcrypt is slow on purpose; every user shares one hash
+        password_hash = get_password_hash(PASSWORD)
+        user_objects = [User(username=username(index), password_hash=password_hash) for index in range(users)]
+        db.add_all(user_objects)
+        db.commit()
+        user_ids = [user.id for user in user_objects]
+
+        # Plain executemany batches, then one GROUP BY for the rollup: much
+        # faster than maintaining the rollup batch by batch at this size
+        batch = []
+        for row in synthetic_rows(user_ids, rows, days, seed):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                db.execute(insert(Transaction), batch)
+                db.commit()
+                batch = []
+        if batch:
+            db.execute(insert(Transaction), batch)
+            db.commit()
+        RollupService(db).rebuild()
+    engine.dispose()
+
+    with open(params_path, "w") as f:
+        json.dump(params, f)
+    return url
+
+def seeded_url(rows: int, users: int, days: int, seed: int, path: Optional[str] = None) -> str:
+    return seed_database(path or default_path(rows, users, days, seed), rows, users, days, seed)
+
+def add_seed_arguments(parser: argparse.ArgumentParser, rows: int = 100_000) -> None:
+    parser.add_argument("--rows", type=int, default=rows, help="Transactions in total (10k to 10M)")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--days", type=int, default=3 * 365, help="Days of history ending 2024-12-31")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="Database file (default: a cached file in the temp directory)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+    print(seeded_url(args.rows, args.users, args.days, args.seed, args.db))
+
+if __name__ == "__main__":
+    main()
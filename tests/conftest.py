@@ -0,0 +1,23 @@
+import atexit
+import os
+import shutil
+import tempfile
+import pytest
+
+# Runs before any test module imports app.core.config: every test run gets a
+# throwaway database and upload directory instead of the tracked
+# finance_assistant.db and uploads/. Set TEST_DATABASE_URL to test against
+# another database.
+_test_dir = tempfile.mkdtemp(prefix="finance-assistant-tests-")
+atexit.register(shutil.rmtree, _test_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+)
+os.environ["UPLOAD_DIR"] = os.path.join(_test_dir, "uploads")
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    # The app migrates on startup, which module-level TestClients never run
+    from app.db.migrations import run_migrations
+    from app.db.session import engine
+    run_migrations(engine)
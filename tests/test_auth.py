@@ -20,4 +20,100 @@ def test_login_user():
     })
     assert response.status_code == 200
     assert "access_token" in response.json()
-    assert response.json()["token_type"] == "bearer"
\ No newline at end of file
+    assert response.json()["token_type"] == "bearer"
+
+def test_authenticated_requests_reuse_cached_user():
+    from sqlalchemy import event
+    from app.db.session import engine
+    from app.services.auth_service import auth_cache_stats
+
+    client.post("/auth/register", json={"username": "cacheuser", "password": "cachepass"})
+    token = client.post("/auth/login", data={
+        "username": "cacheuser",
+        "password": "cachepass"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    user_queries = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    client.get("/transactions/", headers=headers)
+    hits_before = auth_cache_stats()["tokens"]["hits"]
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for _ in range(5):
+            assert client.get("/transactions/", headers=headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert user_queries == []
+    assert auth_cache_stats()["tokens"]["hits"] == hits_before + 5
+    assert client.get("/health/cache").json()["auth"]["tokens"]["hits"] == hits_before + 5
+
+def test_invalid_token_is_rejected():
+    response = client.get("/transactions/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+def test_login_rehashes_password_with_outdated_cost():
+    import uuid
+    from passlib.context import CryptContext
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    username = f"legacyuser-{uuid.uuid4().hex[:12]}"
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+    db = SessionLocal()
+    try:
+        db.add(User(username=username, password_hash=old_context.hash("legacypass")))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/auth/login", data={
+        "username": username,
+        "password": "legacypass"
+    })
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        assert user.password_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    finally:
+        db.close()
+
+def test_login_returns_503_when_hash_queue_is_full(monkeypatch):
+    import threading
+    from app.core import security
+
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+    response = client.post("/auth/login", data={
+        "username": "testuser",
+        "password": "testpass"
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_login_is_rate_limited_after_repeated_failures(monkeypatch):
+    import uuid
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT", 3)
+    username = f"guessed-{uuid.uuid4().hex[:12]}"
+    client.post("/auth/register", json={"username": username, "password": "rightpass"})
+
+    for _ in range(3):
+        response = client.post("/auth/login", data={"username": username, "password": "wrongpass"})
+        assert response.status_code == 401
+    # Blocked before the password is checked, even when it is right
+    response = client.post("/auth/login", data={"username": username, "password": "rightpass"})
+    assert response.status_code == 429
+    assert 0 < int(response.headers["Retry-After"]) <= 60
+
+    # The failures of this client do not lock the account for anyone else
+    from app.services.auth_service import login_retry_after
+    assert login_retry_after(username, "203.0.113.7") is None
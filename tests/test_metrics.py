@@ -0,0 +1,83 @@
+from concurrent.futures import Future
+import pickle
+import re
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.metrics import Counter, Histogram, Registry, ingestion_stage_seconds
+from app.services.job_service import JobOutcome, _job_finished
+from app.services.receipt_service import extract_statement
+
+client = TestClient(app)
+
+def sample(text: str, name: str, **labels) -> float:
+    """The value of one sample in a /metrics body, 0 when it is absent"""
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") or line.startswith(f"{name} "):
+            found = dict(re.findall(r'(\w+)="([^"]*)"', line.split(" ")[0]))
+            if all(found.get(key) == value for key, value in labels.items()):
+                return float(line.rsplit(" ", 1)[1])
+    return 0
+
+def test_histogram_renders_cumulative_buckets_and_merges_drained_state():
+    registry = Registry()
+    latency = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0), registry=registry)
+    calls = Counter("calls_total", "Calls", ("route",), registry=registry)
+    for value in (0.05, 0.5, 5):
+        latency.labels('/a "b"').observe(value)
+    calls.labels("/a").inc()
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{route="/a \\"b\\"",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a \\"b\\"",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/a \\"b\\"",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a \\"b\\""} 3' in text
+
+    # What a worker process drains and ships back with a job result
+    drained = pickle.loads(pickle.dumps((latency.drain(), calls.drain())))
+    assert sample(registry.render(), "latency_seconds_count") == 0
+    latency.merge(drained[0])
+    latency.merge(drained[0])
+    calls.merge(drained[1])
+    assert 'latency_seconds_count{route="/a \\"b\\""} 6' in registry.render()
+    assert 'calls_total{route="/a"} 1' in registry.render()
+
+def test_metrics_cover_routes_queries_and_caches():
+    username = f"metrics-{uuid.uuid4().hex[:12]}"
+    client.post("/auth/register", json={"username": username, "password": "metricspass"})
+    token = client.post("/auth/login", data={"username": username, "password": "metricspass"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/receipts/jobs/123456", headers=headers)
+    client.get("/transactions/", headers=headers)
+
+    text = client.get("/metrics").text
+    # Labelled by route template, not the raw path
+    assert sample(text, "http_requests_total", method="GET", route="/receipts/jobs/{job_id}", status="404") >= 1
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route="/transactions/") >= 1
+    assert sample(text, "db_query_duration_seconds_count", operation="SELECT") >= 1
+    assert sample(text, "db_query_duration_seconds_count", operation="INSERT") >= 1
+    assert sample(text, "cache_misses_total", cache="responses") >= 1
+    assert 'cache_entries{cache="auth_tokens"}' in text
+
+    client.get("/no/such/path")
+    assert sample(client.get("/metrics").text, "http_requests_total", route="<unmatched>", status="404") >= 1
+
+def test_statement_extraction_reports_extract_and_parse_stages():
+    before = {stage: ingestion_stage_seconds.labels(stage).state()[0] for stage in ("pdf_extract", "parse")}
+    extract_statement("data/transaction.pdf")
+    for stage, counts in before.items():
+        assert sum(ingestion_stage_seconds.labels(stage).state()[0]) == sum(counts) + 1
+
+def test_worker_stage_timings_are_merged_into_the_web_process():
+    worker = Histogram("worker_stage_seconds", "A worker's copy", ("stage",), registry=None)
+    worker.labels("ocr").observe(1.5)
+    finished = Future()
+    finished.set_result(JobOutcome(metrics={"ingestion_stage": worker.drain()}))
+
+    before = client.get("/metrics").text
+    _job_finished(finished)
+    after = client.get("/metrics").text
+    assert sample(after, "ingestion_stage_duration_seconds_count", stage="ocr") == \
+        sample(before, "ingestion_stage_duration_seconds_count", stage="ocr") + 1
+    assert sample(after, "ingestion_stage_duration_seconds_sum", stage="ocr") >= 1.5
@@ -0,0 +1,79 @@
+import sys
+import threading
+import time
+import pytest
+from PIL import Image
+from app.utils.ocr_engine import OCREngine, OCRTimeout, PooledEngine, SubprocessEngine, create_engine
+
+class FakeTessAPI:
+    """Stands in for tesserocr.PyTessBaseAPI, which is not installed in CI"""
+    created = 0
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self):
+        type(self).created += 1
+        self.image = None
+
+    def SetImage(self, image):
+        self.image = image
+
+    def Recognize(self, timeout=0):
+        with self.lock:
+            type(self).active += 1
+            type(self).max_active = max(type(self).max_active, type(self).active)
+        time.sleep(0.01)
+        with self.lock:
+            type(self).active -= 1
+        return self.image.width != 13
+
+    def GetUTF8Text(self):
+        return f"width {self.image.width}"
+
+    def Clear(self):
+        self.image = None
+
+    def End(self):
+        pass
+
+def test_pooled_engine_reuses_warm_instances_and_keeps_batch_order():
+    engine = PooledEngine(FakeTessAPI, pool_size=3, timeout_seconds=5)
+    images = [Image.new("L", (width, 10)) for width in range(20, 40)]
+
+    assert engine.image_to_string_batch(images) == [f"width {width}" for width in range(20, 40)]
+    assert engine.image_to_string(images[0]) == "width 20"
+    assert FakeTessAPI.created == 3
+    assert FakeTessAPI.max_active <= 3
+
+    with pytest.raises(OCRTimeout):
+        engine.image_to_string(Image.new("L", (13, 10)))
+    # The instance that timed out goes back to the pool
+    assert engine._apis.qsize() == 3
+    engine.close()
+
+def test_auto_engine_falls_back_to_subprocess(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+
+    assert isinstance(create_engine("auto"), SubprocessEngine)
+    with pytest.raises(ImportError):
+        create_engine("tesserocr")
+    with pytest.raises(ValueError):
+        create_engine("cuneiform")
+
+def test_subprocess_timeout_is_reported():
+    def slow_tesseract(image, lang, timeout):
+        raise RuntimeError("Tesseract process timeout")
+
+    engine = SubprocessEngine("eng", timeout_seconds=0.5)
+    engine._pytesseract = type("pytesseract", (), {"image_to_string": staticmethod(slow_tesseract)})
+
+    with pytest.raises(OCRTimeout):
+        engine.image_to_string(Image.new("L", (10, 10)))
+
+def test_engine_must_implement_batch_recognition():
+    class IncompleteEngine(OCREngine):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteEngine()
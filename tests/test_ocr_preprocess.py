@@ -0,0 +1,62 @@
+from PIL import Image, ImageDraw
+from app.utils import ocr_parser
+from app.utils.image_preprocess import PreprocessConfig, find_receipt_box, load_for_ocr
+from app.utils.ocr_engine import OCREngine
+
+def phone_photo(path):
+    # A 12MP photo of a white receipt lying on a dark table
+    photo = Image.new("RGB", (4000, 3000), (60, 50, 40))
+    draw = ImageDraw.Draw(photo)
+    draw.rectangle((1500, 200, 2500, 2900), fill=(245, 245, 240))
+    for y in range(300, 2800, 60):
+        draw.text((1550, y), "ITEM 12.99 TOTAL $45.00", fill=(0, 0, 0))
+    photo.save(path, quality=90)
+    return str(path)
+
+def test_phone_photo_is_cropped_downscaled_and_binarized(tmp_path):
+    path = phone_photo(tmp_path / "photo.jpg")
+
+    left, top, right, bottom = find_receipt_box(path)
+    assert 0.33 < left < 0.375 and 0.625 < right < 0.67
+    assert top < 0.07 and bottom > 0.96
+
+    image = load_for_ocr(path, PreprocessConfig())
+    assert image.mode == "L"
+    assert set(image.getdata()) <= {0, 255}
+    assert abs(image.width - 300 * 3.15) < 10
+    assert image.height > 2 * image.width
+
+def test_small_scans_are_not_upscaled():
+    image = load_for_ocr("data/receipt.jpg", PreprocessConfig(crop=False))
+    assert image.size == (612, 612)
+
+def test_image_without_receipt_outline_is_scaled_only_by_declared_dpi(tmp_path):
+    # A close-up with no paper edge in view: the short side is not the receipt width
+    closeup = Image.new("RGB", (2000, 1500), (40, 40, 40))
+    ImageDraw.Draw(closeup).text((100, 100), "TOTAL $45.00", fill=(255, 255, 255))
+    closeup.save(tmp_path / "closeup.jpg")
+    closeup.save(tmp_path / "scan.jpg", dpi=(600, 600))
+
+    assert find_receipt_box(str(tmp_path / "closeup.jpg")) is None
+    assert load_for_ocr(str(tmp_path / "closeup.jpg"), PreprocessConfig()).size == (2000, 1500)
+    assert load_for_ocr(str(tmp_path / "scan.jpg"), PreprocessConfig()).size == (1000, 750)
+
+def test_ocr_results_are_cached_per_image_and_config(tmp_path, monkeypatch):
+    path = phone_photo(tmp_path / "photo.jpg")
+    calls = []
+
+    class RecordingEngine(OCREngine):
+        def image_to_string_batch(self, images):
+            calls.extend(image.size for image in images)
+            return ["TOTAL $45.00"] * len(images)
+
+    monkeypatch.setattr(ocr_parser, "get_engine", RecordingEngine)
+    ocr_parser.ocr_cache.clear()
+
+    assert ocr_parser.extract_text_from_image(path) == "TOTAL $45.00"
+    assert ocr_parser.extract_text_from_image(path) == "TOTAL $45.00"
+    assert len(calls) == 1
+
+    ocr_parser.extract_text_from_image(path, config=None)
+    assert calls[-1] == (4000, 3000)
+    assert len(calls) == 2
@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.utils import pdf_parser
+from app.utils.pdf_parser import (
+    extract_text_from_pdf, iter_pdf_pages, parse_transactions_from_pages, parse_transactions_from_text
+)
+
+def extract_in_worker(pdf_path):
+    # Stands in for an ingestion worker that extracts a large PDF
+    settings.PDF_PARALLEL_MIN_PAGES = 1
+    settings.PDF_EXTRACT_WORKERS = 2
+    list(iter_pdf_pages(pdf_path))
+    return list(pdf_parser._page_executor._processes)
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Reaped only by its (now gone) parent, so a zombie counts as stopped
+    with open(f"/proc/{pid}/stat") as stat:
+        return stat.read().split(")")[-1].split()[0] != "Z"
+
+def test_parallel_page_extraction_matches_serial(monkeypatch):
+    serial_pages = list(iter_pdf_pages("data/transaction.pdf", workers=1))
+
+    monkeypatch.setattr(settings, "PDF_PARALLEL_MIN_PAGES", 1)
+    monkeypatch.setattr(settings, "PDF_EXTRACT_WORKERS", 2)
+    parallel_pages = list(iter_pdf_pages("data/transaction.pdf"))
+
+    assert len(serial_pages) == 2
+    assert parallel_pages == serial_pages
+    assert extract_text_from_pdf("data/transaction.pdf") == "".join(page + "\n" for page in serial_pages)
+
+def test_streamed_pages_parse_like_full_text():
+    text = extract_text_from_pdf("data/transaction.pdf")
+    streamed = list(parse_transactions_from_pages(iter_pdf_pages("data/transaction.pdf")))
+    assert streamed == parse_transactions_from_text(text)
+    assert len(streamed) == 10
+
+def test_page_pool_stops_with_its_ingestion_worker():
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    page_workers = executor.submit(extract_in_worker, "data/transaction.pdf").result(timeout=60)
+    executor.shutdown(wait=True)
+
+    assert len(page_workers) == 2
+    deadline = time.time() + 10
+    while any(is_running(pid) for pid in page_workers) and time.time() < deadline:
+        time.sleep(0.1)
+    assert not any(is_running(pid) for pid in page_workers)
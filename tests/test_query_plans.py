@@ -0,0 +1,109 @@
+from datetime import date
+import shutil
+import pytest
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects import postgresql
+from app.db.migrations import run_migrations
+from app.db.session import build_engine
+from app.models.ingestion_job import IngestionJob
+from app.models.receipt import Receipt
+from app.services.transaction_service import (
+    category_summary_query, date_summary_query, encode_cursor, timeseries_query, transaction_filters,
+    transactions_count_query, transactions_page_query
+)
+
+FILTERS = {
+    "none": (None, None, None, None),
+    "date range": (date(2024, 1, 1), date(2024, 3, 31), None, None),
+    "type": (None, None, "expense", None),
+    "category": (None, None, None, "Food"),
+    "type and category": (None, None, "income", "Salary"),
+    "everything": (date(2024, 1, 1), date(2024, 3, 31), "expense", "Food"),
+}
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    engine = build_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    run_migrations(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+def query_plan(connection, statement) -> list[str]:
+    sql = statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+    return [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def assert_searches(plan: list[str], table: str, index: str = None, filtered: tuple = ()):
+    """Every step on table seeks an index by user_id and at least one of the filtered columns"""
+    steps = [step for step in plan if f" {table} " in f"{step} "]
+    assert steps, plan
+    for step in steps:
+        # SCAN is a full table (or full index) walk; SEARCH seeks by key
+        assert step.startswith(f"SEARCH {table} USING "), plan
+        assert "(user_id=?" in step, plan
+        if index:
+            assert index in step, plan
+        if filtered:
+            assert any(f"{column}=?" in step or f"{column}>" in step or f"{column}<" in step
+                       for column in filtered), plan
+
+def filtered_columns(start_date, end_date, type, category) -> tuple:
+    return tuple(column for column, value in (
+        ("date", start_date or end_date), ("type", type), ("category", category)
+    ) if value)
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+@pytest.mark.parametrize("cursor", [None, encode_cursor(date(2024, 2, 1), 500)], ids=["offset", "keyset"])
+def test_transaction_listing_seeks_an_index_in_order(connection, filters, cursor):
+    plan = query_plan(connection, transactions_page_query(transaction_filters(1, *filters), 2, 10, cursor))
+    assert_searches(plan, "transactions", filtered=filtered_columns(*filters))
+    # The index already returns rows in (date, id) order
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+@pytest.mark.parametrize("filters", FILTERS.values(), ids=FILTERS.keys())
+def test_transaction_count_uses_an_index(connection, filters):
+    plan = query_plan(connection, transactions_count_query(transaction_filters(1, *filters)))
+    assert_searches(plan, "transactions", filtered=filtered_columns(*filters))
+
+@pytest.mark.parametrize("build", [category_summary_query, date_summary_query])
+@pytest.mark.parametrize("filters", [(None, None, None), (date(2024, 1, 1), date(2024, 3, 31), "expense")])
+def test_summaries_seek_the_rollup_key(connection, build, filters):
+    assert_searches(query_plan(connection, build(1, *filters)), "transaction_rollups")
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month", "year"])
+@pytest.mark.parametrize("by_category", [False, True])
+def test_timeseries_seeks_the_rollup_key_in_one_pass(connection, bucket, by_category):
+    plan = query_plan(connection, timeseries_query(1, bucket, date(2024, 1, 1), None, "Food", by_category))
+    assert_searches(plan, "transaction_rollups")
+    assert sum(" transaction_rollups " in f"{step} " for step in plan) == 1, plan
+
+def test_timeseries_buckets_with_date_trunc_on_postgres():
+    sql = str(timeseries_query(1, "week", None, None, None, True).compile(dialect=postgresql.dialect()))
+    assert "CAST(date_trunc('week', transaction_rollups.date) AS DATE)" in sql
+    assert "GROUP BY CAST(date_trunc('week', transaction_rollups.date) AS DATE), transaction_rollups.category" in sql
+
+def test_receipt_and_job_lookups_use_an_index(connection):
+    # user_id leads the unique dedup index, so it also serves per-user lookups
+    duplicate = select(Receipt).where(
+        Receipt.user_id == 1, Receipt.kind == "pdf", Receipt.content_hash == "abc"
+    ).order_by(Receipt.id).limit(1)
+    assert_searches(query_plan(connection, duplicate), "receipts", "ux_receipts_user_kind_hash")
+    assert_searches(query_plan(connection, select(Receipt).where(Receipt.user_id == 1)), "receipts")
+
+    jobs = select(IngestionJob).where(IngestionJob.user_id == 1).order_by(IngestionJob.id.desc()).limit(20)
+    plan = query_plan(connection, jobs)
+    assert_searches(plan, "ingestion_jobs")
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+def test_existing_database_gains_the_indexes(tmp_path):
+    # The shipped database predates the filter indexes
+    shutil.copy("finance_assistant.db", tmp_path / "existing.db")
+    engine = build_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    run_migrations(engine)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    engine.dispose()
+    assert {
+        "ix_transactions_user_date_id",
+        "ix_transactions_user_category_date_id",
+        "ix_transactions_user_type_date_id",
+    } <= indexes
@@ -0,0 +1,323 @@
+import io
+import os
+import time
+import uuid
+import zipfile
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+def unique_username(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+def get_token(username="receiptuser", password="receiptpass"):
+    client.post("/auth/register", json={"username": username, "password": password})
+    login_response = client.post("/auth/login", data={
+        "username": username,
+        "password": password
+    })
+    return login_response.json()["access_token"]
+
+def wait_for_job(job_id, headers, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/receipts/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"job {job_id} did not finish in {timeout}s")
+
+def test_upload_pdf_returns_job_and_completes():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    with open("data/transaction.pdf", "rb") as f:
+        response = client.post("/receipts/upload-pdf",
+            headers=headers,
+            files={"file": ("transaction.pdf", f, "application/pdf")}
+        )
+    assert response.status_code == 202
+    assert response.json()["status"] == "pending"
+
+    job = wait_for_job(response.json()["id"], headers)
+    assert job["status"] == "completed"
+    assert job["progress"] == 100
+    assert job["receipt_id"] is not None
+    assert job["transactions_created"] == 10
+
+def test_upload_rejects_unsupported_format():
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/receipts/upload",
+        headers=headers,
+        files={"file": ("notes.txt", b"hello", "text/plain")}
+    )
+    assert response.status_code == 400
+
+def test_job_of_another_user_is_not_found():
+    # As a context manager the client runs startup/shutdown, so the worker
+    # pool started for this upload is shut down again
+    with TestClient(app) as scoped_client:
+        headers = {"Authorization": f"Bearer {get_token()}"}
+        other_headers = {"Authorization": f"Bearer {get_token('otherreceiptuser', 'otherpass')}"}
+        with open("data/transaction.pdf", "rb") as f:
+            job = scoped_client.post("/receipts/upload-pdf",
+                headers=headers,
+                files={"file": ("transaction.pdf", f, "application/pdf")}
+            ).json()
+        
+        assert scoped_client.get(f"/receipts/jobs/{job['id']}", headers=headers).status_code == 200
+        response = scoped_client.get(f"/receipts/jobs/{job['id']}", headers=other_headers)
+        assert response.status_code == 404
+
+def test_upload_over_size_limit_is_rejected_and_cleaned_up(upload_dir, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 256)
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/receipts/upload",
+        headers=headers,
+        files={"file": ("big.jpg", b"x" * 5000, "image/jpeg")}
+    )
+    assert response.status_code == 413
+    assert os.listdir(upload_dir) == []
+
+def test_upload_body_over_limit_is_rejected_before_it_is_read(monkeypatch):
+    import asyncio
+    from app.utils.uploads import UploadLimitMiddleware
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/receipts/upload",
+        headers=headers,
+        files={"file": ("big.jpg", b"x" * 200_000, "image/jpeg")}
+    )
+    assert response.status_code == 413
+
+    # Without a Content-Length the body is cut off once it passes the limit
+    read = []
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            read.append(1)
+    async def receive():
+        return {"type": "http.request", "body": b"x" * 100, "more_body": True}
+    middleware = UploadLimitMiddleware(app, {"/upload": lambda: 250})
+    scope = {"type": "http", "path": "/upload", "headers": []}
+    with pytest.raises(Exception) as error:
+        asyncio.run(middleware(scope, receive, None))
+    assert error.value.status_code == 413
+    assert len(read) == 2
+
+def test_duplicate_upload_reuses_file_and_skips_transactions(upload_dir):
+    headers = {"Authorization": f"Bearer {get_token(unique_username('dedupuser'), 'deduppass')}"}
+    other_headers = {"Authorization": f"Bearer {get_token(unique_username('dedupother'), 'deduppass')}"}
+
+    def upload(request_headers):
+        with open("data/transaction.pdf", "rb") as f:
+            response = client.post("/receipts/upload-pdf",
+                headers=request_headers,
+                files={"file": ("statement.pdf", f, "application/pdf")}
+            )
+        return wait_for_job(response.json()["id"], request_headers)
+
+    first = upload(headers)
+    second = upload(headers)
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["receipt_id"] == first["receipt_id"]
+    assert second["transactions_created"] == 0
+    assert client.get("/transactions/", headers=headers).json()["total"] == 10
+
+    # Another user's copy of the same file comes from the extraction cache
+    third = upload(other_headers)
+    assert third["duplicate"] is False
+    assert third["transactions_created"] == 10
+    assert len(os.listdir(upload_dir)) == 1
+
+def test_same_file_as_receipt_and_statement_is_not_a_duplicate():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('kinduser'), 'kindpass')}"}
+
+    def upload(route):
+        with open("data/transaction.pdf", "rb") as f:
+            response = client.post(route,
+                headers=headers,
+                files={"file": ("statement.pdf", f, "application/pdf")}
+            )
+        return wait_for_job(response.json()["id"], headers)
+
+    as_receipt = upload("/receipts/upload")
+    as_statement = upload("/receipts/upload-pdf")
+    assert as_receipt["status"] == as_statement["status"] == "completed"
+    assert as_statement["duplicate"] is False
+    assert as_statement["receipt_id"] != as_receipt["receipt_id"]
+    assert as_statement["transactions_created"] == 10
+
+def test_concurrent_duplicate_is_caught_by_unique_index(monkeypatch):
+    from app.db.session import SessionLocal
+    from app.models.transaction import Transaction
+    from app.models.user import User
+    from app.services.receipt_service import ReceiptService
+
+    username = unique_username('raceuser')
+    get_token(username, 'racepass')
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).one()
+        service = ReceiptService(db)
+        first = service.process_pdf_transactions(user.id, "data/transaction.pdf", "racehash")
+
+        # The second job's duplicate check ran before the first job saved
+        find_duplicate = ReceiptService.find_duplicate
+        checks = []
+        def stale_find_duplicate(self, *args):
+            checks.append(args)
+            return None if len(checks) == 1 else find_duplicate(self, *args)
+        monkeypatch.setattr(ReceiptService, "find_duplicate", stale_find_duplicate)
+
+        second = service.process_pdf_transactions(user.id, "data/transaction.pdf", "racehash")
+        assert second.duplicate is True
+        assert second.transactions_created == 0
+        assert second.receipt.id == first.receipt.id
+        assert db.query(Transaction).filter(Transaction.user_id == user.id).count() == 10
+    finally:
+        db.close()
+def test_recovery_only_takes_jobs_whose_lease_lapsed(monkeypatch):
+    from datetime import datetime, timedelta
+    from app.db.session import SessionLocal
+    from app.models.ingestion_job import IngestionJob, JobKind, JobStatus
+    from app.models.user import User
+    from app.services import job_service
+
+    enqueued = []
+    monkeypatch.setattr(job_service, "enqueue_job", enqueued.append)
+    db = SessionLocal()
+    try:
+        user = User(username=unique_username("leaseuser"), password_hash="x")
+        db.add(user)
+        db.commit()
+        now = datetime.utcnow()
+        # Running in another, live worker / in a worker that died
+        live, lapsed = [
+            IngestionJob(user_id=user.id, kind=JobKind.PDF, status=JobStatus.RUNNING, file_path="x.pdf",
+                         file_extension="pdf", lease_expires_at=now + offset)
+            for offset in (timedelta(minutes=5), timedelta(minutes=-1))
+        ]
+        db.add_all([live, lapsed])
+        db.commit()
+
+        job_service.recover_jobs()
+        db.expire_all()
+        assert live.status == JobStatus.RUNNING
+        assert lapsed.status == JobStatus.PENDING
+        assert lapsed.id in enqueued and live.id not in enqueued
+    finally:
+        db.query(IngestionJob).filter(IngestionJob.user_id == user.id).delete()
+        db.commit()
+        db.close()
+
+def read_pdf():
+    with open("data/transaction.pdf", "rb") as f:
+        return f.read()
+
+def test_batch_upload_reports_each_file():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('batchuser'), 'batchpass')}"}
+    pdf = read_pdf()
+    response = client.post("/receipts/upload-batch",
+        headers=headers,
+        files=[
+            ("files", ("first.pdf", pdf, "application/pdf")),
+            ("files", ("copy.pdf", pdf, "application/pdf")),
+            ("files", ("notes.txt", b"not a receipt", "text/plain")),
+        ]
+    )
+    assert response.status_code == 200
+    first, copy, notes = response.json()["files"]
+    assert first["status"] == "created" and first["transactions_created"] == 1
+    assert copy["status"] == "duplicate" and copy["receipt_id"] == first["receipt_id"]
+    assert notes["status"] == "failed" and notes["error"] == "Unsupported file format"
+    assert response.json()["transactions_created"] == 1
+    assert client.get("/transactions/", headers=headers).json()["total"] == 1
+
+def test_batch_upload_extracts_zip_archives(upload_dir):
+    headers = {"Authorization": f"Bearer {get_token(unique_username('zipuser'), 'zippass')}"}
+    pdf = read_pdf()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("receipts/", b"")
+        zf.writestr("receipts/a.pdf", pdf)
+        zf.writestr("receipts/b.pdf", pdf + b"\n")
+        zf.writestr("__MACOSX/receipts/._a.pdf", b"resource fork")
+    response = client.post("/receipts/upload-batch",
+        headers=headers,
+        files=[("files", ("receipts.zip", archive.getvalue(), "application/zip"))]
+    )
+    assert response.status_code == 200
+    assert [(result["filename"], result["status"]) for result in response.json()["files"]] == [
+        ("a.pdf", "created"), ("b.pdf", "created")
+    ]
+    # Only the extracted receipts are kept
+    assert sorted(name.split(".")[-1] for name in os.listdir(upload_dir)) == ["pdf", "pdf"]
+
+def test_batch_upload_over_file_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BATCH_FILES", 2)
+    headers = {"Authorization": f"Bearer {get_token()}"}
+    response = client.post("/receipts/upload-batch",
+        headers=headers,
+        files=[("files", (f"{i}.pdf", b"%PDF", "application/pdf")) for i in range(3)]
+    )
+    assert response.status_code == 400
+
+def test_large_batch_upload_becomes_a_job(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_SYNC_MAX_FILES", 1)
+    headers = {"Authorization": f"Bearer {get_token(unique_username('batchjob'), 'batchpass')}"}
+    pdf = read_pdf()
+    response = client.post("/receipts/upload-batch",
+        headers=headers,
+        files=[
+            ("files", ("first.pdf", pdf, "application/pdf")),
+            ("files", ("second.pdf", pdf + b"\n", "application/pdf")),
+        ]
+    )
+    assert response.status_code == 202
+    job = response.json()["job"]
+    assert job["kind"] == "batch"
+
+    job = wait_for_job(job["id"], headers)
+    assert job["status"] == "completed"
+    assert job["transactions_created"] == 2
+    assert [result["status"] for result in job["results"]] == ["created", "created"]
+
+def test_lease_is_renewed_while_a_job_runs(monkeypatch):
+    from datetime import datetime
+    from app.db.session import SessionLocal
+    from app.models.ingestion_job import IngestionJob, JobKind, JobStatus
+    from app.models.user import User
+    from app.services import job_service
+
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.6)
+    db = SessionLocal()
+    try:
+        user = User(username=unique_username("heartbeat"), password_hash="x")
+        db.add(user)
+        db.commit()
+        job = IngestionJob(user_id=user.id, kind=JobKind.PDF, status=JobStatus.RUNNING, file_path="x.pdf",
+                           file_extension="pdf", lease_expires_at=datetime.utcnow())
+        db.add(job)
+        db.commit()
+
+        # A long extraction without any progress reports
+        with job_service._lease_heartbeat(job.id):
+            time.sleep(1.5)
+            db.expire_all()
+            assert job.lease_expires_at > datetime.utcnow()
+            job_service.recover_jobs()
+            db.expire_all()
+            assert job.status == JobStatus.RUNNING
+    finally:
+        db.query(IngestionJob).filter(IngestionJob.user_id == user.id).delete()
+        db.commit()
+        db.close()
@@ -0,0 +1,46 @@
+import os
+from app.core.shared_state import SQLiteState, create_shared_state
+
+def test_sqlite_state_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    # Two instances on one file stand in for two web worker processes
+    first, second = SQLiteState(path), SQLiteState(path)
+    try:
+        assert first.token == second.token
+        assert second.get_version("data:1") == 0
+        first.bump_version("data:1")
+        first.bump_version("data:1")
+        assert second.get_version("data:1") == 2
+        assert second.get_version("data:2") == 0
+
+        assert first.hit("login:alice", 60) == 1
+        assert second.hit("login:alice", 60) == 2
+        assert first.hits("login:alice", 60) == 2
+        assert first.hits("login:bob", 60) == 0
+    finally:
+        first.close()
+        second.close()
+
+def test_auto_backend_follows_the_url(tmp_path):
+    assert create_shared_state("auto", "").name == "memory"
+    state = create_shared_state("auto", str(tmp_path / "state.db"))
+    assert state.name == "sqlite"
+    state.close()
+
+def test_serve_splits_the_pools_between_workers(monkeypatch):
+    from app import cli
+    monkeypatch.delenv("INGESTION_WORKERS", raising=False)
+    monkeypatch.delenv("PDF_EXTRACT_WORKERS", raising=False)
+    monkeypatch.setattr(cli.settings, "INGESTION_WORKERS", 2)
+    monkeypatch.setattr(cli.os, "cpu_count", lambda: 8)
+
+    cli.split_pools(8)
+    # One ingestion process per web worker, extracting PDF pages inline
+    assert os.environ["INGESTION_WORKERS"] == "1"
+    assert os.environ["PDF_EXTRACT_WORKERS"] == "1"
+
+    monkeypatch.setenv("INGESTION_WORKERS", "2")
+    monkeypatch.delenv("PDF_EXTRACT_WORKERS")
+    cli.split_pools(2)
+    assert os.environ["INGESTION_WORKERS"] == "2"
+    assert os.environ["PDF_EXTRACT_WORKERS"] == "2"
@@ -0,0 +1,18 @@
+import json
+import os
+import subprocess
+import sys
+
+def test_importing_the_app_skips_the_database_and_the_imaging_stack(tmp_path):
+    database = tmp_path / "untouched.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+    script = (
+        "import json, sys\n"
+        "import app.main\n"
+        "print(json.dumps([name for name in ('PIL', 'pdfplumber', 'pytesseract') if name in sys.modules]))\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+
+    # Nothing printed besides the module list, no heavy imports, no schema work
+    assert json.loads(completed.stdout) == []
+    assert not database.exists()
@@ -0,0 +1,67 @@
+from datetime import date
+from decimal import Decimal
+from app.utils.keyword_matcher import KeywordMatcher
+from app.services import receipt_service
+from app.utils.pdf_parser import parse_transactions_from_pages, parse_transactions_from_text
+from app.utils import statement_parser
+from app.utils.statement_parser import StatementLayout, detect_layout, register_layout
+from benchmarks.bench_statement_parser import legacy_parse_transactions_from_text, synthetic_statement
+
+def test_keyword_matcher_respects_group_priority():
+    matcher = KeywordMatcher([
+        ("Transport", ["gas", "taxi"]),
+        ("Utilities", ["gas bill", "water"]),
+    ])
+    assert matcher.classify("Water and GAS bill") == "Transport"
+    assert matcher.classify("water") == "Utilities"
+    assert matcher.classify("bookstore") == "Other"
+
+def test_engine_matches_legacy_parser():
+    text = synthetic_statement(2000, seed=7) + "\n13/45/2024 Bad date -$1.00\n01/02/24 Short year $2.00"
+    # The engine reads amounts as exact decimals where the legacy parser used floats
+    parsed = [{**item, "amount": float(item["amount"])} for item in parse_transactions_from_text(text)]
+    assert parsed == legacy_parse_transactions_from_text(text)
+
+def register_test_bank(monkeypatch):
+    monkeypatch.setattr(statement_parser, "_layouts", dict(statement_parser._layouts))
+    monkeypatch.setattr(statement_parser, "_parsers", dict(statement_parser._parsers))
+    register_layout(StatementLayout(
+        name="test-bank",
+        line_pattern=r'(?m)^(?P<date>\d{2}\.\d{2}\.\d{4});(?P<description>[^;]*);(?P<amount>-?[\d,]+\.\d{2})$',
+        date_formats=('%d.%m.%Y',),
+        detect_pattern=r'TEST BANK STATEMENT'
+    ))
+
+def test_registered_layout_is_detected(monkeypatch):
+    register_test_bank(monkeypatch)
+    text = "TEST BANK STATEMENT\n31.01.2024;Taxi ride;-1,250.00\n01.02.2024;Salary;3000.00"
+
+    assert detect_layout(text) == "test-bank"
+    assert parse_transactions_from_text(text) == [
+        {"amount": 1250.0, "type": "expense", "category": "Transport", "description": "Taxi ride", "date": date(2024, 1, 31)},
+        {"amount": 3000.0, "type": "income", "category": "Income", "description": "Salary", "date": date(2024, 2, 1)},
+    ]
+
+def test_iso_layout_by_name():
+    transactions = parse_transactions_from_text("2024-03-05 Internet service -$59.99\n", layout="iso")
+    assert transactions == [
+        {"amount": Decimal("59.99"), "type": "expense", "category": "Utilities", "description": "Internet service", "date": date(2024, 3, 5)}
+    ]
+
+def test_layout_detected_on_first_page_applies_to_later_pages(monkeypatch):
+    register_test_bank(monkeypatch)
+    pages = [
+        "",
+        "TEST BANK STATEMENT\n31.01.2024;Taxi ride;-1,250.00",
+        "Page 3\n01.02.2024;Salary;3000.00",
+    ]
+    expected = [
+        {"amount": 1250.0, "type": "expense", "category": "Transport", "description": "Taxi ride", "date": date(2024, 1, 31)},
+        {"amount": 3000.0, "type": "income", "category": "Income", "description": "Salary", "date": date(2024, 2, 1)},
+    ]
+    assert list(parse_transactions_from_pages(pages)) == expected
+
+    monkeypatch.setattr(receipt_service, "iter_pdf_pages", lambda file_path: iter(pages))
+    text, transactions = receipt_service.extract_statement("statement.pdf")
+    assert transactions == expected
+    assert text == "".join(page + "\n" for page in pages)
@@ -1,16 +1,13 @@
  
+import uuid
 from fastapi.testclient import TestClient
 from app.main import app
 
 client = TestClient(app)
 
 def test_create_transaction():
-    # First login to get token
-    login_response = client.post("/auth/login", data={
-        "username": "testuser",
-        "password": "testpass"
-    })
-    token = login_response.json()["access_token"]
+    # Registers its own user, so it does not depend on test_auth running first
+    token = get_token(unique_username("createuser"), "testpass")
     
     # Create transaction
     response = client.post("/transactions/", 
@@ -24,4 +21,315 @@ def test_create_transaction():
     )
     assert response.status_code == 200
     assert response.json()["amount"] == 100.0
-    assert response.json()["category"] == "Food"
\ No newline at end of file
+    assert response.json()["category"] == "Food"
+
+def get_token(username, password):
+    client.post("/auth/register", json={"username": username, "password": password})
+    login_response = client.post("/auth/login", data={
+        "username": username,
+        "password": password
+    })
+    return login_response.json()["access_token"]
+
+def unique_username(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+def test_cursor_pagination_walks_every_row_once():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('cursoruser'), 'cursorpass')}"}
+    for day in range(1, 8):
+        for amount in (10.0, 20.0):
+            client.post("/transactions/", headers=headers, json={
+                "amount": amount,
+                "type": "expense",
+                "category": "Food",
+                "date": f"2024-03-0{day}"
+            })
+
+    page_mode = client.get("/transactions/?limit=100", headers=headers).json()
+    assert page_mode["total"] == 14
+    expected_ids = [item["id"] for item in page_mode["items"]]
+
+    seen_ids = []
+    response = client.get("/transactions/?limit=4", headers=headers).json()
+    seen_ids += [item["id"] for item in response["items"]]
+    while response["next_cursor"]:
+        response = client.get(
+            f"/transactions/?limit=4&cursor={response['next_cursor']}", headers=headers
+        ).json()
+        assert response["total"] is None
+        seen_ids += [item["id"] for item in response["items"]]
+
+    assert seen_ids == expected_ids
+
+def test_invalid_cursor_is_rejected():
+    headers = {"Authorization": f"Bearer {get_token('cursoruser', 'cursorpass')}"}
+    response = client.get("/transactions/?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+
+def test_summaries_follow_new_transactions():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('summaryuser'), 'summarypass')}"}
+    for amount, type, category, day in [
+        (12.5, "expense", "Food", "2024-04-01"),
+        (7.5, "expense", "Food", "2024-04-01"),
+        (30.0, "expense", "Transport", "2024-04-02"),
+        (500.0, "income", "Salary", "2024-04-02"),
+    ]:
+        client.post("/transactions/", headers=headers, json={
+            "amount": amount, "type": type, "category": category, "date": day
+        })
+
+    categories = client.get("/transactions/summary/category?type=expense", headers=headers).json()
+    assert {row["category"]: row["total_amount"] for row in categories} == {"Food": 20.0, "Transport": 30.0}
+
+    dates = client.get("/transactions/summary/date", headers=headers).json()
+    assert dates == [
+        {"date": "2024-04-01", "total_amount": 20.0},
+        {"date": "2024-04-02", "total_amount": 530.0},
+    ]
+
+def test_bulk_import_json_reports_row_errors():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('bulkuser'), 'bulkpass')}"}
+    items = [
+        {"amount": 10.0 + i, "type": "expense", "category": "Food", "date": "2024-05-01"}
+        for i in range(25)
+    ]
+    items.insert(3, {"amount": "lots", "type": "expense", "category": "Food", "date": "2024-05-01"})
+    response = client.post("/transactions/bulk?chunk_size=10", headers=headers, json=items)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 25
+    assert response.json()["failed"] == 1
+    assert response.json()["errors"][0]["row"] == 4
+
+    summary = client.get("/transactions/summary/category", headers=headers).json()
+    assert summary == [{"category": "Food", "total_amount": sum(10.0 + i for i in range(25))}]
+
+def test_slow_bulk_import_does_not_block_other_writers():
+    import asyncio
+    from sqlalchemy import text
+    from app.db.session import SessionLocal
+    from app.models.user import User
+    from app.services.bulk_import_service import BulkImportService
+
+    db = SessionLocal()
+    other = SessionLocal()
+    try:
+        user = User(username=unique_username("slowbulk"), password_hash="x")
+        db.add(user)
+        db.commit()
+
+        async def records():
+            for row in range(1, 4):
+                yield row, {"amount": row, "type": "expense", "category": "Food", "date": "2024-05-01"}
+                # Another connection writes while the client is still sending
+                other.execute(text("PRAGMA busy_timeout = 100"))
+                other.add(User(username=unique_username("writer"), password_hash="x"))
+                other.commit()
+
+        result = asyncio.run(BulkImportService(db).import_records(user.id, records(), chunk_size=1))
+        assert result.inserted == 3
+    finally:
+        other.close()
+        db.close()
+
+def test_bulk_import_streams_ndjson_and_csv():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('bulkstreamuser'), 'bulkpass')}"}
+    ndjson = "\n".join([
+        '{"amount": 5.0, "type": "income", "category": "Gift", "date": "2024-06-01"}',
+        '{not json}',
+        '{"amount": 7.0, "type": "expense", "category": "Food", "date": "2024-06-02"}',
+    ])
+    response = client.post("/transactions/bulk",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        content=ndjson
+    )
+    assert response.json()["inserted"] == 2
+    assert response.json()["errors"][0]["row"] == 2
+
+    csv_body = (
+        b"amount,type,category,description,date\n3.5,expense,Transport,,2024-06-03\n4.0,refund,Other,x,2024-06-03\n"
+        b"2.0,expense,Food,caf\xff\xfe,2024-06-04\n"
+    )
+    response = client.post("/transactions/bulk",
+        headers={**headers, "Content-Type": "text/csv"},
+        content=csv_body
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
+    assert response.json()["failed"] == 2
+    assert "UTF-8" in response.json()["errors"][1]["error"]
+
+    listing = client.get("/transactions/", headers=headers).json()
+    assert listing["total"] == 3
+
+def test_reads_are_revalidated_with_etags_and_served_from_cache():
+    from sqlalchemy import event
+    from app.db.session import engine
+    headers = {"Authorization": f"Bearer {get_token(unique_username('etaguser'), 'etagpass')}"}
+    client.post("/transactions/", headers=headers, json={
+        "amount": 20.0, "type": "expense", "category": "Food", "date": "2024-04-01"
+    })
+
+    first = client.get("/transactions/summary/category", headers=headers)
+    etag = first.headers["etag"]
+    assert first.json() == [{"category": "Food", "total_amount": 20.0}]
+
+    statements = []
+    count_statements = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", count_statements)
+    try:
+        cached = client.get("/transactions/summary/category", headers=headers)
+        not_modified = client.get("/transactions/summary/category", headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statements)
+    assert statements == []
+    assert cached.content == first.content
+    assert cached.headers["etag"] == etag
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # Another query is a different entry
+    other = client.get("/transactions/summary/category?type=income", headers=headers)
+    assert other.json() == [] and other.headers["etag"] != etag
+
+    # A write moves the version: the old ETag no longer matches
+    client.post("/transactions/bulk", headers=headers, json=[
+        {"amount": 5.0, "type": "expense", "category": "Food", "date": "2024-04-02"}
+    ])
+    changed = client.get("/transactions/summary/category", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json() == [{"category": "Food", "total_amount": 25.0}]
+    assert client.get("/transactions/", headers=headers).json()["total"] == 2
+
+def test_amounts_are_stored_and_summed_as_exact_cents():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('centsuser'), 'centspass')}"}
+    rows = "".join('{"amount": 0.1, "type": "expense", "category": "Food", "date": "2024-05-01"}\n' for _ in range(30))
+    rows += '{"amount": 19.99, "type": "expense", "category": "Food", "date": "2024-05-02"}\n'
+    rows += '{"amount": 0.005, "type": "expense", "category": "Food", "date": "2024-05-02"}\n'
+    response = client.post("/transactions/bulk",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        content=rows.encode()
+    )
+    assert response.json()["inserted"] == 32
+
+    # 30 * 0.1 in floats is 3.0000000000000004; half a cent rounds up
+    assert client.get("/transactions/summary/category", headers=headers).json() == [
+        {"category": "Food", "total_amount": 23.0}
+    ]
+    amounts = sorted(item["amount"] for item in client.get("/transactions/?limit=100", headers=headers).json()["items"])
+    assert amounts == [0.01] + [0.1] * 30 + [19.99]
+
+def test_fast_read_path_matches_the_response_schemas(monkeypatch):
+    import json
+    from app.core import serialization
+    from app.schemas.transaction import DateSummary, PaginatedTransactions
+    headers = {"Authorization": f"Bearer {get_token(unique_username('fastuser'), 'fastpass')}"}
+    client.post("/transactions/bulk", headers=headers, json=[
+        {"amount": 529.69, "type": "income", "category": "Salary", "description": "Pay", "date": "2024-06-01"},
+        {"amount": 12.5, "type": "expense", "category": "Food", "date": "2024-06-02"}
+    ])
+
+    page = client.get("/transactions/", headers=headers).json()
+    assert PaginatedTransactions.model_validate(page).model_dump(mode="json") == page
+    assert [item["amount"] for item in page["items"]] == [12.5, 529.69]
+    summary = client.get("/transactions/summary/date", headers=headers).json()
+    assert [DateSummary.model_validate(row).model_dump(mode="json") for row in summary] == summary
+
+    # Without orjson the stdlib encoder produces the same document
+    assert json.loads(serialization.dumps(page)) == page
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(serialization.dumps(page)) == page
+
+def test_export_streams_every_matching_row_as_csv_and_ndjson(monkeypatch):
+    import csv
+    import json
+    from app.core.config import settings
+    headers = {"Authorization": f"Bearer {get_token(unique_username('exportuser'), 'exportpass')}"}
+    items = [
+        {"amount": 1.25 + i, "type": "expense", "category": "Food", "date": f"2024-07-{1 + i % 28:02d}"}
+        for i in range(25)
+    ]
+    items.append({"amount": 900, "type": "income", "category": "Salary", "description": 'Pay, "July"\r\nbonus\nincluded', "date": "2024-07-31"})
+    client.post("/transactions/bulk", headers=headers, json=items)
+    # Several fetches per export
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 4)
+
+    response = client.get("/transactions/export?type=expense", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == 25
+    assert [row["date"] for row in rows] == sorted(row["date"] for row in rows)
+    assert sum(float(row["amount"]) for row in rows) == sum(item["amount"] for item in items[:25])
+
+    response = client.get("/transactions/export?format=ndjson&category=Salary", headers=headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["amount"], line["description"]) for line in lines] == [(900.0, 'Pay, "July"\r\nbonus\nincluded')]
+
+    # The CSV goes straight back into the bulk importer
+    exported = client.get("/transactions/export?category=Salary", headers=headers).content
+    other = {"Authorization": f"Bearer {get_token(unique_username('importuser'), 'importpass')}"}
+    response = client.post("/transactions/bulk", headers={**other, "Content-Type": "text/csv"}, content=exported)
+    assert response.json()["inserted"] == 1
+    imported = client.get("/transactions/", headers=other).json()["items"]
+    assert imported[0]["description"] == 'Pay, "July"\r\nbonus\nincluded'
+
+    assert client.get("/transactions/export?type=refund", headers=headers).status_code == 400
+    assert client.get("/transactions/export?format=xml", headers=headers).status_code == 422
+
+def test_timeseries_buckets_income_expense_and_net():
+    from app.schemas.transaction import TimeseriesPoint
+    headers = {"Authorization": f"Bearer {get_token(unique_username('seriesuser'), 'seriespass')}"}
+    client.post("/transactions/bulk", headers=headers, json=[
+        {"amount": 1000, "type": "income", "category": "Salary", "date": "2023-12-31"},
+        {"amount": 40.5, "type": "expense", "category": "Food", "date": "2024-01-01"},
+        {"amount": 9.5, "type": "expense", "category": "Food", "date": "2024-01-07"},
+        {"amount": 20, "type": "expense", "category": "Transport", "date": "2024-01-08"},
+        {"amount": 1000, "type": "income", "category": "Salary", "date": "2024-01-31"},
+        {"amount": 5, "type": "expense", "category": "Food", "date": "2024-02-29"}
+    ])
+
+    def series(**params):
+        response = client.get("/transactions/summary/timeseries", headers=headers, params=params)
+        assert response.status_code == 200
+        return [(row["period_start"], row["income"], row["expense"], row["net"]) for row in response.json()]
+
+    assert series(bucket="month") == [
+        ("2023-12-01", 1000.0, 0.0, 1000.0), ("2024-01-01", 1000.0, 70.0, 930.0), ("2024-02-01", 0.0, 5.0, -5.0)
+    ]
+    assert series(bucket="year") == [("2023-01-01", 1000.0, 0.0, 1000.0), ("2024-01-01", 1000.0, 75.0, 925.0)]
+    # Weeks start on Monday: Sunday 2023-12-31 belongs to the week of 2023-12-25
+    assert series(bucket="week", end_date="2024-01-14") == [
+        ("2023-12-25", 1000.0, 0.0, 1000.0), ("2024-01-01", 0.0, 50.0, -50.0), ("2024-01-08", 0.0, 20.0, -20.0)
+    ]
+    assert len(series(bucket="day")) == 6
+    assert series(bucket="month", category="Food") == [("2024-01-01", 0.0, 50.0, -50.0), ("2024-02-01", 0.0, 5.0, -5.0)]
+
+    response = client.get("/transactions/summary/timeseries", headers=headers,
+        params={"bucket": "month", "by_category": True, "start_date": "2024-01-01"})
+    points = response.json()
+    assert [(point["period_start"], point["category"], point["net"]) for point in points] == [
+        ("2024-01-01", "Food", -50.0), ("2024-01-01", "Salary", 1000.0), ("2024-01-01", "Transport", -20.0),
+        ("2024-02-01", "Food", -5.0)
+    ]
+    assert [TimeseriesPoint.model_validate(point).model_dump(mode="json") for point in points] == points
+
+    assert client.get("/transactions/summary/timeseries?bucket=quarter", headers=headers).status_code == 422
+
+def test_totals_beyond_float_precision_stay_exact():
+    headers = {"Authorization": f"Bearer {get_token(unique_username('bigtotals'), 'bigpass')}"}
+    largest = "9999999999999.99"
+    response = client.post("/transactions/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content="\n".join(
+        f'{{"amount": {amount}, "type": "income", "category": "Salary", "date": "2024-01-01"}}'
+        for amount in (largest, largest, "10000000000000")
+    ))
+    # Single amounts are bounded to what a float holds exactly
+    assert response.json()["inserted"] == 2
+    assert response.json()["errors"][0]["row"] == 3
+
+    # Their total is not, and is written digit for digit
+    response = client.get("/transactions/summary/category", headers=headers)
+    assert response.text == '[{"category":"Salary","total_amount":19999999999999.98}]'
+    response = client.get("/transactions/summary/timeseries?bucket=year", headers=headers)
+    assert '"income":19999999999999.98' in response.text
@@ -0,0 +1,55 @@
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import app.main  # noqa: F401  creates the schema
+from app.core.config import settings
+from app.routers import auth, transactions, transactions_async
+
+@pytest.fixture
+def async_client(monkeypatch):
+    # The app as app.main wires it with ASYNC_DB=true: the async routes are
+    # registered ahead of the sync router, which still serves /bulk
+    monkeypatch.setattr(settings, "ASYNC_DB", True)
+    async_app = FastAPI()
+    async_app.include_router(auth.router)
+    async_app.include_router(transactions_async.router)
+    async_app.include_router(transactions.router)
+    with TestClient(async_app) as client:
+        yield client
+
+def auth_headers(client):
+    username = f"async-{uuid.uuid4().hex[:12]}"
+    client.post("/auth/register", json={"username": username, "password": "asyncpass"})
+    token = client.post("/auth/login", data={"username": username, "password": "asyncpass"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_async_routes_take_precedence():
+    app_routes = [route for route in FastAPI(routes=transactions_async.router.routes + transactions.router.routes).routes]
+    list_route = next(route for route in app_routes if route.path == "/transactions/" and "GET" in route.methods)
+    assert list_route.endpoint is transactions_async.get_transactions
+
+def test_async_endpoints_create_page_and_summarize(async_client):
+    headers = auth_headers(async_client)
+    for day, category in [(1, "Food"), (2, "Food"), (2, "Transport")]:
+        response = async_client.post("/transactions/", headers=headers, json={
+            "amount": 12.5, "type": "expense", "category": category, "date": f"2024-05-0{day}"
+        })
+        assert response.status_code == 200
+        assert response.json()["amount"] == 12.5
+
+    first = async_client.get("/transactions/", headers=headers, params={"limit": 2}).json()
+    assert first["total"] == 3
+    second = async_client.get("/transactions/", headers=headers, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert len(first["items"]) + len(second["items"]) == 3
+    assert second["next_cursor"] is None
+
+    categories = async_client.get("/transactions/summary/category", headers=headers).json()
+    assert sorted((row["category"], row["total_amount"]) for row in categories) == [("Food", 25.0), ("Transport", 12.5)]
+    dates = async_client.get("/transactions/summary/date", headers=headers).json()
+    assert [row["total_amount"] for row in dates] == [12.5, 25.0]
+    series = async_client.get("/transactions/summary/timeseries", headers=headers, params={"bucket": "month"}).json()
+    assert series == [{"period_start": "2024-05-01", "category": None, "income": 0.0, "expense": 37.5, "net": -37.5}]
+
+    assert async_client.get("/transactions/", headers=headers, params={"cursor": "!!"}).status_code == 400
+    assert async_client.get("/transactions/", headers={"Authorization": "Bearer nope"}).status_code == 401